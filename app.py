@@ -1,16 +1,20 @@
 # app.py - Application Flask pour la plateforme de matching d'emplois avec ATS
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, Response, stream_with_context
 import pandas as pd
+import numpy as np
 import os
 import json
-import requests
 from datetime import datetime
 import tempfile
 from werkzeug.utils import secure_filename
 from ats_scorer import ATSScorer
+from job_index import InvertedIndex, JobColumnStore, JobSnapshot, tokenize
+from session_store import SQLiteSessionInterface
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement
@@ -21,6 +25,7 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), 'job_scraper'))
 try:
     from job_scraper.db_manager import JobDatabase
+    from job_scraper.orchestrator import ScrapingOrchestrator
     SCRAPING_ENABLED = True
 except ImportError:
     SCRAPING_ENABLED = False
@@ -35,16 +40,8 @@ app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['CV_FOLDER'] = 'user_cvs'  # Dossier pour stocker les CVs des utilisateurs
 app.config['PROOFS_FOLDER'] = 'user_proofs'  # Dossier pour les preuves (certificats, attestations)
 
-# Créer les dossiers nécessaires
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['CV_FOLDER'], exist_ok=True)
-os.makedirs(app.config['PROOFS_FOLDER'], exist_ok=True)
-
-# Initialiser l'analyseur ATS
-ATS_API_KEY = os.getenv('ATS_API_KEY')
-if not ATS_API_KEY:
-    raise ValueError("❌ ERREUR: ATS_API_KEY non trouvée dans .env. Veuillez créer un fichier .env avec votre clé API Groq.")
-ats_scorer = ATSScorer(ATS_API_KEY)
+# Vérifications de documents simultanées (/verify-all-documents)
+VERIFY_MAX_WORKERS = int(os.getenv('VERIFY_MAX_WORKERS', 4))
 
 # ==================== CHROMADB STATUS ====================
 chromadb_status = {
@@ -79,9 +76,9 @@ def check_chromadb_status():
 
         # Vérifier ChromaDB
         try:
-            from course_scraper.course_embedding_store import CourseEmbeddingStore
+            from course_scraper.course_embedding_store import get_store, warm_up
             chroma_path = os.path.join('course_scraper', 'chroma_db')
-            store = CourseEmbeddingStore(
+            store = get_store(
                 db_path=coursera_db_path,
                 chroma_path=chroma_path
             )
@@ -97,6 +94,13 @@ def check_chromadb_status():
             else:
                 print(f"\n✅ CHROMADB PRÊT: {embeddings_count}/{total_courses} embeddings\n")
 
+            # Précharger le modèle en arrière-plan (la 1ère recommandation ne paie pas le chargement)
+            threading.Thread(
+                target=warm_up,
+                kwargs={'db_path': coursera_db_path, 'chroma_path': chroma_path},
+                daemon=True
+            ).start()
+
         except ImportError:
             chromadb_status['error'] = 'Module ChromaDB non installé'
         except Exception as e:
@@ -106,13 +110,8 @@ def check_chromadb_status():
         chromadb_status['error'] = str(e)
         print(f"[ERROR] Vérification ChromaDB échouée: {e}")
 
-# Vérifier ChromaDB au démarrage
-check_chromadb_status()
-
-# Initialiser le gestionnaire de scraping
+# Statut global du scraping
 if SCRAPING_ENABLED:
-    scraping_db = JobDatabase()
-    # Statut global du scraping
     scraping_status = {
         'is_running': False,
         'current_source': None,
@@ -127,7 +126,6 @@ if SCRAPING_ENABLED:
         'end_time': None
     }
 else:
-    scraping_db = None
     scraping_status = {}
 
 def load_scraping_config():
@@ -176,46 +174,242 @@ def save_scraping_config(config):
         json.dump(config, f, indent=2, ensure_ascii=False)
 
 class JobPlatform:
+    FACET_CACHE_SIZE = 256
+
     def __init__(self):
-        self.df = None
-        self.db = JobDatabase() if SCRAPING_ENABLED else None
+        # Snapshot courant (df + index + colonnes), remplacé en bloc à chaque rechargement
+        self._data = JobSnapshot(pd.DataFrame())
+        self._refresh_lock = threading.Lock()
+        self._filter_options_cache = None
+        self._facet_counts_cache = OrderedDict()
+        self._facet_lock = threading.Lock()
+        # Lecture seule: le chemin web ne bloque pas les écritures du scraping
+        self.db = JobDatabase(read_only=True) if SCRAPING_ENABLED else None
         self.load_data()
 
+    @property
+    def df(self):
+        return self._data.df
+
+    @property
+    def keyword_index(self):
+        return self._data.keyword_index
+
+    @property
+    def columns(self):
+        return self._data.columns
+
+    @property
+    def data_version(self):
+        """Version du dataset: invalide les caches de facettes à chaque rechargement"""
+        return self._data.version
+
     def load_data(self):
         """Charger les données depuis la base de données jobs.db"""
+        with self._refresh_lock:
+            self._publish(self._load_snapshot())
+
+    def _load_snapshot(self):
+        """Construire un snapshot complet à partir de jobs.db"""
+        version = self._data.version + 1
+
         try:
             if not SCRAPING_ENABLED or self.db is None:
                 print("WARNING: Scraping module non disponible, DataFrame vide")
-                self.df = pd.DataFrame()
-                return
+                return JobSnapshot(pd.DataFrame(), version=version)
 
             # Charger TOUS les jobs depuis jobs.db
             jobs = self.db.search_jobs(limit=50000)  # Augmenter la limite pour tout charger
 
             if not jobs:
                 print("WARNING: Aucun job trouvé dans jobs.db")
-                self.df = pd.DataFrame()
-                return
+                return JobSnapshot(pd.DataFrame(), version=version)
 
-            # Convertir en DataFrame pandas
-            self.df = pd.DataFrame(jobs)
-            
-            # Nettoyer les données
-            self.df = self.df.fillna('')
-            
-            # Nettoyer les colonnes salary pour éviter les erreurs
-            self.df['salary'] = self.df['salary'].astype(str)
+            df = self._prepare_frame(jobs)
             
-            print(f"Donnees chargees: {len(self.df)} offres d'emploi")
-            print(f"Colonnes: {list(self.df.columns)}")
+            print(f"Donnees chargees: {len(df)} offres d'emploi")
+            print(f"Colonnes: {list(df.columns)}")
+
+            # Construire l'index inversé pour la recherche par mot-clé
+            keyword_index = self._build_keyword_index(df)
+
+            # Précalculer les colonnes typées (dates, catégories, ordre de tri)
+            columns = JobColumnStore(df, date_column=self._date_column(df))
 
             # Ne pas valider les dates pour éviter les erreurs d'encodage
             # self._validate_dates()
 
+            return JobSnapshot(df, keyword_index, columns, version=version,
+                               last_id=int(df['id'].max()) if 'id' in df.columns else 0,
+                               last_updated=str(df['updated_at'].max()) if 'updated_at' in df.columns else '')
+
         except Exception as e:
             print(f"Erreur lors du chargement des donnees: {e}")
             # Créer un DataFrame vide en cas d'erreur
-            self.df = pd.DataFrame()
+            return JobSnapshot(pd.DataFrame(), version=version)
+
+    def refresh(self):
+        """
+        Rafraîchissement incrémental: offres insérées ou modifiées depuis le dernier chargement
+
+        Seules les lignes avec id > last_id ou updated_at >= last_updated sont lues.
+        Les nouvelles offres sont ajoutées en fin, les offres republiées (UPSERT) sont
+        remplacées à leur position: les index existants (URLs /job/<id>) restent valides.
+        Une offre désactivée ne peut pas être retirée sans décaler les positions:
+        dans ce cas, chargement complet. Le nouveau snapshot est publié atomiquement
+        (lecteurs sans verrou).
+
+        Returns:
+            Nombre d'offres ajoutées ou mises à jour
+        """
+        if not SCRAPING_ENABLED or self.db is None:
+            return 0
+
+        with self._refresh_lock:
+            data = self._data
+
+            # Rien en mémoire: chargement complet
+            if data.df.empty or data.columns is None:
+                self._publish(self._load_snapshot())
+                return len(self._data.df)
+
+            try:
+                jobs = self.db.get_jobs_since(data.last_id, data.last_updated or None)
+                if not jobs:
+                    return 0
+
+                rows = self._prepare_frame(jobs)
+                positions = pd.Index(data.df['id']).get_indexer(rows['id'])
+                known = positions >= 0
+                active = rows['is_active'].astype(int).to_numpy() == 1
+
+                if (known & ~active).any():
+                    self._publish(self._load_snapshot())
+                    print(f"Rafraichissement: offres desactivees, rechargement complet ({len(self._data.df)} offres)")
+                    return len(self._data.df)
+
+                # Offres déjà en mémoire: ne garder que celles dont le contenu a changé
+                # (les lignes de la dernière seconde sont relues à chaque appel)
+                columns = data.df.columns
+                changed_positions = positions[known & active]
+                changed = rows[known & active]
+                if len(changed):
+                    current = data.df.iloc[changed_positions][columns].astype(str).to_numpy()
+                    differs = (current != changed[columns].astype(str).to_numpy()).any(axis=1)
+                    changed_positions = changed_positions[differs]
+                    changed = changed[differs]
+
+                new_rows = rows[~known & active]
+                if not len(changed) and not len(new_rows):
+                    return 0
+
+                df = data.df
+                keyword_index = data.keyword_index
+                store = data.columns
+
+                if len(changed):
+                    df = df.copy()
+                    for column in columns:
+                        df.iloc[changed_positions, df.columns.get_loc(column)] = changed[column].to_numpy()
+                    keyword_index = keyword_index.replaced(
+                        changed_positions.tolist(),
+                        self._documents(data.df.iloc[changed_positions]),
+                        self._documents(changed)
+                    )
+                    store = store.replaced(changed_positions, changed)
+
+                if len(new_rows):
+                    new_rows = new_rows.copy()
+                    new_rows.index = pd.RangeIndex(len(df), len(df) + len(new_rows))
+                    df = pd.concat([df, new_rows])
+                    keyword_index = keyword_index.extended(self._documents(new_rows))
+                    store = store.extended(new_rows)
+
+                self._publish(JobSnapshot(
+                    df,
+                    keyword_index=keyword_index,
+                    columns=store,
+                    version=data.version + 1,
+                    last_id=max(data.last_id, int(new_rows['id'].max())) if len(new_rows) else data.last_id,
+                    last_updated=max(data.last_updated, str(rows['updated_at'].max()))
+                ))
+
+                print(f"Rafraichissement: {len(new_rows)} nouvelles offres, {len(changed)} mises a jour "
+                      f"({len(df)} au total)")
+                return len(new_rows) + len(changed)
+
+            except Exception as e:
+                print(f"Erreur lors du rafraichissement des donnees: {e}")
+                return 0
+
+    def _publish(self, snapshot):
+        """Remplacer le snapshot courant (affectation atomique) et purger les caches périmés"""
+        self._data = snapshot
+        with self._facet_lock:
+            self._facet_counts_cache.clear()
+
+    @staticmethod
+    def _prepare_frame(jobs):
+        """Convertir des lignes jobs.db en DataFrame nettoyé"""
+        # Convertir en DataFrame pandas
+        df = pd.DataFrame(jobs)
+        
+        # Nettoyer les données
+        df = df.fillna('')
+        
+        # Nettoyer les colonnes salary pour éviter les erreurs
+        df['salary'] = df['salary'].astype(str)
+        return df
+
+    @staticmethod
+    def _date_column(df):
+        """Nom de la colonne de date (jobs.db la stocke dans date_posted)"""
+        if 'date' in df.columns:
+            return 'date'
+        return 'date_posted'
+
+    @staticmethod
+    def _documents(df):
+        """Textes indexés pour la recherche par mot-clé (titre + description)"""
+        return (df['title'].astype(str) + ' ' + df['description'].astype(str)).tolist()
+
+    @staticmethod
+    def _build_keyword_index(df):
+        """Construire l'index inversé (titre + description) sur les positions du DataFrame"""
+        start = time.time()
+        index = InvertedIndex()
+        index.build(JobPlatform._documents(df))
+
+        print(f"Index mots-cles: {len(index.vocabulary)} tokens en {time.time() - start:.2f}s")
+        return index
+
+    def _keyword_positions(self, data, keyword: str):
+        """
+        Positions des offres dont le titre ou la description contient le mot-clé
+
+        Returns:
+            Tableau de positions, ou None si l'index ne peut pas répondre
+            (index absent ou requête sans token indexable)
+        """
+        if data.keyword_index is None:
+            return None
+
+        positions = data.keyword_index.search(keyword)
+        if positions is None:
+            return None
+
+        # Requête d'un seul mot: les postings sont exacts (mots qui contiennent la requête).
+        # Sinon, vérifier la sous-chaîne exacte uniquement sur les candidats.
+        keyword_lower = keyword.lower().strip()
+        if tokenize(keyword_lower) == [keyword_lower] or positions.size == 0:
+            return positions
+
+        candidates = data.df.iloc[positions]
+        mask = (
+            candidates['title'].str.lower().str.contains(keyword_lower, regex=False, na=False) |
+            candidates['description'].str.lower().str.contains(keyword_lower, regex=False, na=False)
+        )
+        return positions[mask.to_numpy()]
     
     def _validate_dates(self):
         """Valider et analyser les formats de dates"""
@@ -260,143 +454,141 @@ class JobPlatform:
         except Exception as e:
             print(f"ERROR: Erreur validation dates: {e}")
     
-    def get_filter_options(self):
-        """Obtenir les options disponibles pour chaque filtre"""
-        if self.df.empty:
+    # Facettes: clé dans filters -> (colonne, paramètre de recherche, nombre de valeurs affichées)
+    FACETS = {
+        'locations': ('location', 'location', 20),
+        'companies': ('company', 'company', 30),
+        'job_types': ('job_type', 'job_type', None),
+        'contract_types': ('contrat', 'contract_type', 15),
+        'sources': ('source', 'source', None)
+    }
+
+    def get_filter_options(self, **selection):
+        """
+        Obtenir les options disponibles pour chaque filtre
+
+        Les options de base sont mises en cache par version du dataset.
+        Si une sélection est fournie (mêmes paramètres que search_jobs), on ajoute
+        'facet_counts': pour chaque facette, le nombre d'offres par valeur en
+        appliquant tous les autres filtres sélectionnés.
+        """
+        data = self._data
+        if data.df.empty or data.columns is None:
             return {}
-            
-        filters = {}
-        
-        # Locations uniques (limiter pour éviter les problèmes de performance)
-        locations = self.df['location'].value_counts().head(20)
-        filters['locations'] = list(locations.index) if not locations.empty else []
-        
-        # Companies uniques
-        companies = self.df['company'].value_counts().head(30)
-        filters['companies'] = list(companies.index) if not companies.empty else []
-        
-        # Job types
-        job_types = self.df['job_type'].value_counts()
-        filters['job_types'] = list(job_types.index) if not job_types.empty else []
-        
-        # Contract types
-        contract_types = self.df['contrat'].value_counts().head(15)
-        filters['contract_types'] = list(contract_types.index) if not contract_types.empty else []
-        
-        # Sources
-        sources = self.df['source'].value_counts()
-        filters['sources'] = list(sources.index) if not sources.empty else []
-        
-        # Date ranges - Analyser les dates disponibles
-        filters['date_ranges'] = self._get_date_ranges()
-        
+
+        # Les libellés de dates dépendent du jour courant
+        today = datetime.now().date()
+
+        if self._filter_options_cache and self._filter_options_cache[0] == (data.version, today):
+            filters = dict(self._filter_options_cache[1])
+        else:
+            filters = {}
+            for key, (column, _, limit) in self.FACETS.items():
+                counts = data.columns.facet_counts(column)
+                filters[key] = list(counts)[:limit] if limit else list(counts)
+
+            # Date ranges - Analyser les dates disponibles
+            filters['date_ranges'] = self._get_date_ranges(data)
+
+            self._filter_options_cache = ((data.version, today), filters)
+            filters = dict(filters)
+
+        selection = {name: value for name, value in selection.items() if value}
+        if selection:
+            filters['facet_counts'] = self._get_facet_counts(data, selection)
+
         return filters
-    
-    def _get_date_ranges(self):
+
+    def _get_facet_counts(self, data, selection):
+        """Comptes par valeur de chaque facette pour la sélection courante (cache LRU par version)"""
+        cache_key = (data.version, tuple(sorted(selection.items())))
+        with self._facet_lock:
+            if cache_key in self._facet_counts_cache:
+                self._facet_counts_cache.move_to_end(cache_key)
+                return self._facet_counts_cache[cache_key]
+
+        masks = self._filter_masks(data, **selection)
+        facet_counts = {}
+
+        for key, (column, param, _) in self.FACETS.items():
+            # Une facette ne se filtre pas elle-même (comme les facettes e-commerce)
+            mask = data.columns.all_rows()
+            for name, filter_mask in masks.items():
+                if name != param:
+                    mask &= filter_mask
+            facet_counts[key] = data.columns.facet_counts(column, mask)
+
+        with self._facet_lock:
+            self._facet_counts_cache[cache_key] = facet_counts
+            if len(self._facet_counts_cache) > self.FACET_CACHE_SIZE:
+                self._facet_counts_cache.popitem(last=False)
+
+        return facet_counts
+
+    def _get_date_ranges(self, data):
         """Générer les options de filtres par date"""
-        if self.df.empty or 'date' not in self.df.columns:
+        if data.columns is None or not data.columns.date_valid.any():
             return []
-        
-        from datetime import datetime, timedelta
-        
+
+        from datetime import timedelta
+
         try:
-            # Convertir les dates en format datetime avec format français
-            dates_series = pd.to_datetime(self.df['date'], errors='coerce', dayfirst=True)
-            dates_series = dates_series.dropna()
-            
-            if dates_series.empty:
-                return []
-            
-            # Date la plus récente et la plus ancienne
-            max_date = dates_series.max()
-            min_date = dates_series.min()
+            # Dates précalculées (epoch int64) - aucun re-parsing
+            valid_dates = data.columns.date_ns[data.columns.date_valid]
+            max_date = pd.Timestamp(valid_dates.max())
+            min_date = pd.Timestamp(valid_dates.min())
             today = datetime.now()
-            
+
+            def count_since(start):
+                return int((valid_dates >= pd.Timestamp(start).value).sum())
+
             # Générer les options de filtre
             ranges = []
-            
-            # Dernières 24h
-            yesterday = today - timedelta(days=1)
-            if max_date >= pd.Timestamp(yesterday):
-                count_24h = len(dates_series[dates_series >= pd.Timestamp(yesterday)])
-                ranges.append({
-                    'label': f'🆕 Dernières 24h ({count_24h})',
-                    'value': '1day',
-                    'start': yesterday.strftime('%Y-%m-%d'),
-                    'end': today.strftime('%Y-%m-%d')
-                })
-            
-            # Dernière semaine
-            week_ago = today - timedelta(days=7)
-            if max_date >= pd.Timestamp(week_ago):
-                count_week = len(dates_series[dates_series >= pd.Timestamp(week_ago)])
-                ranges.append({
-                    'label': f'📅 Cette semaine ({count_week})',
-                    'value': '1week',
-                    'start': week_ago.strftime('%Y-%m-%d'),
-                    'end': today.strftime('%Y-%m-%d')
-                })
-            
-            # Dernier mois
-            month_ago = today - timedelta(days=30)
-            if max_date >= pd.Timestamp(month_ago):
-                count_month = len(dates_series[dates_series >= pd.Timestamp(month_ago)])
-                ranges.append({
-                    'label': f'📆 Ce mois ({count_month})',
-                    'value': '1month',
-                    'start': month_ago.strftime('%Y-%m-%d'),
-                    'end': today.strftime('%Y-%m-%d')
-                })
-            
-            # Derniers 3 mois
-            three_months_ago = today - timedelta(days=90)
-            if max_date >= pd.Timestamp(three_months_ago):
-                count_3months = len(dates_series[dates_series >= pd.Timestamp(three_months_ago)])
-                ranges.append({
-                    'label': f'🗓️ 3 mois ({count_3months})',
-                    'value': '3months',
-                    'start': three_months_ago.strftime('%Y-%m-%d'),
-                    'end': today.strftime('%Y-%m-%d')
-                })
-            
-            # Cette année
-            year_start = datetime(today.year, 1, 1)
-            if max_date >= pd.Timestamp(year_start):
-                count_year = len(dates_series[dates_series >= pd.Timestamp(year_start)])
-                ranges.append({
-                    'label': f'📅 {today.year} ({count_year})',
-                    'value': 'thisyear',
-                    'start': year_start.strftime('%Y-%m-%d'),
-                    'end': today.strftime('%Y-%m-%d')
-                })
-            
+            options = [
+                ('🆕 Dernières 24h', '1day', today - timedelta(days=1)),
+                ('📅 Cette semaine', '1week', today - timedelta(days=7)),
+                ('📆 Ce mois', '1month', today - timedelta(days=30)),
+                ('🗓️ 3 mois', '3months', today - timedelta(days=90)),
+                (f'📅 {today.year}', 'thisyear', datetime(today.year, 1, 1))
+            ]
+
+            for label, value, start in options:
+                if max_date >= pd.Timestamp(start):
+                    ranges.append({
+                        'label': f'{label} ({count_since(start)})',
+                        'value': value,
+                        'start': start.strftime('%Y-%m-%d'),
+                        'end': today.strftime('%Y-%m-%d')
+                    })
+
             # Toutes les dates
             ranges.append({
-                'label': f'🗓️ Toutes les dates ({len(dates_series)})',
+                'label': f'🗓️ Toutes les dates ({len(valid_dates)})',
                 'value': 'all',
                 'start': min_date.strftime('%Y-%m-%d'),
                 'end': max_date.strftime('%Y-%m-%d')
             })
-            
+
             return ranges
-            
+
         except Exception as e:
             print(f"Erreur calcul date ranges: {e}")
             return []
     
     def get_job_by_index(self, index: int) -> dict:
         """Récupérer une offre par son index"""
-        if self.df.empty:
+        data = self._data
+        if data.df.empty:
             return None
             
         try:
             # Vérifier si l'index existe dans le DataFrame
-            if index in self.df.index:
-                job = self.df.loc[index].to_dict()
+            if index in data.df.index:
+                job = data.df.loc[index].to_dict()
                 return job
-            elif 0 <= index < len(self.df):
+            elif 0 <= index < len(data.df):
                 # Fallback: utiliser l'index positionnel
-                job = self.df.iloc[index].to_dict()
+                job = data.df.iloc[index].to_dict()
                 return job
             else:
                 return None
@@ -408,62 +600,30 @@ class JobPlatform:
                    custom_end_date='', page=1, per_page=20):
         """Rechercher et filtrer les offres d'emploi"""
         
-        if self.df.empty:
+        data = self._data
+        if data.df.empty or data.columns is None:
             return [], 0, {}
         
         try:
-            # Copie du DataFrame pour filtrer
-            filtered_df = self.df.copy()
+            # Composition de masques booléens sur les colonnes précalculées (aucune copie)
+            mask = data.columns.all_rows()
+            for filter_mask in self._filter_masks(
+                data,
+                keyword=keyword, location=location, company=company, job_type=job_type,
+                contract_type=contract_type, source=source, date_range=date_range,
+                custom_start_date=custom_start_date, custom_end_date=custom_end_date
+            ).values():
+                mask &= filter_mask
             
-            # Filtre par mot-clé (titre et description)
-            if keyword:
-                keyword_lower = keyword.lower()
-                mask = (
-                    filtered_df['title'].str.lower().str.contains(keyword_lower, na=False) |
-                    filtered_df['description'].str.lower().str.contains(keyword_lower, na=False)
-                )
-                filtered_df = filtered_df[mask]
-            
-            # Filtre par localisation
-            if location:
-                filtered_df = filtered_df[filtered_df['location'].str.contains(location, na=False)]
-            
-            # Filtre par entreprise
-            if company:
-                filtered_df = filtered_df[filtered_df['company'] == company]
-            
-            # Filtre par type d'emploi
-            if job_type:
-                filtered_df = filtered_df[filtered_df['job_type'] == job_type]
-            
-            # Filtre par type de contrat
-            if contract_type:
-                filtered_df = filtered_df[filtered_df['contrat'] == contract_type]
-            
-            # Filtre par source
-            if source:
-                filtered_df = filtered_df[filtered_df['source'] == source]
-            
-            # Filtre par date
-            filtered_df = self._apply_date_filter(filtered_df, date_range, custom_start_date, custom_end_date)
-            
-            # Tri par date (plus récent en premier)
-            try:
-                # Convertir les dates pour le tri avec format français
-                filtered_df['date_parsed'] = pd.to_datetime(filtered_df['date'], errors='coerce', dayfirst=True)
-                filtered_df = filtered_df.sort_values('date_parsed', ascending=False, na_position='last')
-                # Supprimer la colonne temporaire
-                filtered_df = filtered_df.drop('date_parsed', axis=1)
-            except Exception as e:
-                print(f"Erreur tri par date: {e}")
-                pass
+            # Tri par date (plus récent en premier) via l'ordre précalculé
+            positions = data.columns.sorted_positions(mask)
             
             # Pagination
-            total = len(filtered_df)
+            total = len(positions)
             start_idx = (page - 1) * per_page
             end_idx = start_idx + per_page
             
-            jobs_page = filtered_df.iloc[start_idx:end_idx]
+            jobs_page = data.df.iloc[positions[start_idx:end_idx]]
             
             # Convertir en dictionnaire avec indices originaux
             jobs = []
@@ -497,99 +657,147 @@ class JobPlatform:
                 'per_page': per_page
             }
     
-    def _apply_date_filter(self, df, date_range, custom_start_date, custom_end_date):
-        """Appliquer le filtre par date avec format français"""
-        if df.empty or 'date' not in df.columns:
-            return df
+    def _filter_masks(self, data, keyword='', location='', company='', job_type='',
+                      contract_type='', source='', date_range='', custom_start_date='',
+                      custom_end_date=''):
+        """Masque booléen de chaque filtre actif, indexé par nom de paramètre"""
+        masks = {}
         
-        try:
-            from datetime import datetime, timedelta
-            
-            # Créer une copie pour éviter les modifications
-            df_copy = df.copy()
-            
-            # Convertir les dates avec format français (dayfirst=True)
-            df_copy['date_parsed'] = pd.to_datetime(df_copy['date'], errors='coerce', dayfirst=True)
-            
-            # Log des conversions pour debugging
-            total_dates = len(df_copy)
-            valid_dates = len(df_copy.dropna(subset=['date_parsed']))
-            if valid_dates < total_dates:
-                print(f"WARNING: Dates converties: {valid_dates}/{total_dates} ({(valid_dates/total_dates)*100:.1f}%)")
-            
-            # Supprimer les lignes avec des dates invalides
-            df_copy = df_copy.dropna(subset=['date_parsed'])
-            
-            if df_copy.empty:
-                print("ERROR: Aucune date valide apres conversion")
-                return df.iloc[0:0]  # DataFrame vide mais avec les bonnes colonnes
-            
-            today = datetime.now()
-            
-            # Appliquer le filtre selon le type
-            if date_range and date_range != 'all':
-                start_date = None
-                end_date = today
-                
-                if date_range == '1day':
-                    start_date = today - timedelta(days=1)
-                elif date_range == '1week':
-                    start_date = today - timedelta(days=7)
-                elif date_range == '1month':
-                    start_date = today - timedelta(days=30)
-                elif date_range == '3months':
-                    start_date = today - timedelta(days=90)
-                elif date_range == 'thisyear':
-                    start_date = datetime(today.year, 1, 1)
-                else:
-                    # Format non reconnu - retourner sans filtre
-                    print(f"WARNING: Format de date_range non reconnu: {date_range}")
-                    return df_copy.drop('date_parsed', axis=1)
-                
-                if start_date:
-                    # Convertir en pandas Timestamp pour la comparaison
-                    start_ts = pd.Timestamp(start_date)
-                    end_ts = pd.Timestamp(end_date)
-                    
-                    # Filtrer par la plage de dates
-                    mask = (df_copy['date_parsed'] >= start_ts) & (df_copy['date_parsed'] <= end_ts)
-                    df_filtered = df_copy[mask]
-                    
-                    print(f"Filtre {date_range}: {len(df_filtered)} offres trouvees")
-                    df_copy = df_filtered
-            
-            # Filtre par dates personnalisées
-            elif custom_start_date or custom_end_date:
-                if custom_start_date:
-                    try:
-                        start_date = datetime.strptime(custom_start_date, '%Y-%m-%d')
-                        start_ts = pd.Timestamp(start_date)
-                        mask_start = df_copy['date_parsed'] >= start_ts
-                        df_copy = df_copy[mask_start]
-                        print(f"Filtre depuis {custom_start_date}: {len(df_copy)} offres")
-                    except ValueError as e:
-                        print(f"ERROR: Date de debut invalide {custom_start_date}: {e}")
-                
-                if custom_end_date:
-                    try:
-                        end_date = datetime.strptime(custom_end_date, '%Y-%m-%d')
-                        end_ts = pd.Timestamp(end_date)
-                        mask_end = df_copy['date_parsed'] <= end_ts
-                        df_copy = df_copy[mask_end]
-                        print(f"Filtre jusqu'a {custom_end_date}: {len(df_copy)} offres")
-                    except ValueError as e:
-                        print(f"ERROR: Date de fin invalide {custom_end_date}: {e}")
+        # Filtre par mot-clé (titre et description) via l'index inversé
+        if keyword:
+            positions = self._keyword_positions(data, keyword)
+            if positions is not None:
+                keyword_mask = np.zeros(len(data.df), dtype=bool)
+                keyword_mask[positions] = True
+            else:
+                keyword_lower = keyword.lower()
+                keyword_mask = (
+                    data.df['title'].str.lower().str.contains(keyword_lower, regex=False, na=False) |
+                    data.df['description'].str.lower().str.contains(keyword_lower, regex=False, na=False)
+                ).to_numpy()
+            masks['keyword'] = keyword_mask
+        
+        # Filtre par localisation
+        if location:
+            masks['location'] = data.columns.contains('location', location)
+        
+        # Filtres par égalité (entreprise, type d'emploi, contrat, source)
+        if company:
+            masks['company'] = data.columns.equals('company', company)
+        if job_type:
+            masks['job_type'] = data.columns.equals('job_type', job_type)
+        if contract_type:
+            masks['contract_type'] = data.columns.equals('contrat', contract_type)
+        if source:
+            masks['source'] = data.columns.equals('source', source)
+        
+        # Filtre par date
+        date_mask = self._date_mask(data, date_range, custom_start_date, custom_end_date)
+        if date_mask is not None:
+            masks['date_range'] = date_mask
+        
+        return masks
+    
+    def _date_mask(self, data, date_range, custom_start_date, custom_end_date):
+        """
+        Construire le masque du filtre par date à partir des dates précalculées
+
+        Returns:
+            Masque booléen, ou None si aucun filtre de date n'est demandé
+        """
+        from datetime import datetime, timedelta
+        
+        today = datetime.now()
+        
+        # Appliquer le filtre selon le type
+        if date_range and date_range != 'all':
+            start_date = None
             
-            # Supprimer la colonne temporaire et retourner
-            return df_copy.drop('date_parsed', axis=1, errors='ignore')
+            if date_range == '1day':
+                start_date = today - timedelta(days=1)
+            elif date_range == '1week':
+                start_date = today - timedelta(days=7)
+            elif date_range == '1month':
+                start_date = today - timedelta(days=30)
+            elif date_range == '3months':
+                start_date = today - timedelta(days=90)
+            elif date_range == 'thisyear':
+                start_date = datetime(today.year, 1, 1)
+            else:
+                # Format non reconnu - pas de filtre
+                print(f"WARNING: Format de date_range non reconnu: {date_range}")
+                return None
             
-        except Exception as e:
-            print(f"ERROR: Erreur dans _apply_date_filter: {e}")
-            print(f"   Type d'erreur: {type(e).__name__}")
-            return df
+            return data.columns.date_between(start_date, today)
+        
+        # Filtre par dates personnalisées
+        start_date = None
+        end_date = None
+        
+        if custom_start_date:
+            try:
+                start_date = datetime.strptime(custom_start_date, '%Y-%m-%d')
+            except ValueError as e:
+                print(f"ERROR: Date de debut invalide {custom_start_date}: {e}")
+        
+        if custom_end_date:
+            try:
+                end_date = datetime.strptime(custom_end_date, '%Y-%m-%d')
+            except ValueError as e:
+                print(f"ERROR: Date de fin invalide {custom_end_date}: {e}")
+        
+        # 'all' sans dates personnalisées: aucun filtre (les offres sans date valide,
+        # ex. Tunisie Travail "Non précisé", restent visibles)
+        if custom_start_date or custom_end_date:
+            return data.columns.date_between(start_date, end_date)
+        
+        return None
+
+def init_services():
+    """
+    Initialiser les services de l'application (sessions, ATS, ChromaDB, scraping, offres)
+
+    Appelée à l'import du module, sauf dans les processus d'encodage de la
+    migration ChromaDB: lancés en spawn, ils réimportent ce fichier sous le nom
+    __mp_main__ et n'ont besoin d'aucun de ces services.
+    """
+    global ats_scorer, scraping_db, scraping_orchestrator, job_platform
+
+    # Sessions côté serveur: le cookie ne contient qu'un identifiant opaque
+    app.session_interface = SQLiteSessionInterface(
+        db_path=os.getenv('SESSION_DB_PATH', 'cache/sessions.db'),
+        ttl=int(os.getenv('SESSION_TTL', 7 * 24 * 3600))
+    )
+
+    # Créer les dossiers nécessaires
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['CV_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['PROOFS_FOLDER'], exist_ok=True)
+
+    # Initialiser l'analyseur ATS
+    ats_api_key = os.getenv('ATS_API_KEY')
+    if not ats_api_key:
+        raise ValueError("❌ ERREUR: ATS_API_KEY non trouvée dans .env. Veuillez créer un fichier .env avec votre clé API Groq.")
+    ats_scorer = ATSScorer(ats_api_key)
 
-# Instance globale
-job_platform = JobPlatform()
+    # Vérifier ChromaDB au démarrage
+    check_chromadb_status()
+
+    # Initialiser le gestionnaire de scraping
+    if SCRAPING_ENABLED:
+        scraping_db = JobDatabase()
+        # Sources en parallèle, un seul écrivain SQLite par lots
+        scraping_orchestrator = ScrapingOrchestrator(scraping_db, scraping_status)
+    else:
+        scraping_db = None
+        scraping_orchestrator = None
+
+    # Instance globale
+    job_platform = JobPlatform()
+
+
+if __name__ != '__mp_main__':
+    init_services()
 
 @app.route('/upload-cv', methods=['POST'])
 def upload_cv():
@@ -617,17 +825,20 @@ def upload_cv():
             cv_filename = f"{session_id}.{extension}"
             cv_path = os.path.join(app.config['CV_FOLDER'], cv_filename)
 
-            # Supprimer l'ancien CV si existe
+            # Supprimer l'ancien CV si existe (et son texte en cache)
             for old_file in os.listdir(app.config['CV_FOLDER']):
                 if old_file.startswith(session_id):
-                    os.remove(os.path.join(app.config['CV_FOLDER'], old_file))
+                    old_path = os.path.join(app.config['CV_FOLDER'], old_file)
+                    ats_scorer.supprimer_texte_cache(old_path)
+                    os.remove(old_path)
 
             file.save(cv_path)
 
-            # Extraire le texte du CV pour vérification
+            # Extraire le texte du CV (mis en cache pour les pages suivantes)
             cv_texte = ats_scorer.extraire_texte_fichier(cv_path)
 
             if not cv_texte or len(cv_texte.strip()) < 50:
+                ats_scorer.supprimer_texte_cache(cv_path)
                 os.remove(cv_path)
                 return jsonify({'success': False, 'error': 'Impossible d\'extraire le texte du CV ou CV trop court'}), 400
 
@@ -653,6 +864,7 @@ def remove_cv():
     """Supprimer le CV uploadé"""
     try:
         if 'cv_path' in session and os.path.exists(session['cv_path']):
+            ats_scorer.supprimer_texte_cache(session['cv_path'])
             os.remove(session['cv_path'])
 
         session.pop('cv_uploaded', None)
@@ -737,8 +949,18 @@ def index():
         page=page
     )
 
-    # Obtenir les options de filtres
-    filters = job_platform.get_filter_options()
+    # Obtenir les options de filtres (avec comptes par facette pour la sélection courante)
+    filters = job_platform.get_filter_options(
+        keyword=keyword,
+        location=location,
+        company=company,
+        job_type=job_type,
+        contract_type=contract_type,
+        source=source,
+        date_range=date_range,
+        custom_start_date=custom_start_date,
+        custom_end_date=custom_end_date
+    )
 
     # Vérifier si le CV est uploadé
     cv_uploaded = session.get('cv_uploaded', False)
@@ -790,6 +1012,38 @@ def api_search():
         'success': True
     })
 
+@app.route('/api/search/fts')
+def api_search_fts():
+    """API de recherche plein texte directement dans jobs.db (FTS5 + BM25)"""
+    if not SCRAPING_ENABLED:
+        return jsonify({'success': False, 'message': 'Scraping non disponible'}), 400
+
+    keyword = request.args.get('keyword', '')
+    location = request.args.get('location', '')
+    source = request.args.get('source', '')
+    page = int(request.args.get('page', 1))
+    per_page = max(1, min(int(request.args.get('per_page', 20)), 100))
+
+    result = job_platform.db.search_jobs_fts(
+        keyword,
+        location=location or None,
+        source=source or None,
+        page=page,
+        per_page=per_page
+    )
+
+    total = result['total']
+    return jsonify({
+        'jobs': result['jobs'],
+        'stats': {
+            'total_jobs': total,
+            'total_pages': (total + per_page - 1) // per_page if total > 0 else 1,
+            'current_page': result['page'],
+            'per_page': per_page
+        },
+        'success': True
+    })
+
 @app.route('/api/recommend-courses', methods=['POST'])
 def recommend_courses():
     """API pour recommander des cours Coursera basés sur les compétences manquantes - OPTIMISÉ CHROMADB"""
@@ -818,47 +1072,38 @@ def recommend_courses():
 
         recommendations = []
 
-        # NOUVEAU : Utiliser la fonction optimisée avec ChromaDB
-        # Pour chaque compétence manquante, récupérer TOUS les cours recommandés
-        for skill in missing_skills:  # TOUS les compétences (pas de limite)
-            try:
-                # Utiliser la fonction recommander_cours() qui utilise ChromaDB
-                # Récupérer exactement 3 cours par compétence
-                print(f"[DEBUG] Recherche de cours pour: {skill}")
-                cours_list = ats_scorer.recommander_cours(
-                    competence=skill,
-                    db_path=coursera_db_path,
-                    top_n=3,  # Top 3 cours par compétence comme demandé
-                    use_chromadb=True  # Force l'utilisation de ChromaDB
-                )
-                print(f"[DEBUG] {len(cours_list)} cours trouvés pour '{skill}'")
-
-                # Convertir le format pour l'API
-                for cours in cours_list:
-                    course = {
-                        'title': cours.get('titre', ''),
-                        'description': cours.get('description', ''),
-                        'partner': cours.get('organisme', 'Coursera'),
-                        'url': cours.get('url', ''),
-                        'difficulty': cours.get('difficulte', 'Non spécifié'),
-                        'duration': cours.get('duree', 'Non spécifié'),
-                        'language': 'en',  # Par défaut
-                        'matched_skill': skill,
-                        'score_similarite': cours.get('score_similarite', 0)
-                    }
-
-                    # NOUVEAU: Permettre les doublons entre compétences différentes
-                    # Un cours peut être pertinent pour plusieurs compétences
-                    # On ne vérifie les doublons QUE pour la même compétence
-                    same_skill_courses = [r for r in recommendations if r['matched_skill'] == skill]
-                    if not any(r['url'] == course['url'] for r in same_skill_courses):
-                        recommendations.append(course)
-                        print(f"  [DEBUG] Ajouté: {course['title'][:50]}... pour '{skill}'")
+        # Toutes les compétences en une seule recherche ChromaDB groupée
+        # (un encodage du modèle + une requête, au lieu d'un aller-retour par compétence)
+        cours_par_competence = ats_scorer.recommander_cours_batch(
+            missing_skills,
+            db_path=coursera_db_path,
+            top_n=3,  # Top 3 cours par compétence comme demandé
+            use_chromadb=True
+        )
 
-            except Exception as e:
-                print(f"[ERROR] Erreur recommandation pour '{skill}': {e}")
-                # Continuer avec les autres compétences même en cas d'erreur
-                continue
+        for skill in missing_skills:
+            cours_list = cours_par_competence.get(skill, [])
+            print(f"[DEBUG] {len(cours_list)} cours trouvés pour '{skill}'")
+
+            # Convertir le format pour l'API
+            for cours in cours_list:
+                course = {
+                    'title': cours.get('titre', ''),
+                    'description': cours.get('description', ''),
+                    'partner': cours.get('organisme', 'Coursera'),
+                    'url': cours.get('url', ''),
+                    'difficulty': cours.get('difficulte', 'Non spécifié'),
+                    'duration': cours.get('duree', 'Non spécifié'),
+                    'language': 'en',  # Par défaut
+                    'matched_skill': skill,
+                    'score_similarite': cours.get('score_similarite', 0)
+                }
+
+                # Un cours peut être pertinent pour plusieurs compétences:
+                # on ne vérifie les doublons QUE pour la même compétence
+                same_skill_courses = [r for r in recommendations if r['matched_skill'] == skill]
+                if not any(r['url'] == course['url'] for r in same_skill_courses):
+                    recommendations.append(course)
 
         # Pas de limite globale - on garde tous les cours (3 par compétence)
         # Trier par score de similarité décroissant
@@ -1261,9 +1506,104 @@ def verify_proof(category, item_index):
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _verify_proof_item(proof_key, proof_info, credentials):
+    """Vérifier une preuve uploadée (exécuté dans un thread du pool: pas d'accès à la session)"""
+    try:
+        # Parser le proof_key (format: "category_index")
+        parts = proof_key.split('_')
+        category = '_'.join(parts[:-1])  # Récupérer toute la catégorie
+        item_index = int(parts[-1])
+
+        # Récupérer le claim
+        category_items = credentials.get(category, [])
+        if item_index >= len(category_items):
+            return {
+                'proof_key': proof_key,
+                'status': 'error',
+                'message': 'Claim introuvable'
+            }
+
+        claim = category_items[item_index]
+
+        # Vérifier le document avec VLM
+        verification = ats_scorer.verifier_document_vlm(claim, proof_info['filepath'], category)
+
+        if 'erreur' in verification:
+            return {
+                'proof_key': proof_key,
+                'claim_name': claim.get('nom', 'N/A'),
+                'status': 'error',
+                'message': verification['erreur']
+            }
+
+        return {
+            'proof_key': proof_key,
+            'claim_name': claim.get('nom', 'N/A'),
+            'status': 'success',
+            'verification': verification
+        }
+
+    except Exception as e:
+        return {
+            'proof_key': proof_key,
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+def _iter_proof_verifications(uploaded_proofs, credentials):
+    """
+    Vérifier les preuves en parallèle (pool borné à VERIFY_MAX_WORKERS threads)
+
+    Yields:
+        (index de la preuve dans uploaded_proofs, détail), dans l'ordre de fin
+    """
+    items = list(uploaded_proofs.items())
+    if not items:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(VERIFY_MAX_WORKERS, len(items))) as pool:
+        futures = {
+            pool.submit(_verify_proof_item, proof_key, proof_info, credentials): index
+            for index, (proof_key, proof_info) in enumerate(items)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _verification_summary(details):
+    """Résultats agrégés (détails dans l'ordre des preuves uploadées)"""
+    return {
+        'total_documents': len(details),
+        'verifies': sum(1 for d in details if d['status'] == 'success'),
+        'erreurs': sum(1 for d in details if d['status'] != 'success'),
+        'details': details
+    }
+
+
+def _sse_event(event, data):
+    """Formater un événement server-sent events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _save_verification_results(data, details):
+    """Enregistrer les vérifications réussies dans les données de session"""
+    verification_results = data.get('verification_results', {})
+    for detail in details:
+        if detail['status'] == 'success':
+            verification_results[detail['proof_key']] = detail['verification']
+    data['verification_results'] = verification_results
+
+
 @app.route('/verify-all-documents', methods=['POST'])
 def verify_all_documents():
-    """Vérifier TOUS les documents un par un de manière séquentielle"""
+    """
+    Vérifier TOUS les documents en parallèle
+
+    Avec ?stream=1 (ou Accept: text/event-stream), la progression est envoyée
+    en server-sent events: un événement "progress" par document vérifié, puis
+    un événement "done" avec les résultats complets.
+    """
     uploaded_proofs = session.get('uploaded_proofs', {})
     credentials = session.get('credentials_extracted', {})
 
@@ -1273,72 +1613,42 @@ def verify_all_documents():
     if not credentials:
         return jsonify({'success': False, 'error': 'Aucune credential extraite du CV'}), 400
 
-    results = {
-        'total_documents': len(uploaded_proofs),
-        'verifies': 0,
-        'erreurs': 0,
-        'details': []
-    }
+    total = len(uploaded_proofs)
+    stream = request.args.get('stream') == '1' or request.accept_mimetypes.best == 'text/event-stream'
 
-    # Vérifier chaque document UN PAR UN
-    for proof_key, proof_info in uploaded_proofs.items():
-        try:
-            # Parser le proof_key (format: "category_index")
-            parts = proof_key.split('_')
-            category = '_'.join(parts[:-1])  # Récupérer toute la catégorie
-            item_index = int(parts[-1])
-
-            # Récupérer le claim
-            category_items = credentials.get(category, [])
-            if item_index >= len(category_items):
-                results['erreurs'] += 1
-                results['details'].append({
-                    'proof_key': proof_key,
-                    'status': 'error',
-                    'message': 'Claim introuvable'
-                })
-                continue
-
-            claim = category_items[item_index]
-
-            # Vérifier le document avec VLM
-            verification = ats_scorer.verifier_document_vlm(claim, proof_info['filepath'], category)
-
-            if 'erreur' in verification:
-                results['erreurs'] += 1
-                results['details'].append({
-                    'proof_key': proof_key,
-                    'claim_name': claim.get('nom', 'N/A'),
-                    'status': 'error',
-                    'message': verification['erreur']
-                })
-            else:
-                results['verifies'] += 1
-                results['details'].append({
-                    'proof_key': proof_key,
-                    'claim_name': claim.get('nom', 'N/A'),
-                    'status': 'success',
-                    'verification': verification
-                })
-
-                # Sauvegarder le résultat en session
-                if 'verification_results' not in session:
-                    session['verification_results'] = {}
-                session['verification_results'][proof_key] = verification
+    if stream:
+        sid = session.sid
 
-        except Exception as e:
-            results['erreurs'] += 1
-            results['details'].append({
-                'proof_key': proof_key,
-                'status': 'error',
-                'message': str(e)
-            })
+        def generate():
+            details = [None] * total
+            yield _sse_event('start', {'total': total})
+
+            for done, (index, detail) in enumerate(_iter_proof_verifications(uploaded_proofs, credentials), 1):
+                details[index] = detail
+                yield _sse_event('progress', {'done': done, 'total': total, 'index': index, 'detail': detail})
+
+            # Les en-têtes sont déjà envoyés: les résultats sont écrits
+            # directement dans la session côté serveur
+            app.session_interface.modify(sid, lambda data: _save_verification_results(data, details))
+            yield _sse_event('done', {'success': True, 'results': _verification_summary(details)})
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
 
+    details = [None] * total
+    for index, detail in _iter_proof_verifications(uploaded_proofs, credentials):
+        details[index] = detail
+
+    # Sauvegarder les résultats en session
+    _save_verification_results(session, details)
     session.modified = True
 
     return jsonify({
         'success': True,
-        'results': results
+        'results': _verification_summary(details)
     })
 
 @app.route('/technical-tests', methods=['GET'])
@@ -1640,12 +1950,7 @@ Sois rigoureux et objectif dans ton analyse."""
 
     try:
         print(f"Calling Groq API...")
-        response = requests.post(
-            ats_scorer.url,
-            headers={
-                "Authorization": f"Bearer {ats_scorer.api_key}",
-                "Content-Type": "application/json"
-            },
+        response = ats_scorer.llm_client.post(
             json={
                 "model": ats_scorer.model,
                 "messages": [{"role": "user", "content": prompt}],
@@ -1682,6 +1987,11 @@ Sois rigoureux et objectif dans ton analyse."""
 
 # ==================== ROUTES D'ADMINISTRATION DU SCRAPING ====================
 
+def _on_scraping_complete(totals):
+    """Rendre les nouvelles offres (et les republications) visibles sans redémarrer l'application"""
+    if sum(counts['inserted'] + counts['updated'] for counts in totals.values()) > 0:
+        job_platform.refresh()
+
 @app.route('/admin/scraping')
 def admin_scraping():
     """Dashboard administrateur pour le scraping"""
@@ -1721,14 +2031,6 @@ def scrape_single_source(source_name):
     if not SCRAPING_ENABLED:
         return jsonify({'success': False, 'message': 'Scraping non disponible'}), 400
 
-    global scraping_status
-
-    if scraping_status['is_running']:
-        return jsonify({
-            'success': False,
-            'message': 'Un scraping est déjà en cours'
-        })
-
     config = load_scraping_config()
     source_config = config.get('scrapers', {}).get(source_name)
 
@@ -1738,102 +2040,38 @@ def scrape_single_source(source_name):
             'message': f'Source {source_name} non disponible ou désactivée'
         })
 
-    def run_single_scraping():
-        global scraping_status
-        scraping_status['is_running'] = True
-        scraping_status['current_source'] = source_name
-        scraping_status['sources_status'][source_name]['status'] = 'running'
-        scraping_status['start_time'] = datetime.now().isoformat()
-
-        # Ajouter le chemin job_scraper au sys.path
-        scraper_path = os.path.join(os.path.dirname(__file__), 'job_scraper')
-        if scraper_path not in sys.path:
-            sys.path.insert(0, scraper_path)
+    if not scraping_orchestrator.launch(config, [source_name], on_complete=_on_scraping_complete):
+        return jsonify({
+            'success': False,
+            'message': f'Le scraping de {source_name} est déjà en cours'
+        })
 
-        try:
-            jobs = []
+    return jsonify({
+        'success': True,
+        'message': f'Scraping de {source_name} démarré'
+    })
 
-            if source_name == 'google_jobs':
-                from google_jobs import scrape_google_jobs
-                queries = source_config.get('queries', [])
-                for i, query in enumerate(queries):
-                    scraping_status['sources_status'][source_name]['message'] = f'Query {i+1}/{len(queries)}: {query}'
-                    scraping_status['sources_status'][source_name]['progress'] = int((i / len(queries)) * 100)
-
-                    result = scrape_google_jobs(
-                        api_key=source_config.get('api_key'),
-                        query=query,
-                        max_results=source_config.get('max_results', 200),
-                        country=source_config.get('country', 'tn'),
-                        language=source_config.get('language', 'fr')
-                    )
-                    jobs.extend(result)
-                    time.sleep(2)
-
-            elif source_name == 'linkedin':
-                from Linkedin import scrape_linkedin_jobs_free
-                keywords = source_config.get('keywords', [])
-                for i, keyword in enumerate(keywords):
-                    scraping_status['sources_status'][source_name]['message'] = f'Keyword {i+1}/{len(keywords)}: {keyword}'
-                    scraping_status['sources_status'][source_name]['progress'] = int((i / len(keywords)) * 100)
-
-                    result = scrape_linkedin_jobs_free(
-                        keywords=keyword,
-                        location=source_config.get('location', 'Tunisia'),
-                        pages=source_config.get('pages', 2),
-                        get_descriptions=source_config.get('get_descriptions', False)
-                    )
-                    jobs.extend(result)
-                    time.sleep(3)
-
-            elif source_name == 'france_travail':
-                from france_travail import scrape_france_travail
-                scraping_status['sources_status'][source_name]['message'] = 'Scraping en cours...'
-
-                jobs = scrape_france_travail(
-                    client_id=source_config.get('client_id'),
-                    client_secret=source_config.get('client_secret'),
-                    days=source_config.get('days', 7)
-                )
-
-            elif source_name == 'tunisie_travail':
-                from tunisietravail import scrape_tunisie_travail
-                scraping_status['sources_status'][source_name]['message'] = 'Scraping en cours...'
-
-                jobs = scrape_tunisie_travail(
-                    ville=source_config.get('ville', 'tunis'),
-                    secteur=source_config.get('secteur', 'informatique'),
-                    max_pages=source_config.get('max_pages', 3)
-                )
-
-            # Insérer dans la base de données
-            if jobs:
-                result = scraping_db.bulk_insert_jobs(jobs, source_name)
-                scraping_status['sources_status'][source_name]['jobs_found'] = result['inserted']
-                scraping_status['sources_status'][source_name]['status'] = 'completed'
-                scraping_status['sources_status'][source_name]['message'] = f"{result['inserted']} nouvelles offres, {result['duplicates']} doublons"
-                scraping_status['sources_status'][source_name]['progress'] = 100
-            else:
-                scraping_status['sources_status'][source_name]['status'] = 'completed'
-                scraping_status['sources_status'][source_name]['message'] = 'Aucune offre trouvée'
-                scraping_status['sources_status'][source_name]['progress'] = 100
+@app.route('/api/scraping/all', methods=['POST'])
+def scrape_all_sources():
+    """Lance toutes les sources activées en parallèle"""
+    if not SCRAPING_ENABLED:
+        return jsonify({'success': False, 'message': 'Scraping non disponible'}), 400
 
-        except Exception as e:
-            scraping_status['sources_status'][source_name]['status'] = 'error'
-            scraping_status['sources_status'][source_name]['message'] = str(e)[:100]
+    config = load_scraping_config()
+    enabled = [name for name, source_config in config.get('scrapers', {}).items()
+               if source_config.get('enabled')]
 
-        finally:
-            scraping_status['is_running'] = False
-            scraping_status['current_source'] = None
-            scraping_status['end_time'] = datetime.now().isoformat()
+    if not enabled:
+        return jsonify({'success': False, 'message': 'Aucune source activée'})
 
-    thread = threading.Thread(target=run_single_scraping)
-    thread.daemon = True
-    thread.start()
+    started = scraping_orchestrator.launch(config, enabled, on_complete=_on_scraping_complete)
+    if not started:
+        return jsonify({'success': False, 'message': 'Toutes les sources activées sont déjà en cours'})
 
     return jsonify({
         'success': True,
-        'message': f'Scraping de {source_name} démarré'
+        'sources': started,
+        'message': f"Scraping démarré: {', '.join(started)}"
     })
 
 @app.route('/api/scraping/status')
@@ -1900,12 +2138,13 @@ def migrate_chromadb():
         chromadb_status['migration_progress'] = 0
 
         try:
-            from course_scraper.course_embedding_store import CourseEmbeddingStore
+            from course_scraper.course_embedding_store import get_store
+            from course_scraper.embedding_migration import run_parallel_migration
 
             coursera_db_path = os.path.join('course_scraper', 'coursera_fast.db')
             chroma_path = os.path.join('course_scraper', 'chroma_db')
 
-            store = CourseEmbeddingStore(
+            store = get_store(
                 db_path=coursera_db_path,
                 chroma_path=chroma_path
             )
@@ -1914,14 +2153,12 @@ def migrate_chromadb():
             store.load_model()
             chromadb_status['migration_progress'] = 5
 
-            # Lancer la synchronisation avec callback de progression
-            import sqlite3
-            conn = sqlite3.connect(coursera_db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM courses WHERE NOT EXISTS (SELECT 1 FROM courses c)")
+            # Progression réelle: 5% (préparation) -> 99% (dernier shard écrit)
+            def on_progress(done, total):
+                chromadb_status['migration_progress'] = 5 + int(94 * done / total) if total else 99
 
-            # Sync depuis SQLite
-            added, failed = store.sync_from_sqlite(batch_size=100)
+            # Sync depuis SQLite (encodage sur un pool de processus, CHROMADB_MIGRATION_WORKERS)
+            added, failed = run_parallel_migration(store, progress_callback=on_progress)
 
             chromadb_status['embeddings_count'] = store.get_count()
             chromadb_status['migration_progress'] = 100
@@ -1,7 +1,7 @@
 # ats_scorer.py - Intégration ATS dans l'application Flask
 
 import json
-import requests
+import hashlib
 import PyPDF2
 import pdfplumber
 import os
@@ -9,23 +9,99 @@ from werkzeug.utils import secure_filename
 from typing import Dict, Optional
 import docx2txt
 import tempfile
+import threading
+from collections import Counter
+from llm_cache import LLMResponseCache
+from llm_client import get_llm_client
+from course_scraper.embedding_cache import get_embedding_cache
 
 class ATSScorer:
     """Analyseur ATS intégré à Flask"""
     
-    def __init__(self, api_key: str):
+    # À incrémenter à chaque modification du prompt d'analyse (invalide le cache)
+    ANALYSE_PROMPT_VERSION = 1
+    # Champs de l'offre utilisés dans le prompt d'analyse (et donc dans la clé de cache)
+    OFFRE_CHAMPS_ANALYSE = ('title', 'company', 'location', 'job_type', 'contrat', 'description')
+    # Modèle d'embeddings (clé du cache d'embeddings partagé avec CourseEmbeddingStore)
+    EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+    def __init__(self, api_key: str, cache_path: str = "cache/llm_cache.db"):
         self.api_key = api_key
         self.model = "meta-llama/llama-4-scout-17b-16e-instruct"
         self.vision_model = "meta-llama/llama-4-scout-17b-16e-instruct"  # Nouveau modèle VLM Groq
         self.url = "https://api.groq.com/openai/v1/chat/completions"
         self.allowed_extensions = {'pdf', 'jpg', 'jpeg', 'png'}  # Seulement PDF et images
+        # Cache disque des réponses LLM (TTL + LRU), partagé entre workers
+        self.response_cache = LLMResponseCache(cache_path)
+        # Client HTTP partagé: session keep-alive, retries, concurrence et budget de tokens
+        self.llm_client = get_llm_client(self.url, self.api_key)
+        # Compteurs du fallback SQLite de recommander_cours (lignes ignorées / en échec)
+        # (mis à jour depuis les threads des requêtes: protégés par un verrou)
+        self.stats_fallback_cours = Counter()
+        self._stats_lock = threading.Lock()
+        # Cache disque des textes extraits (PDF/OCR), indexé par SHA-256 du fichier
+        self.text_cache_dir = os.path.join(os.path.dirname(cache_path) or '.', 'textes')
+        os.makedirs(self.text_cache_dir, exist_ok=True)
     
     def allowed_file(self, filename):
         """Vérifier si le fichier est autorisé"""
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
     
+    def _hash_fichier(self, file_path: str) -> str:
+        """SHA-256 du contenu d'un fichier"""
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for bloc in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(bloc)
+        return sha256.hexdigest()
+
+    def _chemin_texte_cache(self, file_path: str) -> str:
+        """Chemin du texte en cache pour ce fichier (clé = hash du contenu + extension)"""
+        extension = file_path.rsplit('.', 1)[1].lower()
+        return os.path.join(self.text_cache_dir, f"{self._hash_fichier(file_path)}.{extension}.txt")
+
     def extraire_texte_fichier(self, file_path: str) -> str:
+        """
+        Extraire le texte d'un fichier, avec cache disque par contenu
+
+        Le parsing PDF / l'OCR n'est fait qu'une fois par fichier: les appels suivants
+        (job_detail, verify_cv, generate_test...) relisent le texte en cache,
+        y compris depuis un autre worker.
+        """
+        try:
+            cache_path = self._chemin_texte_cache(file_path)
+            if os.path.exists(cache_path):
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+        except (OSError, IndexError) as e:
+            print(f"[WARNING] Cache texte indisponible: {e}")
+            cache_path = None
+
+        texte = self._extraire_texte_brut(file_path)
+
+        if texte and cache_path:
+            try:
+                # Écriture atomique (lecteurs concurrents d'autres workers)
+                fichier_tmp = f"{cache_path}.{os.getpid()}.tmp"
+                with open(fichier_tmp, 'w', encoding='utf-8') as f:
+                    f.write(texte)
+                os.replace(fichier_tmp, cache_path)
+            except OSError as e:
+                print(f"[WARNING] Impossible d'écrire le cache texte: {e}")
+
+        return texte
+
+    def supprimer_texte_cache(self, file_path: str):
+        """Invalider le texte en cache d'un fichier (à appeler avant de le supprimer)"""
+        try:
+            cache_path = self._chemin_texte_cache(file_path)
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+        except (OSError, IndexError) as e:
+            print(f"[WARNING] Impossible d'invalider le cache texte: {e}")
+
+    def _extraire_texte_brut(self, file_path: str) -> str:
         """Extraire le texte selon le type de fichier"""
         extension = file_path.rsplit('.', 1)[1].lower()
 
@@ -127,6 +203,21 @@ class ATSScorer:
             except:
                 return ""
     
+    def _charger_modele_embedding(self):
+        """Modèle Sentence-BERT chargé une seule fois (partagé avec le store ChromaDB si disponible)"""
+        if not hasattr(self, '_embedding_model'):
+            from sentence_transformers import SentenceTransformer
+
+            try:
+                from course_scraper.course_embedding_store import get_shared_model
+                self._embedding_model = get_shared_model()
+            except ImportError:
+                print(f"[INFO] Chargement du modèle Sentence-BERT ({self.EMBEDDING_MODEL_NAME})...")
+                self._embedding_model = SentenceTransformer(self.EMBEDDING_MODEL_NAME)
+                print("[OK] Modèle chargé avec succès")
+
+        return self._embedding_model
+
     def _generer_embedding_simple(self, texte: str) -> list:
         """
         Génère un embedding sémantique avec Sentence-BERT (all-MiniLM-L6-v2)
@@ -138,61 +229,101 @@ class ATSScorer:
         - Fonctionne offline
         """
         try:
-            from sentence_transformers import SentenceTransformer
+            model = self._charger_modele_embedding()
 
-            # Initialiser le modèle une seule fois (cache)
-            if not hasattr(self, '_embedding_model'):
-                print("[INFO] Chargement du modèle Sentence-BERT (all-MiniLM-L6-v2)...")
-                self._embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-                print("[OK] Modèle chargé avec succès")
-
-            # Générer l'embedding (384 dimensions)
-            embedding = self._embedding_model.encode(texte, convert_to_numpy=True)
+            # Générer l'embedding (384 dimensions), via le cache LRU partagé avec le store
+            embedding = get_embedding_cache().get_or_compute(
+                [texte], self.EMBEDDING_MODEL_NAME,
+                lambda textes: model.encode(textes, convert_to_numpy=True)
+            )[0]
 
             return embedding.tolist()
 
         except ImportError:
             print("[WARNING] sentence-transformers non installé, fallback sur TF-IDF")
             print("[INFO] Installez avec: pip install sentence-transformers")
+            return self._embedding_tfidf(texte).tolist()
 
-            # Fallback : TF-IDF simplifié (ancien système)
-            import re
-            from collections import Counter
-            import numpy as np
-
-            texte_clean = re.sub(r'[^a-zA-Z\s]', '', texte.lower())
-            mots = texte_clean.split()
-
-            keywords_tech = [
-                'python', 'java', 'javascript', 'sql', 'machine', 'learning', 'data', 'science',
-                'ai', 'neural', 'deep', 'algorithm', 'model', 'framework', 'django', 'flask',
-                'react', 'angular', 'vue', 'node', 'express', 'database', 'postgresql', 'mysql',
-                'mongodb', 'docker', 'kubernetes', 'aws', 'azure', 'cloud', 'devops', 'git',
-                'api', 'rest', 'graphql', 'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit',
-                'statistics', 'analysis', 'visualization', 'backend', 'frontend', 'fullstack',
-                'programming', 'development', 'software', 'engineering', 'architecture', 'design',
-                'test', 'quality', 'security', 'performance', 'optimization', 'scalability',
-                'microservices', 'distributed', 'systems', 'networking', 'web', 'mobile', 'app',
-                'spring', 'hibernate', 'css', 'html', 'typescript', 'kotlin', 'swift', 'ruby',
-                'rails', 'php', 'laravel', 'scala', 'hadoop', 'spark', 'kafka', 'redis',
-                'elasticsearch', 'graphql', 'agile', 'scrum', 'jenkins', 'ansible', 'terraform',
-                'linux', 'windows', 'macos', 'bash', 'powershell', 'ci', 'cd', 'testing'
-            ]
-
-            embedding = np.zeros(100)
-            mot_freq = Counter(mots)
-            total_mots = len(mots)
-
-            for i, keyword in enumerate(keywords_tech[:100]):
-                if keyword in mot_freq:
-                    tf = mot_freq[keyword] / total_mots if total_mots > 0 else 0
-                    embedding[i] = tf * 10
-
-            norm = np.linalg.norm(embedding)
-            if norm > 0:
-                embedding = embedding / norm
+    def _generer_embeddings_batch(self, textes: list, batch_size: int = 64):
+        """
+        Encoder plusieurs textes en un seul appel au modèle
 
-            return embedding.tolist()
+        Returns:
+            (matrice numpy n x d, liste des indices dont l'encodage a échoué).
+            Les lignes en échec sont à zéro.
+        """
+        import numpy as np
+
+        if not textes:
+            return np.zeros((0, 0), dtype=np.float32), []
+
+        try:
+            model = self._charger_modele_embedding()
+        except ImportError:
+            print("[WARNING] sentence-transformers non installé, fallback sur TF-IDF")
+            return np.vstack([self._embedding_tfidf(t) for t in textes]).astype(np.float32), []
+
+        try:
+            embeddings = model.encode(textes, batch_size=batch_size, convert_to_numpy=True)
+            return np.asarray(embeddings, dtype=np.float32), []
+        except Exception as e:
+            # Un texte invalide fait échouer tout le lot: ré-encoder un par un pour isoler les fautifs
+            print(f"[WARNING] Encodage groupé échoué ({e}), encodage individuel")
+
+        vecteurs = [None] * len(textes)
+        echecs = []
+        for i, texte in enumerate(textes):
+            try:
+                vecteurs[i] = np.asarray(model.encode(texte, convert_to_numpy=True), dtype=np.float32)
+            except Exception:
+                echecs.append(i)
+
+        dimension = next((len(v) for v in vecteurs if v is not None), 0)
+        matrice = np.zeros((len(textes), dimension), dtype=np.float32)
+        for i, vecteur in enumerate(vecteurs):
+            if vecteur is not None:
+                matrice[i] = vecteur
+        return matrice, echecs
+
+    def _embedding_tfidf(self, texte: str):
+        """Fallback : TF-IDF simplifié sur un vocabulaire technique (ancien système, 100 dimensions)"""
+        import re
+        from collections import Counter
+        import numpy as np
+
+        texte_clean = re.sub(r'[^a-zA-Z\s]', '', texte.lower())
+        mots = texte_clean.split()
+
+        keywords_tech = [
+            'python', 'java', 'javascript', 'sql', 'machine', 'learning', 'data', 'science',
+            'ai', 'neural', 'deep', 'algorithm', 'model', 'framework', 'django', 'flask',
+            'react', 'angular', 'vue', 'node', 'express', 'database', 'postgresql', 'mysql',
+            'mongodb', 'docker', 'kubernetes', 'aws', 'azure', 'cloud', 'devops', 'git',
+            'api', 'rest', 'graphql', 'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit',
+            'statistics', 'analysis', 'visualization', 'backend', 'frontend', 'fullstack',
+            'programming', 'development', 'software', 'engineering', 'architecture', 'design',
+            'test', 'quality', 'security', 'performance', 'optimization', 'scalability',
+            'microservices', 'distributed', 'systems', 'networking', 'web', 'mobile', 'app',
+            'spring', 'hibernate', 'css', 'html', 'typescript', 'kotlin', 'swift', 'ruby',
+            'rails', 'php', 'laravel', 'scala', 'hadoop', 'spark', 'kafka', 'redis',
+            'elasticsearch', 'graphql', 'agile', 'scrum', 'jenkins', 'ansible', 'terraform',
+            'linux', 'windows', 'macos', 'bash', 'powershell', 'ci', 'cd', 'testing'
+        ]
+
+        embedding = np.zeros(100)
+        mot_freq = Counter(mots)
+        total_mots = len(mots)
+
+        for i, keyword in enumerate(keywords_tech[:100]):
+            if keyword in mot_freq:
+                tf = mot_freq[keyword] / total_mots if total_mots > 0 else 0
+                embedding[i] = tf * 10
+
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+
+        return embedding
 
     def _similarite_cosinus(self, vec1: list, vec2: list) -> float:
         """Calcule la similarité cosinus entre deux vecteurs"""
@@ -210,6 +341,97 @@ class ATSScorer:
 
         return float(dot_product / (norm1 * norm2))
 
+    def _scorer_cours_candidats(self, competence: str, query_embedding, rows: list,
+                                niveau_exact=None, limite: int = None,
+                                urls_exclues: set = None) -> list:
+        """
+        Scorer en une passe les cours candidats issus de SQLite (fallback sans ChromaDB)
+
+        Un seul encode groupé, un produit matrice-vecteur pour les similarités
+        cosinus, puis argpartition pour ne garder que les meilleurs.
+
+        Args:
+            competence: Compétence recherchée
+            query_embedding: Embedding de la requête enrichie
+            rows: Lignes (title, description, url, difficulty, duration, partner_name, categories)
+            niveau_exact: True/False pour tous les cours, ou difficulté cible comparée à chaque cours
+            limite: Nombre de cours à garder (tous si None)
+            urls_exclues: URLs déjà retenues à ignorer (doublons)
+
+        Returns:
+            Cours formatés triés par score hybride décroissant
+        """
+        import numpy as np
+
+        urls_exclues = urls_exclues or set()
+        candidats = []
+        ignores = 0
+
+        for row in rows:
+            titre, description, url = row[0], row[1], row[2]
+            if not titre or url in urls_exclues:
+                ignores += 1
+                continue
+            candidats.append(row)
+
+        textes = [f"{row[0]}. {row[1][:500] if row[1] else ''}" for row in candidats]
+        matrice, echecs = self._generer_embeddings_batch(textes)
+
+        with self._stats_lock:
+            self.stats_fallback_cours.update(candidats=len(rows), ignores=ignores,
+                                             echecs_encodage=len(echecs))
+        if ignores or echecs:
+            print(f"[WARNING] Fallback cours: {ignores} ignoré(s) (titre vide ou doublon), "
+                  f"{len(echecs)} échec(s) d'encodage sur {len(rows)} candidats")
+
+        if not candidats:
+            return []
+
+        # 1. Score sémantique: similarités cosinus de tous les cours en un produit matriciel
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if matrice.shape[1] != query.shape[0]:
+            similarites = np.zeros(len(candidats), dtype=np.float32)
+        else:
+            normes = np.linalg.norm(matrice, axis=1) * np.linalg.norm(query)
+            produits = matrice @ query
+            similarites = np.divide(produits, normes, out=np.zeros_like(produits), where=normes > 0)
+        scores_semantiques = similarites * 100
+
+        # 2. Score de correspondance par nom, 3. Score hybride: 60% sémantique + 40% nom
+        scores_nom = np.array([self._calculer_score_nom(competence, row[0], row[1]) for row in candidats])
+        scores_hybrides = 0.6 * scores_semantiques + 0.4 * scores_nom
+
+        valides = np.ones(len(candidats), dtype=bool)
+        valides[echecs] = False
+        positions = np.flatnonzero(valides)
+
+        # Top K sans trier tous les candidats
+        if limite is not None and limite < len(positions):
+            meilleurs = np.argpartition(-scores_hybrides[positions], limite - 1)[:limite]
+            positions = positions[meilleurs]
+        positions = positions[np.argsort(-scores_hybrides[positions], kind='stable')]
+
+        cours_avec_scores = []
+        for i in positions:
+            titre, description, url, difficulty, duration, partner_name, categories = candidats[i]
+            est_exact = niveau_exact if isinstance(niveau_exact, bool) else (difficulty == niveau_exact)
+
+            cours_avec_scores.append({
+                'titre': titre,
+                'description': (description[:300] + '...') if description and len(description) > 300 else (description or ""),
+                'url': url,
+                'difficulte': difficulty or 'Non spécifié',
+                'duree': duration or 'Non spécifié',
+                'organisme': partner_name or 'Coursera',
+                'categories': categories or '[]',
+                'score_similarite': round(float(scores_hybrides[i]), 2),
+                'score_semantique': round(float(scores_semantiques[i]), 2),
+                'score_nom': round(float(scores_nom[i]), 2),
+                'niveau_exact': est_exact
+            })
+
+        return cours_avec_scores
+
     def _calculer_score_nom(self, competence: str, titre: str, description: str = "") -> float:
         """
         Calcule un score de correspondance par nom/mot-clé (0-100)
@@ -344,16 +566,11 @@ class ATSScorer:
             # NOUVEAU: Tenter d'utiliser ChromaDB si disponible et activé
             if use_chromadb:
                 try:
-                    from course_scraper.course_embedding_store import CourseEmbeddingStore
+                    # Store partagé par le processus (client + modèle déjà chargés)
+                    store = self._store_cours(db_path)
 
                     print(f"[INFO] Utilisation de ChromaDB (vector store optimisé)")
 
-                    # Initialiser le store
-                    store = CourseEmbeddingStore(
-                        db_path=db_path,
-                        chroma_path="course_scraper/chroma_db"
-                    )
-
                     # Vérifier que des embeddings existent
                     if store.get_count() == 0:
                         print(f"[WARNING] ChromaDB vide, fallback sur méthode classique")
@@ -361,35 +578,16 @@ class ATSScorer:
                         use_chromadb = False
                     else:
                         # Construire la requête enrichie avec le contexte
-                        query_parts = [f"Learn {competence}"]
-
-                        if contexte_cv:
-                            query_parts.append(f"for {contexte_cv}")
-
-                        query_parts.extend(["programming", "development", "course", "tutorial"])
-                        query_text = " ".join(query_parts)
+                        query_text = self._requete_cours(competence, contexte_cv)
 
                         print(f"[INFO] Requête enrichie: '{query_text}'")
 
                         # Normaliser le niveau pour ChromaDB
                         niveau_filter = None
-                        if niveau_declare:
-                            import unicodedata
-                            niveau_key = niveau_declare.lower()
-                            niveau_key = unicodedata.normalize('NFD', niveau_key)
-                            niveau_key = ''.join(c for c in niveau_key if unicodedata.category(c) != 'Mn')
-
-                            niveau_mapping = {
-                                'debutant': 'BEGINNER',
-                                'intermediaire': 'INTERMEDIATE',
-                                'avance': 'ADVANCED',
-                                'expert': 'ADVANCED'
-                            }
-
-                            if niveau_key in niveau_mapping:
-                                niveau_exact = niveau_mapping[niveau_key]
-                                niveau_filter = {"difficulty": niveau_exact}
-                                print(f"[INFO] Filtre de niveau: {niveau_exact}")
+                        niveau_exact = self._niveau_coursera(niveau_declare)
+                        if niveau_exact:
+                            niveau_filter = {"difficulty": niveau_exact}
+                            print(f"[INFO] Filtre de niveau: {niveau_exact}")
 
                         # Rechercher avec ChromaDB (recherche prioritaire au niveau exact)
                         n_results = top_n * 5  # Chercher plus pour avoir de la marge
@@ -438,37 +636,8 @@ class ATSScorer:
                             for course in results:
                                 course['niveau_exact'] = False
 
-                        # Formatter les résultats pour correspondre au format attendu
-                        cours_avec_scores = []
-                        for course in results:
-                            cours_avec_scores.append({
-                                'titre': course['title'],
-                                'description': course['description'],
-                                'url': course['url'],
-                                'difficulte': course['difficulty'],
-                                'duree': course['duration'],
-                                'organisme': course['partner_name'],
-                                'categories': course['categories'],
-                                'score_similarite': course['score_similarite'],
-                                'score_semantique': course['score_similarite'],
-                                'score_nom': 0,  # ChromaDB ne calcule pas ce score séparément
-                                'niveau_exact': course.get('niveau_exact', False)
-                            })
-
-                        # Trier avec priorité au niveau exact
-                        def score_avec_priorite(cours):
-                            score = cours['score_similarite']
-                            if cours.get('niveau_exact', False):
-                                score += 15  # Bonus pour niveau exact
-                            return score
-
-                        cours_avec_scores.sort(key=score_avec_priorite, reverse=True)
-
-                        # Retourner top N
-                        print(f"[DEBUG] Avant limitation: {len(cours_avec_scores)} cours")
-                        print(f"[DEBUG] Limitation à top_n={top_n}")
-                        top_cours = cours_avec_scores[:top_n]
-                        print(f"[DEBUG] Après limitation: {len(top_cours)} cours")
+                        # Formatter, trier (priorité au niveau exact) et garder le top N
+                        top_cours = self._formater_cours_chromadb(results, top_n)
 
                         print(f"[OK] Top {len(top_cours)} cours recommandés (ChromaDB):")
                         for i, cours in enumerate(top_cours, 1):
@@ -580,38 +749,11 @@ class ATSScorer:
 
                     print(f"[INFO] {len(results_exact)} cours trouvés au niveau exact '{niveau_exact}'")
 
-                    # Calculer les scores pour les cours du niveau exact
-                    for row in results_exact:
-                        titre, description, url, difficulty, duration, partner_name, categories = row
-
-                        # 1. Score sémantique (TF-IDF + cosinus)
-                        cours_text = f"{titre}. {description[:500] if description else ''}"
-                        cours_embedding = self._generer_embedding_simple(cours_text)
-                        similarite_semantique = self._similarite_cosinus(query_embedding, cours_embedding)
-                        score_semantique = similarite_semantique * 100
-
-                        # 2. Score de correspondance par nom
-                        score_nom = self._calculer_score_nom(competence, titre, description)
-
-                        # 3. Score hybride: 60% sémantique + 40% nom
-                        score_hybride = (0.6 * score_semantique) + (0.4 * score_nom)
-
-                        cours_avec_scores.append({
-                            'titre': titre,
-                            'description': (description[:300] + '...') if description and len(description) > 300 else (description or ""),
-                            'url': url,
-                            'difficulte': difficulty or 'Non spécifié',
-                            'duree': duration or 'Non spécifié',
-                            'organisme': partner_name or 'Coursera',
-                            'categories': categories or '[]',
-                            'score_similarite': round(score_hybride, 2),
-                            'score_semantique': round(score_semantique, 2),
-                            'score_nom': round(score_nom, 2),
-                            'niveau_exact': True  # Marquer comme niveau exact
-                        })
-
-                    # Trier pour voir le meilleur score au niveau exact
-                    cours_avec_scores.sort(key=lambda x: x['score_similarite'], reverse=True)
+                    # Calculer les scores pour les cours du niveau exact (déjà triés)
+                    cours_avec_scores = self._scorer_cours_candidats(
+                        competence, query_embedding, results_exact,
+                        niveau_exact=True, limite=top_n
+                    )
 
                     # ÉTAPE 2: Si meilleur score < seuil, chercher aussi niveaux inférieurs
                     meilleur_score_exact = cours_avec_scores[0]['score_similarite'] if cours_avec_scores else 0
@@ -648,37 +790,11 @@ class ATSScorer:
                         # Calculer scores pour tous les cours (éviter doublons)
                         urls_existantes = {c['url'] for c in cours_avec_scores}
 
-                        for row in results_fallback:
-                            titre, description, url, difficulty, duration, partner_name, categories = row
-
-                            if url in urls_existantes:
-                                continue  # Éviter doublons
-
-                            # 1. Score sémantique
-                            cours_text = f"{titre}. {description[:500] if description else ''}"
-                            cours_embedding = self._generer_embedding_simple(cours_text)
-                            similarite_semantique = self._similarite_cosinus(query_embedding, cours_embedding)
-                            score_semantique = similarite_semantique * 100
-
-                            # 2. Score de correspondance par nom
-                            score_nom = self._calculer_score_nom(competence, titre, description)
-
-                            # 3. Score hybride: 60% sémantique + 40% nom
-                            score_hybride = (0.6 * score_semantique) + (0.4 * score_nom)
-
-                            cours_avec_scores.append({
-                                'titre': titre,
-                                'description': (description[:300] + '...') if description and len(description) > 300 else (description or ""),
-                                'url': url,
-                                'difficulte': difficulty or 'Non spécifié',
-                                'duree': duration or 'Non spécifié',
-                                'organisme': partner_name or 'Coursera',
-                                'categories': categories or '[]',
-                                'score_similarite': round(score_hybride, 2),
-                                'score_semantique': round(score_semantique, 2),
-                                'score_nom': round(score_nom, 2),
-                                'niveau_exact': (difficulty == niveau_exact)
-                            })
+                        cours_avec_scores.extend(self._scorer_cours_candidats(
+                            competence, query_embedding, results_fallback,
+                            niveau_exact=niveau_exact, limite=top_n,
+                            urls_exclues=urls_existantes
+                        ))
                     else:
                         print(f"[OK] Meilleur score au niveau exact: {meilleur_score_exact}% >= {seuil_qualite}%")
                 else:
@@ -699,34 +815,10 @@ class ATSScorer:
 
                 print(f"[INFO] {len(results)} cours candidats trouvés")
 
-                for row in results:
-                    titre, description, url, difficulty, duration, partner_name, categories = row
-
-                    # 1. Score sémantique (TF-IDF + cosinus)
-                    cours_text = f"{titre}. {description[:500] if description else ''}"
-                    cours_embedding = self._generer_embedding_simple(cours_text)
-                    similarite_semantique = self._similarite_cosinus(query_embedding, cours_embedding)
-                    score_semantique = similarite_semantique * 100  # Convertir en pourcentage
-
-                    # 2. Score de correspondance par nom (exact matching)
-                    score_nom = self._calculer_score_nom(competence, titre, description)
-
-                    # 3. Score hybride: 60% sémantique + 40% nom
-                    score_hybride = (0.6 * score_semantique) + (0.4 * score_nom)
-
-                    cours_avec_scores.append({
-                        'titre': titre,
-                        'description': (description[:300] + '...') if description and len(description) > 300 else (description or ""),
-                        'url': url,
-                        'difficulte': difficulty or 'Non spécifié',
-                        'duree': duration or 'Non spécifié',
-                        'organisme': partner_name or 'Coursera',
-                        'categories': categories or '[]',
-                        'score_similarite': round(score_hybride, 2),  # Score hybride final
-                        'score_semantique': round(score_semantique, 2),
-                        'score_nom': round(score_nom, 2),
-                        'niveau_exact': False
-                    })
+                cours_avec_scores = self._scorer_cours_candidats(
+                    competence, query_embedding, results,
+                    niveau_exact=False, limite=top_n
+                )
 
             conn.close()
 
@@ -766,10 +858,183 @@ class ATSScorer:
             traceback.print_exc()
             return []
 
+    # Matrice d'embeddings exportée (déploiements sans ChromaDB)
+    MATRICE_COURS_PATH = "course_scraper/course_embeddings.npy"
+
+    def _store_cours(self, db_path: str):
+        """
+        Store vectoriel des cours: ChromaDB, sinon la matrice .npy exportée
+
+        Raises:
+            ImportError: si aucun des deux n'est disponible
+        """
+        try:
+            from course_scraper.course_embedding_store import get_store
+            return get_store(db_path=db_path, chroma_path="course_scraper/chroma_db")
+        except ImportError:
+            from course_scraper.course_embedding_matrix import get_matrix_store, matrix_exists
+            if not matrix_exists(self.MATRICE_COURS_PATH):
+                raise
+
+            print(f"[INFO] ChromaDB non installé, utilisation de la matrice {self.MATRICE_COURS_PATH}")
+            return get_matrix_store(self.MATRICE_COURS_PATH, model=self._charger_modele_embedding())
+
+    # Niveau déclaré (sans accents) -> difficulté Coursera
+    NIVEAUX_COURSERA = {
+        'debutant': 'BEGINNER',
+        'intermediaire': 'INTERMEDIATE',
+        'avance': 'ADVANCED',
+        'expert': 'ADVANCED'
+    }
+
+    def _niveau_coursera(self, niveau_declare: str) -> Optional[str]:
+        """Convertir un niveau déclaré ("Débutant", "Avancé"...) en difficulté Coursera"""
+        if not niveau_declare:
+            return None
+
+        import unicodedata
+        niveau_key = unicodedata.normalize('NFD', niveau_declare.lower())
+        niveau_key = ''.join(c for c in niveau_key if unicodedata.category(c) != 'Mn')
+        return self.NIVEAUX_COURSERA.get(niveau_key)
+
+    def _requete_cours(self, competence: str, contexte_cv: str = "") -> str:
+        """Requête enrichie utilisée pour la recherche sémantique de cours"""
+        query_parts = [f"Learn {competence}"]
+
+        if contexte_cv:
+            query_parts.append(f"for {contexte_cv}")
+
+        query_parts.extend(["programming", "development", "course", "tutorial"])
+        return " ".join(query_parts)
+
+    def _formater_cours_chromadb(self, results: list, top_n: int) -> list:
+        """Convertir des résultats ChromaDB au format des recommandations et garder le top N"""
+        cours_avec_scores = []
+        for course in results:
+            cours_avec_scores.append({
+                'titre': course['title'],
+                'description': course['description'],
+                'url': course['url'],
+                'difficulte': course['difficulty'],
+                'duree': course['duration'],
+                'organisme': course['partner_name'],
+                'categories': course['categories'],
+                'score_similarite': course['score_similarite'],
+                'score_semantique': course['score_similarite'],
+                'score_nom': 0,  # ChromaDB ne calcule pas ce score séparément
+                'niveau_exact': course.get('niveau_exact', False)
+            })
+
+        # Trier avec priorité au niveau exact
+        def score_avec_priorite(cours):
+            score = cours['score_similarite']
+            if cours.get('niveau_exact', False):
+                score += 15  # Bonus pour niveau exact
+            return score
+
+        cours_avec_scores.sort(key=score_avec_priorite, reverse=True)
+        return cours_avec_scores[:top_n]
+
+    def recommander_cours_batch(self, competences: list, db_path: str = "course_scraper/coursera_fast.db",
+                                top_n: int = 3, contexte_cv: str = "", niveau_declare: str = "",
+                                use_chromadb: bool = True) -> Dict[str, list]:
+        """
+        Recommander des cours pour plusieurs compétences en un minimum d'allers-retours
+
+        Toutes les requêtes sont encodées en une passe du modèle et envoyées dans un
+        seul collection.query. Avec un niveau déclaré, une 2e requête groupée élargit
+        la recherche (tous niveaux) pour les seules compétences sans bon résultat.
+        Soit au plus 2 requêtes ChromaDB, quel que soit le nombre de compétences.
+
+        Returns:
+            {compétence: liste des top N cours} (même format que recommander_cours)
+        """
+        competences = list(dict.fromkeys(c for c in competences if c))
+        if not competences:
+            return {}
+
+        if use_chromadb:
+            try:
+                store = self._store_cours(db_path)
+
+                if store.get_count() > 0:
+                    print(f"\n=== RECOMMANDATION BATCH ({len(competences)} compétences) ===")
+                    queries = [self._requete_cours(c, contexte_cv) for c in competences]
+                    n_results = top_n * 5  # Chercher plus pour avoir de la marge
+                    niveau_exact = self._niveau_coursera(niveau_declare)
+
+                    if niveau_exact:
+                        # ÉTAPE 1: toutes les compétences au niveau exact
+                        resultats = store.search_similar_courses_batch(
+                            queries, n_results=n_results, where={"difficulty": niveau_exact}
+                        )
+                        for results in resultats:
+                            for course in results:
+                                course['niveau_exact'] = True
+
+                        # ÉTAPE 2: élargir (tous niveaux) seulement là où c'est nécessaire
+                        a_elargir = [
+                            i for i, results in enumerate(resultats)
+                            if not results or results[0]['score_similarite'] < 60.0
+                        ]
+                        if a_elargir:
+                            print(f"[INFO] Élargissement (tous niveaux) pour {len(a_elargir)} compétence(s)")
+                            elargis = store.search_similar_courses_batch(
+                                [queries[i] for i in a_elargir], n_results=n_results
+                            )
+                            for i, results_all in zip(a_elargir, elargis):
+                                seen_ids = {c['course_id'] for c in resultats[i]}
+                                for course in results_all:
+                                    if course['course_id'] not in seen_ids:
+                                        course['niveau_exact'] = False
+                                        resultats[i].append(course)
+                    else:
+                        resultats = store.search_similar_courses_batch(queries, n_results=n_results)
+                        for results in resultats:
+                            for course in results:
+                                course['niveau_exact'] = False
+
+                    recommandations = {
+                        competence: self._formater_cours_chromadb(results, top_n)
+                        for competence, results in zip(competences, resultats)
+                    }
+                    print(f"[OK] {sum(len(c) for c in recommandations.values())} cours recommandés (ChromaDB batch)")
+                    return recommandations
+
+                print(f"[WARNING] ChromaDB vide, fallback sur méthode classique")
+
+            except ImportError:
+                print(f"[WARNING] ChromaDB non disponible, fallback sur méthode classique")
+            except Exception as e:
+                print(f"[WARNING] Erreur ChromaDB batch: {e}, fallback sur méthode classique")
+
+        # FALLBACK: une recommandation SQLite par compétence
+        return {
+            competence: self.recommander_cours(
+                competence, db_path=db_path, top_n=top_n, contexte_cv=contexte_cv,
+                niveau_declare=niveau_declare, use_chromadb=False
+            )
+            for competence in competences
+        }
+
     def analyser_cv_avec_offre(self, cv_texte: str, offre_data: Dict) -> Dict:
         """
         Analyser la compatibilité CV avec une offre d'emploi
+
+        Résultat mis en cache (clé = CV + champs de l'offre + modèle + version du prompt):
+        une offre réouverte avec le même CV ne relance pas l'appel LLM
         """
+        cache_key = LLMResponseCache.make_key(
+            prompt='analyse_cv_offre',
+            version=self.ANALYSE_PROMPT_VERSION,
+            model=self.model,
+            cv=cv_texte,
+            offre={champ: str(offre_data.get(champ, '')) for champ in self.OFFRE_CHAMPS_ANALYSE}
+        )
+        resultat_cache = self.response_cache.get(cache_key)
+        if resultat_cache is not None:
+            return resultat_cache
+
         # Créer la description de l'offre
         offre_texte = f"""
 TITRE: {offre_data.get('title', '')}
@@ -907,12 +1172,7 @@ CV DU CANDIDAT:
 Sois précis, objectif et constructif dans ton analyse."""
 
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [{"role": "user", "content": prompt}],
@@ -936,6 +1196,7 @@ Sois précis, objectif et constructif dans ton analyse."""
                 # Elles sont générées uniquement quand l'utilisateur clique sur le bouton
                 # via l'endpoint /api/recommend-courses
 
+                self.response_cache.set(cache_key, resultat, namespace='analyse_cv_offre')
                 return resultat
             else:
                 return {'erreur': f'Erreur API: {response.status_code}'}
@@ -1632,12 +1893,7 @@ Réponds en JSON avec cette structure EXACTE:
 Sois précis et extrait SEULEMENT ce qui est explicitement mentionné."""
 
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [{"role": "user", "content": prompt}],
@@ -1687,9 +1943,9 @@ Sois précis et extrait SEULEMENT ce qui est explicitement mentionné."""
             mat = fitz.Matrix(zoom, zoom)
             pix = page.get_pixmap(matrix=mat)
 
-            # Sauvegarder temporairement
-            temp_dir = tempfile.gettempdir()
-            image_path = os.path.join(temp_dir, f"pdf_page_{os.getpid()}.png")
+            # Sauvegarder temporairement (nom unique: plusieurs vérifications en parallèle)
+            fd, image_path = tempfile.mkstemp(prefix="pdf_page_", suffix=".png")
+            os.close(fd)
             pix.save(image_path)
 
             pdf_document.close()
@@ -1780,12 +2036,7 @@ Réponds en JSON:
 }}"""
 
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.vision_model,
                     "messages": [
@@ -1873,12 +2124,7 @@ Réponds en JSON:
 }}"""
 
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [{"role": "user", "content": prompt}],
@@ -1991,12 +2237,7 @@ Réponds en JSON avec cette structure EXACTE:
 Sois TRÈS RIGOUREUX et OBJECTIF. En cas de doute, indique-le clairement."""
 
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [
@@ -2250,12 +2491,7 @@ FORMAT JSON:
   ]
 }}"""
 
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [
@@ -2500,12 +2736,7 @@ Réponds en JSON avec cette structure EXACTE:
 Sois précis et extrait TOUTES les compétences techniques trouvées."""
 
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [{"role": "user", "content": prompt}],
@@ -2785,12 +3016,7 @@ IMPORTANT:
 
         # 5. Appeler l'API pour générer les questions
         try:
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [
@@ -2938,12 +3164,7 @@ IMPORTANT:
             print(f"Difficulte: {difficulte}")
             print(f"Taxonomie Bloom: {description_niveau}")
 
-            response = requests.post(
-                self.url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+            response = self.llm_client.post(
                 json={
                     "model": self.model,
                     "messages": [
@@ -0,0 +1,338 @@
+"""
+Course Embedding Matrix - Embeddings de cours précalculés dans un fichier .npy
+Recherche par similarité sans serveur ni index HNSW (déploiements sans ChromaDB)
+
+- Matrice float32 (ou float16) des embeddings normalisés, une ligne par cours
+- Fichier annexe JSON: ids et métadonnées dans le même ordre que les lignes,
+  et nom du fichier .npy versionné qu'il décrit (pointeur unique)
+- Ouverture avec np.load(mmap_mode='r'): les pages sont partagées entre
+  les workers gunicorn via le cache du système
+- Recherche = un produit matrice-vecteur (BLAS) + argpartition
+"""
+
+import glob
+import json
+import os
+import threading
+import uuid
+import numpy as np
+from typing import Dict, List, Optional
+
+try:
+    from course_scraper.embedding_cache import get_embedding_cache
+except ImportError:
+    from embedding_cache import get_embedding_cache
+
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_MATRIX_PATH = "course_scraper/course_embeddings.npy"
+
+# Lignes promues en float32 à la fois pour une matrice float16 (BLAS ne calcule pas en float16)
+FLOAT16_BLOCK_ROWS = 4096
+
+_matrices: Dict[str, 'CourseEmbeddingMatrix'] = {}
+_matrices_lock = threading.Lock()
+
+
+def metadata_path(matrix_path: str) -> str:
+    """Chemin du fichier annexe (ids + métadonnées) d'une matrice"""
+    return os.path.splitext(matrix_path)[0] + ".meta.json"
+
+
+def generation_path(matrix_path: str, generation: str) -> str:
+    """Chemin du fichier .npy d'une génération d'export"""
+    return f"{os.path.splitext(matrix_path)[0]}.{generation}.npy"
+
+
+def matrix_exists(matrix_path: str) -> bool:
+    """True si une matrice a été exportée à ce chemin"""
+    return os.path.exists(metadata_path(matrix_path))
+
+
+def write_embedding_matrix(
+    matrix_path: str,
+    ids: List[str],
+    embeddings,
+    metadatas: List[Dict],
+    dtype: str = "float32"
+) -> int:
+    """
+    Écrire la matrice d'embeddings et son fichier annexe
+
+    Les vecteurs sont normalisés (cosinus = produit scalaire). Chaque export
+    écrit un nouveau fichier .npy versionné (course_embeddings.<génération>.npy),
+    puis remplace le fichier annexe qui le désigne: ce renommage est le seul
+    point de bascule. Un worker lit d'abord le fichier annexe puis la matrice
+    qu'il désigne, et voit donc l'ancienne ou la nouvelle version, jamais un
+    mélange. Les générations précédentes sont ensuite supprimées (un worker qui
+    les a déjà ouvertes en mmap continue de les lire).
+
+    Args:
+        matrix_path: Chemin du fichier .npy
+        ids: Identifiants des cours (ordre des lignes)
+        embeddings: Embeddings (n x 384)
+        metadatas: Métadonnées des cours (ordre des lignes)
+        dtype: "float32" ou "float16" (moitié moins de mémoire)
+
+    Returns:
+        Nombre de cours exportés
+    """
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"dtype non supporté: {dtype} (float32 ou float16)")
+    if len(ids) != len(metadatas) or len(ids) != len(embeddings):
+        raise ValueError("ids, embeddings et metadatas doivent avoir la même longueur")
+
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    directory = os.path.dirname(matrix_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    generation = uuid.uuid4().hex[:12]
+    data_path = generation_path(matrix_path, generation)
+    sidecar = {
+        'model': MODEL_NAME,
+        'dtype': dtype,
+        'dimension': int(matrix.shape[1]),
+        'generation': generation,
+        'matrix_file': os.path.basename(data_path),
+        'ids': [str(i) for i in ids],
+        'metadatas': metadatas
+    }
+
+    tmp_matrix = data_path + ".tmp"
+    tmp_sidecar = metadata_path(matrix_path) + ".tmp"
+
+    with open(tmp_matrix, 'wb') as f:
+        np.save(f, matrix.astype(dtype))
+    with open(tmp_sidecar, 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, ensure_ascii=False)
+
+    # La matrice versionnée n'est visible qu'une fois le fichier annexe remplacé
+    os.replace(tmp_matrix, data_path)
+    os.replace(tmp_sidecar, metadata_path(matrix_path))
+
+    # Nettoyage: générations précédentes et ancien format (.npy non versionné)
+    for old_path in glob.glob(generation_path(glob.escape(matrix_path), '*')) + [matrix_path]:
+        if os.path.abspath(old_path) != os.path.abspath(data_path):
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    print(f"[OK] {len(ids)} embeddings exportés ({dtype}): {matrix_path}")
+    return len(ids)
+
+
+def get_matrix_store(matrix_path: str = DEFAULT_MATRIX_PATH, model=None) -> 'CourseEmbeddingMatrix':
+    """
+    Matrice partagée par le processus pour un chemin donné
+
+    Rechargée automatiquement si la matrice a été réexportée depuis.
+    """
+    key = os.path.abspath(matrix_path)
+    with _matrices_lock:
+        store = _matrices.get(key)
+        if store is None or store.is_stale():
+            store = CourseEmbeddingMatrix(matrix_path, model=model)
+            _matrices[key] = store
+    return store
+
+
+class CourseEmbeddingMatrix:
+    """
+    Store de cours en lecture seule basé sur une matrice .npy mappée en mémoire
+
+    Même interface de recherche que CourseEmbeddingStore (search_similar_courses,
+    search_similar_courses_batch, get_count) et même format de résultats.
+    """
+
+    def __init__(self, matrix_path: str = DEFAULT_MATRIX_PATH, model=None):
+        """
+        Args:
+            matrix_path: Chemin du fichier .npy exporté
+            model: Modèle Sentence-BERT déjà chargé (chargé au premier encodage sinon)
+        """
+        self.matrix_path = matrix_path
+        self.model = model
+
+        if not matrix_exists(matrix_path):
+            raise FileNotFoundError(f"Matrice d'embeddings introuvable: {matrix_path}")
+
+        sidecar = self._load_generation()
+        self.generation: Optional[str] = sidecar.get('generation')
+        self.ids: List[str] = sidecar['ids']
+        self.metadatas: List[Dict] = sidecar['metadatas']
+        self._columns: Dict[str, np.ndarray] = {}
+
+        if len(self.ids) != self.matrix.shape[0]:
+            raise ValueError(f"Matrice et fichier annexe incohérents: {matrix_path}")
+
+        print(f"[INFO] Matrice d'embeddings chargée: {matrix_path} "
+              f"({self.matrix.shape[0]} x {self.matrix.shape[1]}, {self.matrix.dtype})")
+
+    def _load_generation(self, attempts: int = 3) -> Dict:
+        """
+        Lire le fichier annexe puis ouvrir (mmap) la matrice qu'il désigne
+
+        Si un export a supprimé cette génération entre les deux lectures,
+        recommencer avec le nouveau fichier annexe.
+
+        Returns:
+            Le contenu du fichier annexe (self.matrix est positionnée)
+        """
+        sidecar_path = metadata_path(self.matrix_path)
+        for attempt in range(attempts):
+            # mtime lu avant le contenu: un export concurrent rend le store périmé
+            self._mtime = os.path.getmtime(sidecar_path)
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                sidecar = json.load(f)
+
+            # Ancien format: le fichier annexe décrit directement matrix_path
+            matrix_file = sidecar.get('matrix_file')
+            data_path = (os.path.join(os.path.dirname(self.matrix_path), matrix_file)
+                         if matrix_file else self.matrix_path)
+            try:
+                self.matrix = np.load(data_path, mmap_mode='r')
+                return sidecar
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+                print(f"[WARNING] Matrice remplacée pendant le chargement, nouvelle tentative: {data_path}")
+
+    def is_stale(self) -> bool:
+        """True si la matrice a été réexportée depuis le chargement"""
+        try:
+            return os.path.getmtime(metadata_path(self.matrix_path)) != self._mtime
+        except OSError:
+            return False
+
+    def load_model(self):
+        """Charger le modèle Sentence-BERT (si non fourni)"""
+        if self.model is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"[INFO] Chargement du modèle Sentence-BERT ({MODEL_NAME})...")
+            self.model = SentenceTransformer(MODEL_NAME)
+
+    def get_count(self) -> int:
+        """Nombre de cours dans la matrice"""
+        return len(self.ids)
+
+    def _column(self, key: str) -> np.ndarray:
+        """Valeurs d'une métadonnée pour tous les cours (calculées une fois par clé)"""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.array([str(m.get(key, '')) for m in self.metadatas], dtype=object)
+            self._columns[key] = column
+        return column
+
+    def _filter_rows(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """Positions des cours satisfaisant un filtre d'égalité sur les métadonnées (None = tous)"""
+        if not where:
+            return None
+
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in where.items():
+            mask &= self._column(key) == str(value)
+        return np.flatnonzero(mask)
+
+    def search_similar_courses(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Rechercher les cours similaires à une requête (recherche exhaustive)
+
+        Args:
+            query: Requête de recherche (ex: "Learn Python")
+            n_results: Nombre de résultats à retourner
+            where: Filtres d'égalité sur les métadonnées (ex: {"difficulty": "BEGINNER"})
+
+        Returns:
+            Liste des cours similaires (même format que CourseEmbeddingStore)
+        """
+        return self.search_similar_courses_batch([query], n_results=n_results, where=where)[0]
+
+    def search_similar_courses_batch(
+        self,
+        queries: List[str],
+        n_results: int = 10,
+        where: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """
+        Rechercher les cours similaires pour plusieurs requêtes (un seul produit matriciel)
+
+        Returns:
+            Une liste de cours par requête (même ordre que queries)
+        """
+        if not queries:
+            return []
+
+        self.load_model()
+        query_matrix = np.vstack(get_embedding_cache().get_or_compute(
+            queries, MODEL_NAME, lambda missing: self.model.encode(missing, convert_to_numpy=True)
+        ))
+        norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+        query_matrix = np.divide(query_matrix, norms, out=np.zeros_like(query_matrix), where=norms > 0)
+
+        rows = self._filter_rows(where)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.shape[0] == 0:
+            return [[] for _ in queries]
+
+        similarities = self._similarities(matrix, query_matrix)
+        k = min(n_results, similarities.shape[0])
+
+        results = []
+        for q in range(len(queries)):
+            scores = similarities[:, q]
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            positions = top if rows is None else rows[top]
+            results.append([self._format_course(p, float(scores[t])) for p, t in zip(positions, top)])
+
+        return results
+
+    @staticmethod
+    def _similarities(matrix: np.ndarray, query_matrix: np.ndarray) -> np.ndarray:
+        """
+        Cosinus de toutes les paires (n_cours x n_requêtes) sans copier la matrice
+
+        Les requêtes sont converties en float32: des requêtes float64 feraient
+        promouvoir (copier) toute la matrice à chaque appel. Une matrice float16
+        est promue par blocs de FLOAT16_BLOCK_ROWS lignes pour rester sur BLAS
+        avec une mémoire temporaire bornée.
+        """
+        queries_t = np.ascontiguousarray(query_matrix.T, dtype=np.float32)
+        if matrix.dtype == np.float32:
+            # (n_cours x d) @ (d x n_requêtes): un seul appel BLAS
+            return matrix @ queries_t
+
+        similarities = np.empty((matrix.shape[0], queries_t.shape[1]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], FLOAT16_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + FLOAT16_BLOCK_ROWS], dtype=np.float32)
+            np.matmul(block, queries_t, out=similarities[start:start + FLOAT16_BLOCK_ROWS])
+        return similarities
+
+    def _format_course(self, position: int, similarity: float) -> Dict:
+        """Formater un cours comme les résultats ChromaDB (distance cosinus = 1 - similarité)"""
+        metadata = self.metadatas[position]
+        distance = 1.0 - similarity
+        similarity_score = ((2 - distance) / 2) * 100
+
+        return {
+            'course_id': self.ids[position],
+            'title': metadata.get('title', ''),
+            'description': metadata.get('description', ''),
+            'difficulty': metadata.get('difficulty', 'Non spécifié'),
+            'duration': metadata.get('duration', 'Non spécifié'),
+            'partner_name': metadata.get('partner_name', 'Coursera'),
+            'url': metadata.get('url', ''),
+            'categories': metadata.get('categories', '[]'),
+            'score_similarite': round(similarity_score, 2),
+            'distance': round(distance, 4)
+        }
@@ -6,10 +6,79 @@ Optimise les recherches de similarité pour les recommandations de cours
 import chromadb
 from chromadb.config import Settings
 import sqlite3
+import hashlib
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Optional, Tuple
+from collections import Counter
 import os
+import queue
+import threading
+
+try:
+    from course_scraper.embedding_cache import get_embedding_cache
+except ImportError:
+    from embedding_cache import get_embedding_cache
+
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Longueur maximum du document stocké avec chaque embedding (texte encodé tronqué)
+DOCUMENT_MAX_CHARS = 1000
+
+# Part maximum des cours ChromaDB supprimée par une synchronisation sans allow_mass_delete
+MAX_DELETE_RATIO = 0.2
+
+# Registre du processus: un seul modèle et un store (client ChromaDB) par chemin
+_shared_model: Optional[SentenceTransformer] = None
+_model_lock = threading.Lock()
+_stores: Dict[Tuple[str, str], 'CourseEmbeddingStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def get_shared_model() -> SentenceTransformer:
+    """Modèle Sentence-BERT partagé par tout le processus (chargé au premier appel)"""
+    global _shared_model
+    if _shared_model is None:
+        with _model_lock:
+            if _shared_model is None:
+                print(f"[INFO] Chargement du modèle Sentence-BERT ({MODEL_NAME})...")
+                _shared_model = SentenceTransformer(MODEL_NAME)
+                print("[OK] Modèle chargé (384 dimensions)")
+    return _shared_model
+
+
+def get_store(
+    db_path: str = "coursera_fast.db",
+    chroma_path: str = "./chroma_db",
+    collection_name: str = "coursera_courses"
+) -> 'CourseEmbeddingStore':
+    """
+    Store partagé (thread-safe) pour un chemin ChromaDB donné
+
+    Évite de recréer un PersistentClient, de rouvrir la collection et
+    de recharger le modèle à chaque recommandation.
+    """
+    key = (os.path.abspath(chroma_path), collection_name)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = CourseEmbeddingStore(
+                db_path=db_path,
+                chroma_path=chroma_path,
+                collection_name=collection_name
+            )
+            _stores[key] = store
+    return store
+
+
+def warm_up(db_path: str = "coursera_fast.db", chroma_path: str = "./chroma_db") -> 'CourseEmbeddingStore':
+    """Précharger le store et le modèle (à appeler au démarrage de l'application)"""
+    store = get_store(db_path=db_path, chroma_path=chroma_path)
+    store.load_model()
+    # Un premier encodage initialise les poids en mémoire
+    store.generate_embedding("warm up", use_cache=False)
+    return store
 
 
 class CourseEmbeddingStore:
@@ -74,27 +143,57 @@ class CourseEmbeddingStore:
         print(f"[INFO] Nombre d'embeddings: {self.collection.count()}")
 
     def load_model(self):
-        """Charger le modèle Sentence-BERT"""
+        """Charger le modèle Sentence-BERT (instance partagée par le processus)"""
         if self.model is None:
-            print("[INFO] Chargement du modèle Sentence-BERT (all-MiniLM-L6-v2)...")
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("[OK] Modèle chargé (384 dimensions)")
+            self.model = get_shared_model()
 
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str, use_cache: bool = True) -> List[float]:
         """
         Générer l'embedding pour un texte
 
         Args:
             text: Texte à encoder
+            use_cache: Utiliser le cache LRU partagé (requêtes répétées)
 
         Returns:
             Embedding de 384 dimensions
         """
+        return self.generate_embeddings([text], use_cache=use_cache)[0]
+
+    def generate_embeddings(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+        """
+        Générer les embeddings de plusieurs textes en une seule passe du modèle
+
+        Args:
+            texts: Textes à encoder
+            use_cache: Utiliser le cache LRU partagé (seuls les textes absents sont encodés)
+
+        Returns:
+            Un embedding de 384 dimensions par texte
+        """
+        if not texts:
+            return []
+
         if self.model is None:
             self.load_model()
 
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        if not use_cache:
+            return self.model.encode(texts, convert_to_numpy=True).tolist()
+
+        embeddings = get_embedding_cache().get_or_compute(
+            texts, MODEL_NAME, lambda missing: self.model.encode(missing, convert_to_numpy=True)
+        )
+        return [embedding.tolist() for embedding in embeddings]
+
+    @staticmethod
+    def course_text(title: str, description: Optional[str]) -> str:
+        """Texte encodé pour un cours (titre + début de la description)"""
+        return f"{title}. {description[:500] if description else ''}"
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Empreinte du texte encodé: un cours n'est ré-encodé que si elle change"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
     def add_course(
         self,
@@ -104,7 +203,7 @@ class CourseEmbeddingStore:
         metadata: Optional[Dict] = None
     ) -> bool:
         """
-        Ajouter un cours et son embedding à ChromaDB
+        Ajouter (ou remplacer) un cours et son embedding dans ChromaDB
 
         Args:
             course_id: ID unique du cours
@@ -115,41 +214,26 @@ class CourseEmbeddingStore:
         Returns:
             True si ajouté avec succès
         """
-        try:
-            # Générer le texte combiné et l'embedding
-            text = f"{title}. {description[:500] if description else ''}"
-            embedding = self.generate_embedding(text)
-
-            # Préparer les métadonnées
-            course_metadata = {
-                "title": title[:1000],  # ChromaDB limite à 1000 caractères
-                "description": (description[:500] + "...") if description and len(description) > 500 else (description or "")
-            }
-
-            # Ajouter les métadonnées supplémentaires
-            if metadata:
-                course_metadata.update(metadata)
-
-            # Ajouter à ChromaDB
-            self.collection.add(
-                ids=[course_id],
-                embeddings=[embedding],
-                metadatas=[course_metadata],
-                documents=[text[:1000]]  # Texte pour référence
-            )
-
-            return True
-
-        except Exception as e:
-            print(f"[ERROR] Impossible d'ajouter le cours {course_id}: {e}")
-            return False
-
-    def add_courses_batch(self, courses: List[Dict]) -> Tuple[int, int]:
+        success, _ = self.add_courses_batch([{
+            'course_id': course_id,
+            'title': title,
+            'description': description,
+            'metadata': metadata or {}
+        }])
+        return success == 1
+
+    def add_courses_batch(self, courses: List[Dict], encode_batch_size: int = 64,
+                          skip_unchanged: bool = False) -> Tuple[int, int]:
         """
         Ajouter plusieurs cours en batch (plus rapide)
 
+        Tous les textes du batch sont encodés en un seul appel au modèle.
+        Les ids déjà présents sont remplacés (upsert), sans faire échouer le batch.
+
         Args:
             courses: Liste de dictionnaires avec keys: course_id, title, description, metadata
+            encode_batch_size: Taille des lots passés au modèle
+            skip_unchanged: Ne ré-encoder que les cours nouveaux ou dont le texte a changé
 
         Returns:
             Tuple (succès, échecs)
@@ -157,12 +241,50 @@ class CourseEmbeddingStore:
         if not courses:
             return 0, 0
 
-        ids = []
-        embeddings = []
-        metadatas = []
-        documents = []
+        prepared, failed = self._prepare_batch(courses)
+        if not prepared['ids']:
+            return 0, failed
+
+        to_update = self._empty_batch()
+        if skip_unchanged:
+            existing = self.collection.get(ids=prepared['ids'], include=["metadatas", "documents"])
+            stored = self._with_content_hashes(existing)
+            diff = Counter()
+            prepared, to_update = self._diff_batch(prepared, stored, diff)
+            print(f"[INFO] ChromaDB: {diff['new']} nouveaux, {diff['changed']} modifiés, "
+                  f"{diff['metadata']} métadonnées seules, {diff['unchanged']} inchangés")
 
         success = 0
+        if to_update['ids']:
+            updated, update_failed = self._update_metadatas(to_update)
+            success += updated
+            failed += update_failed
+
+        if not prepared['ids']:
+            return success, failed
+
+        try:
+            embeddings = self._encode_texts(prepared['texts'], encode_batch_size)
+        except Exception as e:
+            print(f"[ERROR] Erreur d'encodage du batch: {e}")
+            return success, failed + len(prepared['ids'])
+
+        written, write_failed = self._write_batch(prepared, embeddings)
+        return success + written, failed + write_failed
+
+    @staticmethod
+    def _empty_batch() -> Dict[str, List]:
+        """Batch préparé vide (listes alignées par cours)"""
+        return {'ids': [], 'texts': [], 'documents': [], 'metadatas': []}
+
+    def _prepare_batch(self, courses: List[Dict]) -> Tuple[Dict[str, List], int]:
+        """
+        Préparer ids, textes et métadonnées d'un batch (sans encoder)
+
+        Returns:
+            Tuple ({'ids', 'texts', 'documents', 'metadatas'}, nombre de cours invalides)
+        """
+        prepared = self._empty_batch()
         failed = 0
 
         for course in courses:
@@ -171,9 +293,8 @@ class CourseEmbeddingStore:
                 title = course['title']
                 description = course.get('description', '')
 
-                # Générer le texte et l'embedding
-                text = f"{title}. {description[:500] if description else ''}"
-                embedding = self.generate_embedding(text)
+                # Texte encodé et son empreinte
+                text = self.course_text(title, description)
 
                 # Préparer les métadonnées
                 metadata = {
@@ -182,35 +303,87 @@ class CourseEmbeddingStore:
                 }
 
                 # Ajouter métadonnées supplémentaires
-                if 'metadata' in course:
+                if course.get('metadata'):
                     metadata.update(course['metadata'])
+                metadata['content_hash'] = self.content_hash(text)
 
-                ids.append(course_id)
-                embeddings.append(embedding)
-                metadatas.append(metadata)
-                documents.append(text[:1000])
-
-                success += 1
+                prepared['ids'].append(course_id)
+                prepared['texts'].append(text)
+                prepared['documents'].append(text[:DOCUMENT_MAX_CHARS])
+                prepared['metadatas'].append(metadata)
 
             except Exception as e:
                 print(f"[WARNING] Erreur pour cours {course.get('course_id', 'unknown')}: {e}")
                 failed += 1
+
+        return prepared, failed
+
+    def _diff_batch(self, prepared: Dict[str, List], stored: Dict[str, Dict],
+                    counts: Counter) -> Tuple[Dict[str, List], Dict[str, List]]:
+        """
+        Comparer un batch préparé aux métadonnées stockées dans ChromaDB
+
+        Args:
+            prepared: Batch préparé (_prepare_batch)
+            stored: {id: métadonnées} déjà dans ChromaDB
+            counts: Compteurs new/changed/metadata/unchanged mis à jour
+
+        Returns:
+            Tuple (cours à encoder, cours dont seules les métadonnées ont changé)
+        """
+        to_embed = self._empty_batch()
+        to_update = self._empty_batch()
+
+        for i, course_id in enumerate(prepared['ids']):
+            metadata = prepared['metadatas'][i]
+            current = stored.get(course_id)
+
+            if current is None:
+                target, kind = to_embed, 'new'
+            elif current.get('content_hash') != metadata['content_hash']:
+                target, kind = to_embed, 'changed'
+            elif current != metadata:
+                target, kind = to_update, 'metadata'
+            else:
+                counts['unchanged'] += 1
                 continue
 
-        # Ajouter le batch à ChromaDB
-        if ids:
-            try:
-                self.collection.add(
-                    ids=ids,
-                    embeddings=embeddings,
-                    metadatas=metadatas,
-                    documents=documents
-                )
-            except Exception as e:
-                print(f"[ERROR] Erreur lors de l'ajout batch: {e}")
-                return 0, len(courses)
+            counts[kind] += 1
+            for key in target:
+                target[key].append(prepared[key][i])
+
+        return to_embed, to_update
+
+    def _encode_texts(self, texts: List[str], encode_batch_size: int = 64) -> List[List[float]]:
+        """Encoder les textes de cours en un appel au modèle (hors cache des requêtes)"""
+        if self.model is None:
+            self.load_model()
+
+        embeddings = self.model.encode(texts, batch_size=encode_batch_size, convert_to_numpy=True)
+        return embeddings.tolist()
+
+    def _write_batch(self, prepared: Dict[str, List], embeddings: List[List[float]]) -> Tuple[int, int]:
+        """Écrire (upsert) un batch encodé dans ChromaDB (succès, échecs)"""
+        try:
+            self.collection.upsert(
+                ids=prepared['ids'],
+                embeddings=embeddings,
+                metadatas=prepared['metadatas'],
+                documents=prepared['documents']
+            )
+            return len(prepared['ids']), 0
+        except Exception as e:
+            print(f"[ERROR] Erreur lors de l'ajout batch: {e}")
+            return 0, len(prepared['ids'])
 
-        return success, failed
+    def _update_metadatas(self, prepared: Dict[str, List]) -> Tuple[int, int]:
+        """Mettre à jour les métadonnées seules (embedding inchangé)"""
+        try:
+            self.collection.update(ids=prepared['ids'], metadatas=prepared['metadatas'])
+            return len(prepared['ids']), 0
+        except Exception as e:
+            print(f"[ERROR] Erreur de mise à jour des métadonnées: {e}")
+            return 0, len(prepared['ids'])
 
     def search_similar_courses(
         self,
@@ -244,34 +417,7 @@ class CourseEmbeddingStore:
                 include=["metadatas", "distances", "documents"]
             )
 
-            # Formater les résultats
-            courses = []
-
-            if results['ids'] and len(results['ids'][0]) > 0:
-                for i in range(len(results['ids'][0])):
-                    course_id = results['ids'][0][i]
-                    metadata = results['metadatas'][0][i]
-                    distance = results['distances'][0][i]
-
-                    # Convertir distance en score de similarité (0-100)
-                    # ChromaDB retourne distance cosinus (0 = identique, 2 = opposé)
-                    # Similarité = (2 - distance) / 2 * 100
-                    similarity_score = ((2 - distance) / 2) * 100
-
-                    courses.append({
-                        'course_id': course_id,
-                        'title': metadata.get('title', ''),
-                        'description': metadata.get('description', ''),
-                        'difficulty': metadata.get('difficulty', 'Non spécifié'),
-                        'duration': metadata.get('duration', 'Non spécifié'),
-                        'partner_name': metadata.get('partner_name', 'Coursera'),
-                        'url': metadata.get('url', ''),
-                        'categories': metadata.get('categories', '[]'),
-                        'score_similarite': round(similarity_score, 2),
-                        'distance': round(distance, 4)
-                    })
-
-            return courses
+            return self._format_results(results, 0)
 
         except Exception as e:
             print(f"[ERROR] Erreur de recherche: {e}")
@@ -279,6 +425,80 @@ class CourseEmbeddingStore:
             traceback.print_exc()
             return []
 
+    def search_similar_courses_batch(
+        self,
+        queries: List[str],
+        n_results: int = 10,
+        where: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """
+        Rechercher les cours similaires pour plusieurs requêtes en un seul aller-retour
+
+        Les requêtes sont encodées en une passe du modèle, puis envoyées dans un
+        unique collection.query (plusieurs query_embeddings).
+
+        Args:
+            queries: Requêtes de recherche
+            n_results: Nombre de résultats par requête
+            where: Filtres sur les métadonnées (communs à toutes les requêtes)
+
+        Returns:
+            Une liste de cours par requête (même ordre que queries)
+
+        Raises:
+            Exception: l'erreur ChromaDB est propagée (et non convertie en listes
+            vides) pour que l'appelant puisse se rabattre sur SQLite
+        """
+        if not queries:
+            return []
+
+        try:
+            query_embeddings = self.generate_embeddings(queries)
+
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                include=["metadatas", "distances", "documents"]
+            )
+
+        except Exception as e:
+            print(f"[ERROR] Erreur de recherche batch: {e}")
+            raise
+
+        return [self._format_results(results, i) for i in range(len(queries))]
+
+    @staticmethod
+    def _format_results(results: Dict, query_index: int) -> List[Dict]:
+        """Formater les résultats ChromaDB d'une requête"""
+        courses = []
+
+        if results['ids'] and len(results['ids'][query_index]) > 0:
+            for i in range(len(results['ids'][query_index])):
+                course_id = results['ids'][query_index][i]
+                metadata = results['metadatas'][query_index][i]
+                distance = results['distances'][query_index][i]
+
+                # Convertir distance en score de similarité (0-100)
+                # ChromaDB retourne distance cosinus (0 = identique, 2 = opposé)
+                # Similarité = (2 - distance) / 2 * 100
+                similarity_score = ((2 - distance) / 2) * 100
+
+                courses.append({
+                    'course_id': course_id,
+                    'title': metadata.get('title', ''),
+                    'description': metadata.get('description', ''),
+                    'difficulty': metadata.get('difficulty', 'Non spécifié'),
+                    'duration': metadata.get('duration', 'Non spécifié'),
+                    'partner_name': metadata.get('partner_name', 'Coursera'),
+                    'url': metadata.get('url', ''),
+                    'categories': metadata.get('categories', '[]'),
+                    'score_similarite': round(similarity_score, 2),
+                    'distance': round(distance, 4)
+                })
+
+        return courses
+
     def get_count(self) -> int:
         """Obtenir le nombre d'embeddings stockés"""
         return self.collection.count()
@@ -300,7 +520,7 @@ class CourseEmbeddingStore:
         metadata: Optional[Dict] = None
     ) -> bool:
         """
-        Mettre à jour un cours (supprimer + rajouter)
+        Mettre à jour un cours (upsert)
 
         Args:
             course_id: ID du cours
@@ -311,120 +531,361 @@ class CourseEmbeddingStore:
         Returns:
             True si mis à jour avec succès
         """
-        self.delete_course(course_id)
         return self.add_course(course_id, title, description, metadata)
 
-    def sync_from_sqlite(self, batch_size: int = 100) -> Tuple[int, int]:
+    def sync_from_sqlite(self, batch_size: int = 100, encode_batch_size: int = 64,
+                         queue_size: int = 4, allow_mass_delete: bool = False) -> Tuple[int, int]:
         """
-        Synchroniser tous les cours depuis SQLite vers ChromaDB
+        Synchroniser incrémentalement les cours depuis SQLite vers ChromaDB
+
+        Chaque cours porte l'empreinte (content_hash) du texte encodé. La
+        synchronisation calcule le diff avec ChromaDB:
+        - nouveaux et modifiés: ré-encodés puis upsert
+        - métadonnées seules modifiées: mises à jour sans ré-encodage
+        - supprimés de SQLite: supprimés de ChromaDB (voir _delete_missing)
+
+        Les cours indexés avant l'empreinte la reçoivent à la première
+        synchronisation, calculée sur le document stocké (voir _with_content_hashes).
+
+        Pipeline producteur/consommateur sur 3 étapes qui se chevauchent:
+        lecture SQLite (curseur en streaming) + diff -> encodage -> écriture ChromaDB.
+        Les files sont bornées: la mémoire reste limitée à quelques batches.
 
         Args:
-            batch_size: Taille des batches pour l'ajout
+            batch_size: Taille des batches de cours à encoder
+            encode_batch_size: Taille des lots passés au modèle
+            queue_size: Nombre maximum de batches en attente entre deux étapes
+            allow_mass_delete: Autoriser la suppression de plus de MAX_DELETE_RATIO
+                des cours ChromaDB
 
         Returns:
-            Tuple (ajoutés, échoués)
+            Tuple (ajoutés ou mis à jour, échoués). Le détail du diff est
+            disponible dans self.last_sync_stats.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         try:
             # Charger le modèle une seule fois
             self.load_model()
 
-            # Compter les cours
-            cursor.execute("SELECT COUNT(*) FROM courses")
-            total = cursor.fetchone()[0]
+            conn = sqlite3.connect(self.db_path)
+            try:
+                total = conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+            finally:
+                conn.close()
 
             print(f"\n[INFO] Synchronisation de {total} cours depuis SQLite...")
 
-            # Récupérer tous les IDs déjà dans ChromaDB
-            existing_ids = set()
-            if self.collection.count() > 0:
-                # Récupérer par batches pour éviter les limites de mémoire
-                offset = 0
-                limit = 1000
+            # Empreintes et métadonnées déjà dans ChromaDB
+            stored = self._get_stored_metadatas()
+            print(f"[INFO] {len(stored)} cours déjà dans ChromaDB")
+
+            to_encode = queue.Queue(maxsize=queue_size)
+            to_write = queue.Queue(maxsize=queue_size)
+            errors = []
+            seen_ids = set()
+            stats = Counter()
+            scan = {'complete': False}
+
+            def reader():
+                """Étape 1: lire SQLite par blocs, calculer le diff et former les batches"""
+                try:
+                    for batch in self._iter_sync_batches(batch_size, stored, seen_ids, stats):
+                        to_encode.put(batch)
+                    scan['complete'] = True
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    to_encode.put(None)
+
+            def writer():
+                """Étape 3: écrire les batches encodés dans ChromaDB"""
                 while True:
-                    results = self.collection.get(
-                        limit=limit,
-                        offset=offset,
-                        include=[]
-                    )
-                    if not results['ids']:
-                        break
-                    existing_ids.update(results['ids'])
-                    offset += limit
-                    if len(results['ids']) < limit:
+                    item = to_write.get()
+                    if item is None:
                         break
 
-            print(f"[INFO] {len(existing_ids)} cours déjà dans ChromaDB")
+                    to_embed, embeddings, to_update = item
+                    for batch, write in ((to_update, self._update_metadatas),
+                                         (to_embed, lambda b: self._write_batch(b, embeddings))):
+                        if batch['ids']:
+                            success, failed = write(batch)
+                            stats['written'] += success
+                            stats['write_failed'] += failed
 
-            # Récupérer les cours depuis SQLite
-            cursor.execute("""
-                SELECT id, course_id, title, description, difficulty, duration,
-                       partner_name, url, categories
-                FROM courses
-            """)
-
-            added = 0
-            failed = 0
-            batch = []
-
-            for row in cursor.fetchall():
-                db_id, course_id, title, description, difficulty, duration, partner_name, url, categories = row
-
-                # Utiliser course_id comme identifiant unique
-                unique_id = str(course_id) if course_id else str(db_id)
-
-                # Sauter si déjà présent
-                if unique_id in existing_ids:
-                    continue
-
-                # Ajouter au batch
-                batch.append({
-                    'course_id': unique_id,
-                    'title': title,
-                    'description': description,
-                    'metadata': {
-                        'difficulty': difficulty or 'Non spécifié',
-                        'duration': duration or 'Non spécifié',
-                        'partner_name': partner_name or 'Coursera',
-                        'url': url or '',
-                        'categories': categories or '[]'
-                    }
-                })
-
-                # Traiter le batch
-                if len(batch) >= batch_size:
-                    success, fail = self.add_courses_batch(batch)
-                    added += success
-                    failed += fail
+                    print(f"[PROGRESS] {len(seen_ids)}/{total} cours parcourus, "
+                          f"{stats['written']} écrits dans ChromaDB")
 
-                    progress = ((added + failed) / (total - len(existing_ids))) * 100 if total > len(existing_ids) else 100
-                    print(f"[PROGRESS] {added + failed}/{total - len(existing_ids)} cours traités ({progress:.1f}%)")
+            reader_thread = threading.Thread(target=reader, daemon=True)
+            writer_thread = threading.Thread(target=writer, daemon=True)
+            reader_thread.start()
+            writer_thread.start()
 
-                    batch = []
+            # Étape 2 (thread courant): encoder pendant que les autres lisent/écrivent
+            try:
+                while True:
+                    batch = to_encode.get()
+                    if batch is None:
+                        break
 
-            # Traiter le dernier batch
-            if batch:
-                success, fail = self.add_courses_batch(batch)
-                added += success
-                failed += fail
+                    to_embed, to_update = batch
+                    embeddings = []
+                    if to_embed['ids']:
+                        try:
+                            embeddings = self._encode_texts(to_embed['texts'], encode_batch_size)
+                        except Exception as e:
+                            print(f"[ERROR] Erreur d'encodage du batch: {e}")
+                            stats['encode_failed'] += len(to_embed['ids'])
+                            to_embed = self._empty_batch()
+
+                    to_write.put((to_embed, embeddings, to_update))
+            finally:
+                to_write.put(None)
+                writer_thread.join()
+                # Débloquer le lecteur si l'encodage s'est arrêté avant la fin
+                while reader_thread.is_alive():
+                    try:
+                        to_encode.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+            if errors:
+                raise errors[0]
+
+            # Cours supprimés de SQLite
+            deleted = self._delete_missing(stored, seen_ids, scan['complete'], allow_mass_delete)
+
+            failed = stats['invalid'] + stats['encode_failed'] + stats['write_failed']
+            self.last_sync_stats = {
+                'new': stats['new'],
+                'changed': stats['changed'],
+                'metadata': stats['metadata'],
+                'unchanged': stats['unchanged'],
+                'deleted': deleted,
+                'failed': failed
+            }
 
             print(f"\n[OK] Synchronisation terminée:")
-            print(f"  - Ajoutés: {added}")
+            print(f"  - Nouveaux: {stats['new']}")
+            print(f"  - Modifiés (ré-encodés): {stats['changed']}")
+            print(f"  - Métadonnées mises à jour: {stats['metadata']}")
+            print(f"  - Inchangés: {stats['unchanged']}")
+            print(f"  - Supprimés: {deleted}")
             print(f"  - Échoués: {failed}")
             print(f"  - Total dans ChromaDB: {self.collection.count()}")
 
-            return added, failed
+            return stats['written'], failed
 
         except Exception as e:
             print(f"[ERROR] Erreur de synchronisation: {e}")
             import traceback
             traceback.print_exc()
             return 0, 0
+
+    def _delete_missing(self, stored: Dict[str, Dict], seen_ids: set, scan_complete: bool,
+                        allow_mass_delete: bool = False) -> int:
+        """
+        Supprimer de ChromaDB les cours absents de SQLite, avec garde-fous
+
+        Rien n'est supprimé si la lecture SQLite n'est pas allée au bout ou n'a
+        vu aucun cours (base vide, mauvais chemin, table recréée...), ni si plus
+        de MAX_DELETE_RATIO des cours ChromaDB disparaîtraient sans allow_mass_delete.
+
+        Returns:
+            Nombre de cours supprimés
+        """
+        deleted_ids = [course_id for course_id in stored if course_id not in seen_ids]
+        if not deleted_ids:
+            return 0
+
+        if not scan_complete or not seen_ids:
+            print(f"[WARNING] Lecture SQLite incomplète ou vide: "
+                  f"suppression de {len(deleted_ids)} cours ChromaDB ignorée")
+            return 0
+
+        if not allow_mass_delete and len(deleted_ids) > MAX_DELETE_RATIO * len(stored):
+            print(f"[WARNING] {len(deleted_ids)}/{len(stored)} cours ChromaDB absents de SQLite "
+                  f"(> {MAX_DELETE_RATIO:.0%}): suppression refusée, relancer avec allow_mass_delete=True")
+            return 0
+
+        for start in range(0, len(deleted_ids), 1000):
+            self.collection.delete(ids=deleted_ids[start:start + 1000])
+        return len(deleted_ids)
+
+    def _get_stored_metadatas(self, page_size: int = 1000) -> Dict[str, Dict]:
+        """Métadonnées des cours déjà dans ChromaDB (lues par pages pour éviter les limites de mémoire)"""
+        stored = {}
+        if self.collection.count() == 0:
+            return stored
+
+        offset = 0
+        while True:
+            results = self.collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["metadatas", "documents"]
+            )
+            if not results['ids']:
+                break
+            stored.update(self._with_content_hashes(results))
+            offset += page_size
+            if len(results['ids']) < page_size:
+                break
+
+        return stored
+
+    def _with_content_hashes(self, results: Dict) -> Dict[str, Dict]:
+        """
+        {id: métadonnées} d'un résultat collection.get(include=["metadatas", "documents"])
+
+        Les cours indexés avant l'empreinte n'ont pas de content_hash: elle est
+        calculée sur le document stocké (le texte encodé) et enregistrée sans
+        ré-encodage. Seuls les documents tronqués (DOCUMENT_MAX_CHARS atteint),
+        dont le texte complet est inconnu, restent sans empreinte et seront
+        ré-encodés par la synchronisation.
+        """
+        stored = {}
+        backfill = self._empty_batch()
+
+        for course_id, metadata, document in zip(results['ids'], results['metadatas'], results['documents']):
+            metadata = dict(metadata or {})
+            if 'content_hash' not in metadata and document and len(document) < DOCUMENT_MAX_CHARS:
+                metadata['content_hash'] = self.content_hash(document)
+                backfill['ids'].append(course_id)
+                backfill['metadatas'].append(metadata)
+            stored[course_id] = metadata
+
+        if backfill['ids']:
+            updated, failed = self._update_metadatas(backfill)
+            if failed:
+                # Empreinte non enregistrée: traiter ces cours comme avant (ré-encodage)
+                for course_id in backfill['ids']:
+                    stored[course_id].pop('content_hash')
+            else:
+                print(f"[INFO] Empreinte ajoutée à {updated} cours existants (sans ré-encodage)")
+
+        return stored
+
+    def _iter_sync_batches(self, batch_size: int, stored: Dict[str, Dict],
+                           seen_ids: set, stats: Counter):
+        """
+        Batches (à encoder, métadonnées à mettre à jour) issus du diff SQLite/ChromaDB
+
+        Les cours inchangés sont écartés avant l'encodage: les batches produits
+        ne contiennent que du travail utile.
+        """
+        to_embed = self._empty_batch()
+        to_update = self._empty_batch()
+
+        for courses in self._iter_course_rows(batch_size):
+            seen_ids.update(course['course_id'] for course in courses)
+
+            prepared, invalid = self._prepare_batch(courses)
+            stats['invalid'] += invalid
+
+            embed_part, update_part = self._diff_batch(prepared, stored, stats)
+            for batch, part in ((to_embed, embed_part), (to_update, update_part)):
+                for key in batch:
+                    batch[key].extend(part[key])
+
+            if len(to_embed['ids']) >= batch_size or len(to_update['ids']) >= batch_size:
+                yield to_embed, to_update
+                to_embed = self._empty_batch()
+                to_update = self._empty_batch()
+
+        if to_embed['ids'] or to_update['ids']:
+            yield to_embed, to_update
+
+    def _iter_course_rows(self, batch_size: int):
+        """
+        Parcourir les cours SQLite en streaming (fetchmany), par blocs de batch_size
+
+        La connexion est ouverte dans le thread appelant (contrainte sqlite3).
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, course_id, title, description, difficulty, duration,
+                       partner_name, url, categories
+                FROM courses
+            """)
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+
+                courses = []
+                for row in rows:
+                    db_id, course_id, title, description, difficulty, duration, partner_name, url, categories = row
+
+                    courses.append({
+                        # Utiliser course_id comme identifiant unique
+                        'course_id': str(course_id) if course_id else str(db_id),
+                        'title': title,
+                        'description': description,
+                        'metadata': {
+                            'difficulty': difficulty or 'Non spécifié',
+                            'duration': duration or 'Non spécifié',
+                            'partner_name': partner_name or 'Coursera',
+                            'url': url or '',
+                            'categories': categories or '[]'
+                        }
+                    })
+
+                yield courses
         finally:
             conn.close()
 
+    def export_matrix(
+        self,
+        matrix_path: str = "course_embeddings.npy",
+        dtype: str = "float32",
+        page_size: int = 1000
+    ) -> int:
+        """
+        Exporter tous les embeddings de la collection vers une matrice .npy
+
+        Le fichier produit est utilisable sans ChromaDB (CourseEmbeddingMatrix),
+        ouvert en mmap et partagé entre workers.
+
+        Args:
+            matrix_path: Chemin du fichier .npy (+ fichier annexe .meta.json)
+            dtype: "float32" ou "float16"
+            page_size: Nombre d'embeddings lus par appel à collection.get
+
+        Returns:
+            Nombre de cours exportés
+        """
+        try:
+            from course_scraper.course_embedding_matrix import write_embedding_matrix
+        except ImportError:
+            from course_embedding_matrix import write_embedding_matrix
+
+        ids = []
+        embeddings = []
+        metadatas = []
+        offset = 0
+
+        while True:
+            results = self.collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["embeddings", "metadatas"]
+            )
+            if not results['ids']:
+                break
+
+            ids.extend(results['ids'])
+            embeddings.extend(results['embeddings'])
+            metadatas.extend(results['metadatas'])
+            offset += page_size
+
+            if len(results['ids']) < page_size:
+                break
+
+        print(f"[INFO] Export de {len(ids)} embeddings vers {matrix_path}")
+        return write_embedding_matrix(matrix_path, ids, embeddings, metadatas, dtype=dtype)
+
     def reset(self):
         """Supprimer tous les embeddings (attention!)"""
         self.chroma_client.delete_collection(self.collection_name)
@@ -221,17 +221,17 @@ class CourseraSimpleScraper:
             # NOUVEAU: Synchronisation automatique avec ChromaDB
             if sync_chromadb and new_courses:
                 try:
-                    from course_embedding_store import CourseEmbeddingStore
+                    from course_embedding_store import get_store
 
                     print(f"[INFO] Synchronisation de {len(new_courses)} cours vers ChromaDB...")
-                    store = CourseEmbeddingStore(
+                    store = get_store(
                         db_path=self.db_path,
                         chroma_path="./chroma_db"
                     )
 
-                    # Ajouter les nouveaux cours en batch
-                    success, failed = store.add_courses_batch(new_courses)
-                    print(f"[OK] ChromaDB: {success} cours ajoutés, {failed} échecs")
+                    # Upsert en batch: seuls les cours nouveaux ou modifiés sont ré-encodés
+                    success, failed = store.add_courses_batch(new_courses, skip_unchanged=True)
+                    print(f"[OK] ChromaDB: {success} cours ajoutés/mis à jour, {failed} échecs")
 
                 except ImportError:
                     print(f"[WARNING] ChromaDB non disponible, synchronisation ignorée")
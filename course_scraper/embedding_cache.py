@@ -0,0 +1,232 @@
+"""
+Embedding Cache - Cache LRU borné texte -> embedding
+Évite de ré-encoder les mêmes requêtes ("Learn Python for Data Science ...")
+
+- Borné en nombre d'entrées ET en mémoire (octets des vecteurs + textes)
+- Compteurs hits/misses
+- Persistance optionnelle sur disque (.npz) entre deux redémarrages
+- Un cache par processus, partagé par CourseEmbeddingStore et ATSScorer
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_MB = 64
+
+_shared_cache: Optional['EmbeddingCache'] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> 'EmbeddingCache':
+    """
+    Cache partagé par le processus
+
+    Configuration par variables d'environnement:
+        EMBEDDING_CACHE_SIZE: nombre maximum d'entrées (défaut: 10000)
+        EMBEDDING_CACHE_MAX_MB: mémoire maximum en Mo (défaut: 64)
+        EMBEDDING_CACHE_PATH: fichier .npz de persistance (désactivée si vide)
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = EmbeddingCache(
+                    max_entries=int(os.getenv('EMBEDDING_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+                    max_bytes=int(float(os.getenv('EMBEDDING_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024),
+                    persist_path=os.getenv('EMBEDDING_CACHE_PATH') or None
+                )
+    return _shared_cache
+
+
+class EmbeddingCache:
+    """
+    Cache LRU thread-safe d'embeddings, indexé par (modèle, texte)
+
+    Les vecteurs sont stockés en float32 et en lecture seule: un appelant
+    ne peut pas modifier par erreur une entrée partagée.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 persist_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Mémoire maximum occupée par les entrées (octets)
+            persist_path: Fichier .npz chargé au démarrage et sauvegardé à la sortie
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._entries: 'OrderedDict[Tuple[str, str], np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        if persist_path:
+            self.load(persist_path)
+            atexit.register(self.save)
+
+    @staticmethod
+    def _entry_size(key: Tuple[str, str], embedding: np.ndarray) -> int:
+        """Taille approximative d'une entrée (vecteur + texte)"""
+        return embedding.nbytes + len(key[1])
+
+    def get(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        """Embedding en cache (None si absent), marqué comme récemment utilisé"""
+        key = (model_name, text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, text: str, model_name: str, embedding) -> np.ndarray:
+        """Ajouter un embedding et évincer les moins récemment utilisés si nécessaire"""
+        key = (model_name, text)
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        size = self._entry_size(key, embedding)
+
+        if size > self.max_bytes or self.max_entries <= 0:
+            return embedding
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= self._entry_size(key, previous)
+
+            self._entries[key] = embedding
+            self.size_bytes += size
+
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                old_key, old_embedding = self._entries.popitem(last=False)
+                self.size_bytes -= self._entry_size(old_key, old_embedding)
+
+        return embedding
+
+    def get_or_compute(self, texts: List[str], model_name: str,
+                       encode: Callable[[List[str]], np.ndarray]) -> List[np.ndarray]:
+        """
+        Embeddings de plusieurs textes: seuls les absents du cache sont encodés (en un appel)
+
+        Args:
+            texts: Textes à encoder
+            model_name: Nom du modèle (fait partie de la clé)
+            encode: Fonction d'encodage groupé (liste de textes -> matrice)
+
+        Returns:
+            Un embedding par texte (même ordre que texts)
+        """
+        embeddings: List[Optional[np.ndarray]] = [self.get(text, model_name) for text in texts]
+        missing = list(dict.fromkeys(text for text, e in zip(texts, embeddings) if e is None))
+
+        if missing:
+            computed = dict(zip(missing, encode(missing)))
+            for text, embedding in computed.items():
+                computed[text] = self.put(text, model_name, embedding)
+            embeddings = [e if e is not None else computed[text] for text, e in zip(texts, embeddings)]
+
+        return embeddings
+
+    def clear(self):
+        """Vider le cache (les compteurs sont conservés)"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict:
+        """Statistiques du cache"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'size_mb': round(self.size_bytes / (1024 * 1024), 2),
+            'max_entries': self.max_entries,
+            'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 1) if total else 0.0
+        }
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """
+        Sauvegarder le cache dans un fichier .npz (écriture atomique)
+
+        Format: vecteurs concaténés + offsets (dimensions variables selon le modèle),
+        textes et noms de modèles en tableaux unicode (pas de pickle).
+        """
+        path = path or self.persist_path
+        if not path:
+            return False
+
+        with self._lock:
+            items = list(self._entries.items())
+
+        tmp_path = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            lengths = [len(e) for _, e in items]
+            offsets = np.cumsum([0] + lengths).astype(np.int64)
+            flat = np.concatenate([e for _, e in items]) if items else np.zeros(0, dtype=np.float32)
+
+            # Fichier temporaire propre à cet appel: plusieurs processus (workers,
+            # atexit) peuvent sauvegarder en même temps vers le même chemin
+            fd, tmp_path = tempfile.mkstemp(dir=directory or '.', prefix=os.path.basename(path) + '.',
+                                            suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    models=np.array([k[0] for k, _ in items], dtype=str),
+                    texts=np.array([k[1] for k, _ in items], dtype=str),
+                    offsets=offsets,
+                    embeddings=flat
+                )
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return True
+
+        except OSError as e:
+            print(f"[WARNING] Sauvegarde du cache d'embeddings échouée: {e}")
+            return False
+
+        finally:
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Charger un cache sauvegardé (les entrées les plus récentes sont gardées)"""
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            return 0
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                models, texts = data['models'], data['texts']
+                offsets, flat = data['offsets'], data['embeddings']
+
+                for i in range(len(texts)):
+                    self.put(str(texts[i]), str(models[i]), flat[offsets[i]:offsets[i + 1]])
+
+            print(f"[INFO] Cache d'embeddings chargé: {len(self._entries)} entrées ({path})")
+            return len(self._entries)
+
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[WARNING] Cache d'embeddings illisible ({path}): {e}")
+            return 0
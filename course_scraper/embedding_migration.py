@@ -0,0 +1,206 @@
+"""
+Embedding Migration - Migration SQLite -> ChromaDB sur plusieurs processus
+
+- Les cours à encoder (diff par content_hash) sont découpés en shards
+- Un pool de processus encode les shards: chaque worker charge le modèle une fois
+- Les embeddings reviennent dans des blocs de mémoire partagée (pas de pickle
+  de grosses listes de floats entre processus)
+- Un seul écrivain (le processus principal) fait les upserts ChromaDB
+- La progression réelle (shards écrits) est remontée par callback
+"""
+
+import os
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import get_context, resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Modèle du processus worker (chargé une seule fois par l'initializer)
+_worker_model = None
+
+
+def default_workers() -> int:
+    """Nombre de processus par défaut (CHROMADB_MIGRATION_WORKERS ou CPU - 1, max 4)"""
+    configured = os.getenv('CHROMADB_MIGRATION_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def _init_worker(model_name: str, torch_threads: int):
+    """Initializer du worker: charger le modèle une seule fois, limiter les threads torch"""
+    global _worker_model
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_shard(texts: List[str], encode_batch_size: int) -> Tuple[str, Tuple[int, int]]:
+    """
+    Encoder un shard dans le worker et publier le résultat en mémoire partagée
+
+    Le bloc est cédé au processus principal, qui le lit puis le supprime
+    (_read_shared_block): il est retiré du resource tracker ici, sinon le
+    tracker le signalerait comme fuite et tenterait de le supprimer une 2e fois.
+
+    Returns:
+        Tuple (nom du bloc de mémoire partagée, forme de la matrice float32)
+    """
+    embeddings = _worker_model.encode(texts, batch_size=encode_batch_size, convert_to_numpy=True)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    block = shared_memory.SharedMemory(create=True, size=max(embeddings.nbytes, 1))
+    try:
+        np.ndarray(embeddings.shape, dtype=np.float32, buffer=block.buf)[:] = embeddings
+    except Exception:
+        block.close()
+        block.unlink()
+        raise
+
+    resource_tracker.unregister(block._name, 'shared_memory')
+    block.close()
+    return block.name, embeddings.shape
+
+
+def _read_shared_block(name: str, shape: Tuple[int, int]) -> np.ndarray:
+    """Copier un bloc de mémoire partagée produit par un worker, puis le libérer"""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def run_parallel_migration(
+    store,
+    workers: Optional[int] = None,
+    shard_size: int = 256,
+    encode_batch_size: int = 64,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    allow_mass_delete: bool = False
+) -> Tuple[int, int]:
+    """
+    Synchroniser SQLite -> ChromaDB en encodant les shards sur un pool de processus
+
+    Même diff que CourseEmbeddingStore.sync_from_sqlite (nouveaux/modifiés
+    ré-encodés, métadonnées seules mises à jour, supprimés retirés avec les
+    mêmes garde-fous).
+
+    Args:
+        store: CourseEmbeddingStore cible (seul écrivain ChromaDB)
+        workers: Nombre de processus d'encodage (défaut: default_workers())
+        shard_size: Nombre de cours par shard
+        encode_batch_size: Taille des lots passés au modèle dans chaque worker
+        progress_callback: Appelé avec (cours traités, cours à encoder) après chaque shard
+        allow_mass_delete: Autoriser la suppression de plus de MAX_DELETE_RATIO
+            des cours ChromaDB
+
+    Returns:
+        Tuple (ajoutés ou mis à jour, échoués)
+    """
+    try:
+        from course_scraper.course_embedding_store import MODEL_NAME
+    except ImportError:
+        from course_embedding_store import MODEL_NAME
+
+    workers = workers or default_workers()
+    if workers <= 1:
+        print("[INFO] 1 seul processus: synchronisation mono-processus")
+        return store.sync_from_sqlite(batch_size=shard_size, encode_batch_size=encode_batch_size,
+                                      allow_mass_delete=allow_mass_delete)
+
+    def report(done: int, total: int):
+        if progress_callback:
+            progress_callback(done, total)
+
+    # 1. Diff SQLite / ChromaDB (lecture en streaming, rien n'est encodé ici)
+    stored = store._get_stored_metadatas()
+    seen_ids = set()
+    stats = Counter()
+    shards = []
+    written = 0
+    failed = 0
+
+    for to_embed, to_update in store._iter_sync_batches(shard_size, stored, seen_ids, stats):
+        if to_update['ids']:
+            success, update_failed = store._update_metadatas(to_update)
+            written += success
+            failed += update_failed
+        if to_embed['ids']:
+            shards.append(to_embed)
+
+    total = sum(len(shard['ids']) for shard in shards)
+    print(f"[INFO] {total} cours à encoder en {len(shards)} shards sur {workers} processus "
+          f"({stats['unchanged']} inchangés, {stats['metadata']} métadonnées seules)")
+    report(0, total)
+
+    # 2. Encodage parallèle, écriture par le seul processus principal
+    done = 0
+    if shards:
+        torch_threads = max(1, (os.cpu_count() or workers) // workers)
+        pending: Dict = {}
+        next_shard = 0
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context('spawn'),  # pas de fork d'un processus Flask multi-thread
+            initializer=_init_worker,
+            initargs=(MODEL_NAME, torch_threads)
+        ) as pool:
+            try:
+                while next_shard < len(shards) or pending:
+                    # Au plus 2 shards en vol par worker: mémoire partagée bornée
+                    while next_shard < len(shards) and len(pending) < workers * 2:
+                        shard = shards[next_shard]
+                        pending[pool.submit(_encode_shard, shard['texts'], encode_batch_size)] = shard
+                        next_shard += 1
+
+                    completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        shard = pending.pop(future)
+                        try:
+                            name, shape = future.result()
+                            embeddings = _read_shared_block(name, shape)
+                        except Exception as e:
+                            print(f"[ERROR] Échec d'encodage d'un shard ({len(shard['ids'])} cours): {e}")
+                            failed += len(shard['ids'])
+                        else:
+                            success, write_failed = store._write_batch(shard, embeddings.tolist())
+                            written += success
+                            failed += write_failed
+
+                        done += len(shard['ids'])
+                        report(done, total)
+                        print(f"[PROGRESS] {done}/{total} cours encodés ({done / total * 100:.1f}%)")
+            finally:
+                # Arrêt sur erreur: libérer les blocs des shards encodés mais non lus
+                pool.shutdown(wait=True, cancel_futures=True)
+                for future in pending:
+                    if not future.cancelled() and future.exception() is None:
+                        _read_shared_block(*future.result())
+
+    # 3. Cours supprimés de SQLite (la boucle du diff est allée au bout)
+    deleted = store._delete_missing(stored, seen_ids, True, allow_mass_delete)
+
+    failed += stats['invalid']
+    store.last_sync_stats = {
+        'new': stats['new'],
+        'changed': stats['changed'],
+        'metadata': stats['metadata'],
+        'unchanged': stats['unchanged'],
+        'deleted': deleted,
+        'failed': failed
+    }
+
+    print(f"\n[OK] Migration parallèle terminée: {written} écrits, {deleted} supprimés, {failed} échecs")
+    print(f"  - Total dans ChromaDB: {store.get_count()}")
+    return written, failed
@@ -4,6 +4,7 @@ Charge tous les cours depuis SQLite et génère les embeddings dans ChromaDB
 """
 
 from course_embedding_store import CourseEmbeddingStore
+from embedding_migration import run_parallel_migration, default_workers
 import time
 
 
@@ -61,11 +62,15 @@ def main():
     batch_input = input("\nBatch size (défaut: 100): ").strip()
     batch_size = int(batch_input) if batch_input else 100
 
+    # Nombre de processus d'encodage
+    workers_input = input(f"Processus d'encodage (défaut: {default_workers()}): ").strip()
+    workers = int(workers_input) if workers_input else default_workers()
+
     # Lancer la synchronisation
     print("\n" + "=" * 80)
     start_time = time.time()
 
-    added, failed = store.sync_from_sqlite(batch_size=batch_size)
+    added, failed = run_parallel_migration(store, workers=workers, shard_size=batch_size)
 
     elapsed = time.time() - start_time
 
@@ -104,6 +109,15 @@ def main():
         else:
             print("[WARNING] Aucun résultat trouvé")
 
+    # Export optionnel pour les déploiements sans ChromaDB
+    if store.get_count() > 0:
+        export = input("\nExporter aussi la matrice .npy (sans ChromaDB)? (o/n/f16): ").strip().lower()
+        if export in ('o', 'f16'):
+            store.export_matrix(
+                os.path.join(script_dir, "course_embeddings.npy"),
+                dtype="float16" if export == 'f16' else "float32"
+            )
+
     print("\n" + "=" * 80)
     print("Migration terminée avec succès!")
     print(f"Base ChromaDB: ./chroma_db")
@@ -0,0 +1,413 @@
+# job_index.py - Structures d'index en mémoire pour la recherche d'offres d'emploi
+
+import re
+import bisect
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Un token = suite de caractères alphanumériques (accents inclus)
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text) -> List[str]:
+    """Découper un texte en tokens minuscules"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def parse_dates(values: pd.Series) -> np.ndarray:
+    """
+    Parser des dates de formats mixtes en datetime64[ns] (NaT si invalide)
+
+    Les dates ISO (2025-10-01...) sont lues telles quelles, les autres
+    au format français jour/mois/année (dayfirst=True).
+    """
+    values = values.astype(str).str.strip()
+    iso = values.str.match(r'^\d{4}-').to_numpy()
+    parsed = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    if iso.any():
+        iso_dates = pd.to_datetime(values[iso], errors='coerce', format='mixed', utc=True)
+        parsed[iso] = iso_dates.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+    if (~iso).any():
+        other_dates = pd.to_datetime(values[~iso], errors='coerce', format='mixed', dayfirst=True, utc=True)
+        parsed[~iso] = other_dates.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+
+    return parsed
+
+
+class InvertedIndex:
+    """
+    Index inversé token -> liste de postings (positions des lignes du DataFrame)
+
+    - Construit une seule fois au chargement des données
+    - Les postings sont des tableaux numpy triés (intersection rapide)
+    - Un token de la requête correspond à tous les mots qui le contiennent,
+      comme une recherche de sous-chaîne: "dev" -> "developpeur",
+      "stack" -> "fullstack". Un tableau de suffixes du vocabulaire (entiers:
+      position du suffixe dans le texte du vocabulaire, id du token) permet de
+      retrouver ces mots par dichotomie.
+    """
+
+    # Séparateur des tokens dans le texte du vocabulaire (absent des tokens \w+)
+    SEPARATOR = '\x00'
+
+    def __init__(self):
+        self.postings: Dict[str, np.ndarray] = {}
+        self.vocabulary: List[str] = []
+        self.size = 0
+        # Tokens dans l'ordre de leur id, concaténés dans _text ("tok1\x00tok2\x00...")
+        self._tokens: List[str] = []
+        self._text = ''
+        # Suffixes triés: position de début dans _text et id du token
+        self._suffix_offsets = np.empty(0, dtype=np.int32)
+        self._suffix_tokens = np.empty(0, dtype=np.int32)
+
+    def _suffix_key(self, offset: int) -> str:
+        """Suffixe du token commençant à cette position de _text"""
+        return self._text[offset:self._text.index(self.SEPARATOR, offset)]
+
+    def _add_tokens(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ajouter des tokens au texte du vocabulaire
+
+        Returns:
+            Tuple (positions, ids de token) de leurs suffixes, triés par suffixe
+        """
+        lengths = np.array([len(token) for token in tokens], dtype=np.int64)
+        # Position de début de chaque token (+1 pour le séparateur)
+        starts = len(self._text) + np.cumsum(lengths + 1) - (lengths + 1)
+        token_ids = np.repeat(np.arange(len(self._tokens), len(self._tokens) + len(tokens)), lengths)
+        # Position de chaque suffixe = début du token + rang du caractère dans le token
+        offsets = np.repeat(starts, lengths) + (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+
+        self._tokens.extend(tokens)
+        self._text += ''.join(token + self.SEPARATOR for token in tokens)
+
+        keys = [token[i:] for token in tokens for i in range(len(token))]
+        order = np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int64)
+        return offsets[order].astype(np.int32), token_ids[order].astype(np.int32)
+
+    def build(self, documents: List[str]):
+        """
+        Construire l'index à partir d'une liste de documents
+
+        Args:
+            documents: Textes indexés, la position dans la liste devient l'id de ligne
+        """
+        postings: Dict[str, List[int]] = {}
+
+        for row_id, document in enumerate(documents):
+            for token in set(tokenize(document)):
+                postings.setdefault(token, []).append(row_id)
+
+        # Les ids sont ajoutés dans l'ordre croissant: les listes sont déjà triées
+        self.postings = {token: np.array(ids, dtype=np.int64) for token, ids in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        self._tokens = []
+        self._text = ''
+        self._suffix_offsets, self._suffix_tokens = self._add_tokens(self.vocabulary)
+        self.size = len(documents)
+
+    def extended(self, documents: List[str]) -> 'InvertedIndex':
+        """
+        Nouvel index contenant aussi les documents ajoutés (ids à partir de self.size)
+
+        L'index courant n'est pas modifié: seules les listes des tokens touchés
+        sont recopiées, les autres sont partagées.
+        """
+        added: Dict[str, List[int]] = {}
+
+        for offset, document in enumerate(documents):
+            for token in set(tokenize(document)):
+                added.setdefault(token, []).append(self.size + offset)
+
+        return self._updated(added, {}, self.size + len(documents))
+
+    def replaced(self, positions: List[int], old_documents: List[str],
+                 new_documents: List[str]) -> 'InvertedIndex':
+        """
+        Nouvel index où les documents aux positions données ont changé de texte
+
+        Seuls les tokens apparus ou disparus sont touchés; les tokens qui n'ont
+        plus aucun document restent dans le vocabulaire avec une liste vide.
+        """
+        added: Dict[str, List[int]] = {}
+        removed: Dict[str, List[int]] = {}
+
+        for position, old_document, new_document in zip(positions, old_documents, new_documents):
+            old_tokens = set(tokenize(old_document))
+            new_tokens = set(tokenize(new_document))
+            for token in new_tokens - old_tokens:
+                added.setdefault(token, []).append(position)
+            for token in old_tokens - new_tokens:
+                removed.setdefault(token, []).append(position)
+
+        return self._updated(added, removed, self.size)
+
+    def _updated(self, added: Dict[str, List[int]], removed: Dict[str, List[int]],
+                 size: int) -> 'InvertedIndex':
+        """Copie de l'index avec des ids ajoutés/retirés des listes (les autres listes sont partagées)"""
+        index = InvertedIndex()
+        index.postings = dict(self.postings)
+        new_tokens = []
+
+        for token, ids in removed.items():
+            index.postings[token] = np.setdiff1d(index.postings[token], ids, assume_unique=True)
+
+        for token, ids in added.items():
+            ids = np.unique(np.array(ids, dtype=np.int64))
+            if token not in index.postings:
+                index.postings[token] = ids
+                new_tokens.append(token)
+            elif len(index.postings[token]) and ids[0] <= index.postings[token][-1]:
+                # Document remplacé: l'id peut tomber au milieu de la liste
+                index.postings[token] = np.union1d(index.postings[token], ids)
+            else:
+                index.postings[token] = np.concatenate([index.postings[token], ids])
+
+        index._tokens = list(self._tokens)
+        index._text = self._text
+        if new_tokens:
+            index.vocabulary = sorted(self.vocabulary + new_tokens)
+            # Les positions existantes restent valides (le texte est seulement prolongé):
+            # insérer les nouveaux suffixes à leur rang dans le tableau trié
+            offsets, token_ids = index._add_tokens(sorted(new_tokens))
+            ranks = [bisect.bisect_left(self._suffix_offsets, index._suffix_key(offset), key=index._suffix_key)
+                     for offset in offsets]
+            index._suffix_offsets = np.insert(self._suffix_offsets, ranks, offsets)
+            index._suffix_tokens = np.insert(self._suffix_tokens, ranks, token_ids)
+        else:
+            index.vocabulary = self.vocabulary
+            index._suffix_offsets = self._suffix_offsets
+            index._suffix_tokens = self._suffix_tokens
+        index.size = size
+        return index
+
+    def _lookup_substring(self, fragment: str) -> np.ndarray:
+        """Union des postings de tous les tokens contenant le fragment"""
+        # Un token contient le fragment si l'un de ses suffixes commence par lui:
+        # ces suffixes forment une plage contiguë du tableau trié
+        text = self._text
+        length = len(fragment)
+
+        def prefix(offset):
+            return text[offset:offset + length]
+
+        start = bisect.bisect_left(self._suffix_offsets, fragment, key=prefix)
+        end = bisect.bisect_right(self._suffix_offsets, fragment, lo=start, key=prefix)
+        if start == end:
+            return np.empty(0, dtype=np.int64)
+
+        matches = [self.postings[self._tokens[token_id]]
+                   for token_id in np.unique(self._suffix_tokens[start:end])]
+
+        if len(matches) == 1:
+            return matches[0]
+        return np.unique(np.concatenate(matches))
+
+    def search(self, query: str) -> Optional[np.ndarray]:
+        """
+        Rechercher les lignes contenant tous les tokens de la requête
+
+        Args:
+            query: Requête libre (ex: "data scientist")
+
+        Returns:
+            Tableau trié des positions de lignes, ou None si la requête
+            ne contient aucun token indexable (ex: "++"). Pour une requête
+            d'un seul token le résultat est exact (sous-chaîne); sinon c'est
+            un sur-ensemble à vérifier sur le texte.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return None
+
+        # Intersection en commençant par la liste la plus courte
+        postings = sorted((self._lookup_substring(token) for token in tokens), key=len)
+        result = postings[0]
+
+        for posting in postings[1:]:
+            if result.size == 0:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+
+        return result
+
+
+class JobColumnStore:
+    """
+    Colonnes typées précalculées au chargement des offres
+
+    - Date parsée une seule fois en epoch int64 (nanosecondes) + masque de validité
+    - Codes catégoriels pour les colonnes filtrées par égalité/sous-chaîne
+    - Ordre de tri par date (plus récent d'abord, dates invalides en dernier)
+
+    Les filtres deviennent des compositions de masques booléens numpy,
+    sans copie du DataFrame ni re-parsing des dates à chaque requête.
+    """
+
+    CATEGORICAL_COLUMNS = ('company', 'source', 'job_type', 'contrat', 'location')
+
+    def __init__(self, df: pd.DataFrame, date_column: str = 'date'):
+        self.size = len(df)
+        self.categories: Dict[str, pd.Index] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+
+        for column in self.CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                categorical = pd.Categorical(df[column].astype(str))
+                self.categories[column] = categorical.categories
+                self.codes[column] = categorical.codes.astype(np.int32)
+
+        self.date_column = date_column
+        self.date_valid, self.date_ns = self._parse_date_column(df, date_column)
+        self._sort_by_date()
+
+    @staticmethod
+    def _parse_date_column(df: pd.DataFrame, date_column: str):
+        """Dates en epoch int64 + masque de validité (seules les valeurs distinctes sont parsées)"""
+        if date_column not in df.columns:
+            return np.zeros(len(df), dtype=bool), np.zeros(len(df), dtype=np.int64)
+
+        codes, uniques = pd.factorize(df[date_column].astype(str))
+        parsed = parse_dates(pd.Series(uniques))[codes]
+        return ~np.isnat(parsed), parsed.view(np.int64)
+
+    def _sort_by_date(self):
+        """Tri stable: plus récent d'abord, dates invalides à la fin"""
+        recency = -np.where(self.date_valid, self.date_ns, 0)
+        self.date_order = np.lexsort((recency, ~self.date_valid))
+
+    def extended(self, new_rows: pd.DataFrame) -> 'JobColumnStore':
+        """
+        Nouveau store incluant les lignes ajoutées en fin de DataFrame
+
+        Les nouvelles valeurs catégorielles sont ajoutées en fin de catégories
+        (les codes existants restent valides), seules les nouvelles dates sont parsées.
+        """
+        store = JobColumnStore.__new__(JobColumnStore)
+        store.size = self.size + len(new_rows)
+        store.date_column = self.date_column
+        store.categories = {}
+        store.codes = {}
+
+        for column, categories in self.categories.items():
+            values = new_rows[column].astype(str) if column in new_rows.columns else pd.Series([''] * len(new_rows))
+            categories = categories.append(pd.Index(values.unique()).difference(categories))
+            store.categories[column] = categories
+            store.codes[column] = np.concatenate([
+                self.codes[column], categories.get_indexer(values).astype(np.int32)
+            ])
+
+        date_valid, date_ns = self._parse_date_column(new_rows, self.date_column)
+        store.date_valid = np.concatenate([self.date_valid, date_valid])
+        store.date_ns = np.concatenate([self.date_ns, date_ns])
+        store._sort_by_date()
+        return store
+
+    def replaced(self, positions: np.ndarray, rows: pd.DataFrame) -> 'JobColumnStore':
+        """
+        Nouveau store où les lignes aux positions données sont remplacées par rows
+
+        Même principe que extended: les catégories sont seulement prolongées,
+        seules les dates des lignes remplacées sont re-parsées.
+        """
+        store = JobColumnStore.__new__(JobColumnStore)
+        store.size = self.size
+        store.date_column = self.date_column
+        store.categories = {}
+        store.codes = {}
+
+        for column, categories in self.categories.items():
+            values = rows[column].astype(str) if column in rows.columns else pd.Series([''] * len(rows))
+            categories = categories.append(pd.Index(values.unique()).difference(categories))
+            store.categories[column] = categories
+            codes = self.codes[column].copy()
+            codes[positions] = categories.get_indexer(values).astype(np.int32)
+            store.codes[column] = codes
+
+        date_valid, date_ns = self._parse_date_column(rows, self.date_column)
+        store.date_valid = self.date_valid.copy()
+        store.date_valid[positions] = date_valid
+        store.date_ns = self.date_ns.copy()
+        store.date_ns[positions] = date_ns
+        store._sort_by_date()
+        return store
+
+    def all_rows(self) -> np.ndarray:
+        """Masque sélectionnant toutes les lignes"""
+        return np.ones(self.size, dtype=bool)
+
+    def equals(self, column: str, value: str) -> np.ndarray:
+        """Masque des lignes dont la colonne vaut exactement la valeur"""
+        if column not in self.codes:
+            return np.zeros(self.size, dtype=bool)
+
+        code = self.categories[column].get_indexer([str(value)])[0]
+        if code < 0:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[column] == code
+
+    def contains(self, column: str, text: str) -> np.ndarray:
+        """Masque des lignes dont la colonne contient le texte (test fait sur les catégories)"""
+        if column not in self.codes:
+            return np.zeros(self.size, dtype=bool)
+
+        categories = self.categories[column]
+        matching = np.flatnonzero(categories.str.contains(text, regex=False, na=False))
+        return np.isin(self.codes[column], matching)
+
+    def date_between(self, start: Optional[pd.Timestamp] = None,
+                     end: Optional[pd.Timestamp] = None) -> np.ndarray:
+        """Masque des lignes avec une date valide comprise dans [start, end]"""
+        mask = self.date_valid.copy()
+        if start is not None:
+            mask &= self.date_ns >= pd.Timestamp(start).value
+        if end is not None:
+            mask &= self.date_ns <= pd.Timestamp(end).value
+        return mask
+
+    def facet_counts(self, column: str, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """
+        Nombre de lignes par valeur de la colonne (ordre décroissant, valeurs absentes exclues)
+
+        Args:
+            column: Colonne catégorielle
+            mask: Sélection courante (toutes les lignes si None)
+        """
+        if column not in self.codes:
+            return {}
+
+        codes = self.codes[column] if mask is None else self.codes[column][mask]
+        categories = self.categories[column]
+        counts = np.bincount(codes, minlength=len(categories))
+        order = np.argsort(-counts, kind='stable')
+        return {categories[i]: int(counts[i]) for i in order if counts[i] > 0}
+
+    def sorted_positions(self, mask: np.ndarray) -> np.ndarray:
+        """Positions des lignes sélectionnées, triées par date décroissante"""
+        return self.date_order[mask[self.date_order]]
+
+
+class JobSnapshot:
+    """
+    État en mémoire des offres à un instant donné (DataFrame + index + colonnes)
+
+    Jamais modifié après construction: un rafraîchissement crée un nouveau
+    snapshot et le remplace en une seule affectation, les lecteurs en cours
+    gardent une vue cohérente sans verrou.
+    """
+
+    def __init__(self, df: pd.DataFrame, keyword_index: Optional[InvertedIndex] = None,
+                 columns: Optional[JobColumnStore] = None, version: int = 0, last_id: int = 0,
+                 last_updated: str = ''):
+        self.df = df
+        self.keyword_index = keyword_index
+        self.columns = columns
+        self.version = version
+        self.last_id = last_id
+        # Plus grand updated_at vu (format SQLite 'YYYY-MM-DD HH:MM:SS', comparable en texte)
+        self.last_updated = last_updated
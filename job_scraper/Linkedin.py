@@ -5,13 +5,24 @@ import time
 import random
 from urllib.parse import urlencode
 
-def get_job_description(job_url, headers):
+try:
+    from job_scraper.fetch_scheduler import FetchScheduler, canonical_url
+except ImportError:
+    from fetch_scheduler import FetchScheduler, canonical_url
+
+def get_job_description(job_url, headers, scheduler=None):
     """
     Récupère la description complète d'une offre d'emploi
+
+    Avec un scheduler, la requête passe par sa session partagée et son
+    limiteur de débit (pas de pause fixe)
     """
     try:
-        time.sleep(random.uniform(2, 4))  # Pause entre chaque requête
-        response = requests.get(job_url, headers=headers)
+        if scheduler is not None:
+            response = scheduler.get(job_url)
+        else:
+            time.sleep(random.uniform(2, 4))  # Pause entre chaque requête
+            response = requests.get(job_url, headers=headers, timeout=20)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -49,7 +60,8 @@ def get_job_description(job_url, headers):
     except Exception as e:
         return f"Erreur: {str(e)}"
 
-def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=5, get_descriptions=True):
+def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=5, get_descriptions=True,
+                              max_workers=4, requests_per_second=0.5, known_urls=None):
     """
     Scrape LinkedIn jobs gratuitement avec déduplication et descriptions
     
@@ -58,6 +70,10 @@ def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=
         location: Localisation
         pages: Nombre de pages à scraper
         get_descriptions: Si True, récupère la description de chaque offre (plus lent)
+        max_workers: Descriptions récupérées simultanément
+        requests_per_second: Débit maximum vers LinkedIn (toutes requêtes confondues)
+        known_urls: URLs canoniques déjà en base (mode incrémental): ces offres sont
+            ignorées et la pagination s'arrête à la première page sans nouvelle offre
     """
     
     all_jobs = []
@@ -74,8 +90,19 @@ def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=
     print(f"Recherche: '{keywords}' à {location}")
     print(f"{pages} pages à scraper...")
     if get_descriptions:
-        print("⚠️  Mode avec descriptions activé (plus lent)")
-    
+        print(f"⚠️  Mode avec descriptions activé ({max_workers} en parallèle, {requests_per_second} req/s max)")
+
+    scheduler = FetchScheduler(headers=headers, max_in_flight=max_workers, rate=requests_per_second)
+    try:
+        return _scrape_pages(scheduler, headers, keywords, location, pages, get_descriptions,
+                             all_jobs, seen_urls, known_urls)
+    finally:
+        scheduler.close()
+
+
+def _scrape_pages(scheduler, headers, keywords, location, pages, get_descriptions, all_jobs, seen_urls,
+                  known_urls=None):
+    """Parcourt les pages de résultats; les descriptions d'une page sont récupérées en parallèle"""
     for page in range(pages):
         try:
             params = {
@@ -84,15 +111,13 @@ def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=
                 'start': page * 25,
                 'refresh': 'true'
             }
+            if known_urls is not None:
+                params['sortBy'] = 'DD'  # plus récentes d'abord: les offres connues sont en fin de liste
             
             url = f"https://www.linkedin.com/jobs/search?{urlencode(params)}"
             print(f"\nPage {page + 1}/{pages}...")
             
-            delay = random.uniform(3, 7)
-            print(f"   Pause de {delay:.1f}s...")
-            time.sleep(delay)
-            
-            response = requests.get(url, headers=headers)
+            response = scheduler.get(url)
             print(f"   Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -110,10 +135,11 @@ def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=
                     break
                 
                 print(f"   {len(job_cards)} jobs trouvés")
-                page_jobs = 0
+                page_new_jobs = []
                 page_duplicates = 0
+                page_known = 0
                 
-                for idx, card in enumerate(job_cards, 1):
+                for card in job_cards:
                     try:
                         title_elem = card.find('h3', class_='base-search-card__title')
                         if not title_elem:
@@ -143,6 +169,10 @@ def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=
                                 continue
                             
                             seen_urls.add(job_id)
+
+                            if known_urls is not None and canonical_url(job_url) in known_urls:
+                                page_known += 1
+                                continue
                             
                             job = {
                                 'title': title,
@@ -156,22 +186,31 @@ def scrape_linkedin_jobs_free(keywords="développeur", location="France", pages=
                                 'contrat': 'N/A'
                             }
                             
-                            # Récupérer la description si demandé
-                            if get_descriptions and job_url != 'N/A':
-                                print(f"      → Récupération description {idx}/{len(job_cards)}...", end=' ')
-                                description = get_job_description(job_url, headers)
-                                job['description'] = description
-                                print("✓")
-                            else:
-                                job['description'] = "Non récupérée"
-                            
-                            all_jobs.append(job)
-                            page_jobs += 1
+                            job['description'] = "Non récupérée"
+                            page_new_jobs.append(job)
                         
                     except Exception as e:
                         continue
-                
-                print(f"   {page_jobs} nouveaux jobs ajoutés, {page_duplicates} doublons ignorés - Total: {len(all_jobs)}")
+
+                # Récupérer les descriptions si demandé (requêtes concurrentes, débit borné)
+                to_fetch = [job for job in page_new_jobs if job['job_url'] != 'N/A']
+                if get_descriptions and to_fetch:
+                    print(f"      → Récupération de {len(to_fetch)} descriptions...")
+                    descriptions = scheduler.map(
+                        lambda job: get_job_description(job['job_url'], headers, scheduler),
+                        to_fetch
+                    )
+                    for job, description in zip(to_fetch, descriptions):
+                        job['description'] = description if isinstance(description, str) else f"Erreur: {description}"
+                    print("      ✓ Descriptions récupérées")
+
+                all_jobs.extend(page_new_jobs)
+                print(f"   {len(page_new_jobs)} nouveaux jobs ajoutés, {page_duplicates} doublons ignorés - Total: {len(all_jobs)}")
+
+                # Mode incrémental: page entièrement connue -> offres suivantes déjà en base
+                if known_urls is not None and page_known and not page_new_jobs:
+                    print(f"   {page_known} offres déjà en base, arrêt de la pagination")
+                    break
                         
             elif response.status_code == 429:
                 print(f"   Rate limit détecté, pause de 60s...")
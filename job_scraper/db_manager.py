@@ -1,23 +1,93 @@
 import sqlite3
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional
 import hashlib
+import html
 import json
+import re
+
+
+# Marqueurs de surlignage FTS5 (caractères de contrôle absents des textes d'offres)
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+
+def _escape_highlight(text: Optional[str]) -> Optional[str]:
+    """Échapper le texte d'une offre puis remplacer les marqueurs FTS5 par <mark>"""
+    if text is None:
+        return None
+    escaped = html.escape(text)
+    return escaped.replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
 
 
 class JobDatabase:
     """Gestionnaire de base de données SQLite pour les offres d'emploi"""
     
-    def __init__(self, db_path: str = "jobs.db"):
+    def __init__(self, db_path: str = "jobs.db", read_only: bool = False,
+                 busy_timeout: float = 10.0, cached_statements: int = 256):
+        """
+        Args:
+            db_path: Chemin vers la base SQLite
+            read_only: Connexions en lecture seule (chemin web, ne bloque pas le scraping)
+            busy_timeout: Attente max (secondes) quand la base est verrouillée
+            cached_statements: Taille du cache de requêtes préparées par connexion
+        """
         self.db_path = db_path
-        self.create_tables()
+        self.read_only = read_only
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.fts_enabled = False
+        
+        # Pool: une connexion par thread, réutilisée entre les appels
+        # (fermée automatiquement quand le thread se termine)
+        self._local = threading.local()
+        
+        if read_only:
+            self.fts_enabled = self._has_fts_index()
+        else:
+            self.create_tables()
     
-    def get_connection(self):
-        """Crée une connexion à la base de données"""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self):
+        """Ouvre une nouvelle connexion configurée (WAL, synchronous=NORMAL, busy timeout)"""
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   timeout=self.busy_timeout,
+                                   cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                                   cached_statements=self.cached_statements)
+            # WAL: les lecteurs ne bloquent pas l'écrivain (et inversement)
+            conn.execute("PRAGMA journal_mode=WAL")
+        
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
         conn.row_factory = sqlite3.Row
         return conn
     
+    def get_connection(self):
+        """Retourne la connexion du thread courant (créée au premier appel)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """Ferme la connexion du thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    def _has_fts_index(self) -> bool:
+        """Vérifie la présence de la table FTS5 (mode lecture seule)"""
+        try:
+            cursor = self.get_connection().cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")
+            return cursor.fetchone() is not None
+        except sqlite3.Error:
+            return False
+    
     def create_tables(self):
         """Crée les tables si elles n'existent pas"""
         conn = self.get_connection()
@@ -57,6 +127,17 @@ class JobDatabase:
             )
         ''')
         
+        # Watermarks du scraping incrémental (date la plus récente vue par source et requête)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scraping_watermarks (
+                source TEXT NOT NULL,
+                scope TEXT NOT NULL DEFAULT '',
+                last_date TEXT,
+                last_run TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (source, scope)
+            )
+        ''')
+        
         # Index pour recherche rapide
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_source ON jobs(source)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_date_posted ON jobs(date_posted)')
@@ -65,11 +146,67 @@ class JobDatabase:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_hash ON jobs(job_hash)')
         
         conn.commit()
-        conn.close()
+        
+        # Index plein texte FTS5 synchronisé par triggers
+        self.fts_enabled = self._create_fts_index(conn)
+        
+    
+    def _create_fts_index(self, conn) -> bool:
+        """
+        Crée la table virtuelle FTS5 (contenu externe = jobs) et ses triggers
+        Returns: True si FTS5 est disponible
+        """
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")
+            exists = cursor.fetchone() is not None
+            
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                    title, description, company,
+                    content='jobs', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  FTS5 non disponible, recherche LIKE utilisée: {e}")
+            return False
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts(rowid, title, description, company)
+                VALUES (new.id, new.title, new.description, new.company);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, title, description, company)
+                VALUES ('delete', old.id, old.title, old.description, old.company);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, description, company ON jobs
+            WHEN old.title IS NOT new.title OR old.description IS NOT new.description
+                 OR old.company IS NOT new.company
+            BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, title, description, company)
+                VALUES ('delete', old.id, old.title, old.description, old.company);
+                INSERT INTO jobs_fts(rowid, title, description, company)
+                VALUES (new.id, new.title, new.description, new.company);
+            END
+        ''')
+        
+        # Première création: indexer les offres déjà présentes
+        if not exists:
+            cursor.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+        
+        conn.commit()
+        return True
     
     def generate_job_hash(self, job: Dict) -> str:
         """Génère un hash unique pour une offre basé sur titre + entreprise + lieu"""
-        key_data = f"{job.get('title', '').lower()}|{job.get('company', '').lower()}|{job.get('location', '').lower()}"
+        key_data = f"{(job.get('title') or '').lower()}|{(job.get('company') or '').lower()}|{(job.get('location') or '').lower()}"
         return hashlib.md5(key_data.encode()).hexdigest()
     
     def insert_job(self, job: Dict) -> bool:
@@ -102,35 +239,100 @@ class JobDatabase:
                 job.get('contrat')
             ))
             conn.commit()
-            conn.close()
             return True
             
         except sqlite3.IntegrityError:
             # Doublon détecté (même job_hash existe déjà)
-            conn.close()
+            conn.rollback()
             return False
         except Exception as e:
             print(f"Erreur insertion job: {e}")
-            conn.close()
+            conn.rollback()
             return False
     
+    # Upsert: une offre déjà connue (repost) est rafraîchie au lieu d'être ignorée
+    UPSERT_JOB_SQL = '''
+        INSERT INTO jobs (
+            job_hash, title, company, location, description,
+            job_url, date_posted, job_type, salary, source, contrat
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(job_hash) DO UPDATE SET
+            description = COALESCE(NULLIF(excluded.description, ''), jobs.description),
+            job_url = COALESCE(NULLIF(excluded.job_url, ''), jobs.job_url),
+            date_posted = COALESCE(NULLIF(excluded.date_posted, ''), jobs.date_posted),
+            job_type = COALESCE(NULLIF(excluded.job_type, ''), jobs.job_type),
+            salary = COALESCE(NULLIF(excluded.salary, ''), jobs.salary),
+            contrat = COALESCE(NULLIF(excluded.contrat, ''), jobs.contrat),
+            is_active = 1,
+            updated_at = CURRENT_TIMESTAMP
+    '''
+    
     def bulk_insert_jobs(self, jobs: List[Dict], source: str) -> Dict[str, int]:
         """
-        Insère plusieurs offres d'un coup
-        Returns: {'inserted': nb_inserted, 'duplicates': nb_duplicates}
-        """
-        inserted = 0
-        duplicates = 0
+        Insère plusieurs offres en une seule transaction (executemany + upsert)
+        Returns: {'inserted': nb_nouvelles, 'updated': nb_reposts, 'duplicates': nb_non_insérées}
         
+        'duplicates' garde son sens historique: offres du lot non insérées, qu'elles
+        soient déjà en base (republications, comptées aussi dans 'updated') ou en double
+        dans le lot. inserted + duplicates == len(jobs).
+        """
+        # Hasher le lot et éliminer les doublons internes (dernière version gardée)
+        batch = {}
         for job in jobs:
             job['source'] = source
-            if self.insert_job(job):
-                inserted += 1
-            else:
-                duplicates += 1
+            batch[self.generate_job_hash(job)] = job
+        
+        if not batch:
+            return {'inserted': 0, 'updated': 0, 'duplicates': len(jobs)}
         
-        print(f"  ✅ {source}: {inserted} nouvelles offres, {duplicates} doublons ignorés")
-        return {'inserted': inserted, 'duplicates': duplicates}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        hashes = list(batch)
+        
+        try:
+            # Verrou d'écriture pris avant la lecture: SELECT et UPSERT dans la même
+            # transaction, un autre écrivain ne peut pas insérer entre les deux
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            # Offres déjà présentes (par paquets: limite de variables SQLite)
+            existing = set()
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                cursor.execute(
+                    f"SELECT job_hash FROM jobs WHERE job_hash IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                existing.update(row[0] for row in cursor.fetchall())
+            
+            cursor.executemany(self.UPSERT_JOB_SQL, [
+                (
+                    job_hash,
+                    job.get('title'),
+                    job.get('company'),
+                    job.get('location'),
+                    job.get('description'),
+                    job.get('job_url'),
+                    job.get('date'),
+                    job.get('job_type'),
+                    job.get('salary'),
+                    job.get('source'),
+                    job.get('contrat')
+                )
+                for job_hash, job in batch.items()
+            ])
+            conn.commit()
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"Erreur insertion bulk {source}: {e}")
+            return {'inserted': 0, 'updated': 0, 'duplicates': len(jobs)}
+        
+        updated = len(existing)
+        inserted = len(batch) - updated
+        duplicates = len(jobs) - inserted
+        
+        print(f"  ✅ {source}: {inserted} nouvelles offres, {duplicates} doublons ignorés (dont {updated} mises à jour)")
+        return {'inserted': inserted, 'updated': updated, 'duplicates': duplicates}
     
     def log_scraping(self, scraper_name: str, status: str, 
                      jobs_found: int = 0, errors: str = None, 
@@ -146,7 +348,41 @@ class JobDatabase:
         ''', (scraper_name, status, jobs_found, errors, execution_time))
         
         conn.commit()
-        conn.close()
+    
+    def get_known_urls(self, source: str) -> List[str]:
+        """URLs des offres déjà en base pour une source"""
+        cursor = self.get_connection().cursor()
+        cursor.execute('''
+            SELECT job_url FROM jobs
+            WHERE source = ? AND job_url IS NOT NULL AND job_url NOT IN ('', 'N/A', 'Non disponible')
+        ''', (source,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def get_watermark(self, source: str, scope: str = '') -> Optional[Dict]:
+        """Watermark d'une source (last_date, last_run), None si jamais scrapée"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            "SELECT last_date, last_run FROM scraping_watermarks WHERE source = ? AND scope = ?",
+            (source, scope)
+        )
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    
+    def update_watermark(self, source: str, scope: str = '', last_date: Optional[str] = None):
+        """Avance le watermark d'une source (la date ne recule jamais)"""
+        conn = self.get_connection()
+        conn.execute('''
+            INSERT INTO scraping_watermarks (source, scope, last_date, last_run)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source, scope) DO UPDATE SET
+                last_date = CASE
+                    WHEN excluded.last_date IS NULL THEN scraping_watermarks.last_date
+                    WHEN scraping_watermarks.last_date IS NULL THEN excluded.last_date
+                    ELSE MAX(excluded.last_date, scraping_watermarks.last_date)
+                END,
+                last_run = CURRENT_TIMESTAMP
+        ''', (source, scope, last_date))
+        conn.commit()
     
     def get_recent_jobs(self, limit: int = 100, source: Optional[str] = None) -> List[Dict]:
         """Récupère les offres récentes"""
@@ -169,7 +405,6 @@ class JobDatabase:
             ''', (limit,))
         
         jobs = [dict(row) for row in cursor.fetchall()]
-        conn.close()
         return jobs
     
     def search_jobs(self, keyword: Optional[str] = None, 
@@ -200,9 +435,108 @@ class JobDatabase:
         
         cursor.execute(query, params)
         jobs = [dict(row) for row in cursor.fetchall()]
-        conn.close()
         return jobs
     
+    def get_jobs_since(self, last_id: int, updated_since: Optional[str] = None) -> List[Dict]:
+        """
+        Récupère les offres insérées ou modifiées depuis le dernier chargement (rafraîchissement incrémental)
+        
+        Args:
+            last_id: Plus grand id déjà chargé - les offres actives au-delà sont nouvelles
+            updated_since: Plus grand updated_at déjà vu - les offres modifiées depuis
+                (republiées via l'UPSERT, désactivées) sont renvoyées, actives ou non.
+                Comparaison >= car updated_at est à la seconde: une ligne modifiée dans
+                la même seconde que le dernier chargement n'est pas perdue.
+        
+        Returns:
+            Lignes triées par id, avec is_active pour détecter les désactivations
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        if updated_since is None:
+            cursor.execute('''
+                SELECT * FROM jobs 
+                WHERE id > ? AND is_active = 1
+                ORDER BY id
+            ''', (last_id,))
+        else:
+            cursor.execute('''
+                SELECT * FROM jobs 
+                WHERE (id > ? AND is_active = 1) OR updated_at >= ?
+                ORDER BY id
+            ''', (last_id, updated_since))
+        
+        jobs = [dict(row) for row in cursor.fetchall()]
+        return jobs
+    
+    @staticmethod
+    def _build_fts_query(keyword: str) -> str:
+        """Transforme une saisie libre en requête FTS5 (tous les mots, recherche par préfixe)"""
+        tokens = re.findall(r'\w+', keyword.lower())
+        return ' AND '.join(f'"{token}"*' for token in tokens)
+    
+    def search_jobs_fts(self, keyword: str,
+                        location: Optional[str] = None,
+                        source: Optional[str] = None,
+                        page: int = 1,
+                        per_page: int = 20) -> Dict:
+        """
+        Recherche plein texte classée par BM25 avec pagination et extraits surlignés
+        Returns: {'jobs': [...], 'total': n, 'page': page, 'per_page': per_page}
+        """
+        fts_query = self._build_fts_query(keyword or '')
+        page = max(page, 1)
+        offset = (page - 1) * per_page
+        
+        # Sans FTS5 ou sans mot exploitable: recherche LIKE classique
+        if not self.fts_enabled or not fts_query:
+            jobs = self.search_jobs(keyword=keyword, location=location, source=source, limit=50000)
+            return {'jobs': jobs[offset:offset + per_page], 'total': len(jobs),
+                    'page': page, 'per_page': per_page}
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        where = "jobs_fts MATCH ? AND j.is_active = 1"
+        params = [fts_query]
+        
+        if location:
+            where += " AND j.location LIKE ?"
+            params.append(f"%{location}%")
+        
+        if source:
+            where += " AND j.source = ?"
+            params.append(source)
+        
+        cursor.execute(f'''
+            SELECT COUNT(*) FROM jobs_fts JOIN jobs j ON j.id = jobs_fts.rowid
+            WHERE {where}
+        ''', params)
+        total = cursor.fetchone()[0]
+        
+        # Poids BM25: titre > entreprise > description
+        cursor.execute(f'''
+            SELECT j.*,
+                   bm25(jobs_fts, 10.0, 1.0, 5.0) AS score,
+                   highlight(jobs_fts, 0, ?, ?) AS title_highlight,
+                   snippet(jobs_fts, 1, ?, ?, '...', 24) AS snippet
+            FROM jobs_fts JOIN jobs j ON j.id = jobs_fts.rowid
+            WHERE {where}
+            ORDER BY score
+            LIMIT ? OFFSET ?
+        ''', [_MARK_OPEN, _MARK_CLOSE] * 2 + params + [per_page, offset])
+        
+        # title_highlight et snippet sont du HTML sûr: texte échappé, seules les balises <mark> sont brutes
+        jobs = []
+        for row in cursor.fetchall():
+            job = dict(row)
+            job['title_highlight'] = _escape_highlight(job['title_highlight'])
+            job['snippet'] = _escape_highlight(job['snippet'])
+            jobs.append(job)
+        
+        return {'jobs': jobs, 'total': total, 'page': page, 'per_page': per_page}
+    
     def get_job_by_id(self, job_id: int) -> Optional[Dict]:
         """Récupère une offre par son ID"""
         conn = self.get_connection()
@@ -210,7 +544,6 @@ class JobDatabase:
         
         cursor.execute("SELECT * FROM jobs WHERE id = ? AND is_active = 1", (job_id,))
         job = cursor.fetchone()
-        conn.close()
         
         return dict(job) if job else None
     
@@ -253,7 +586,6 @@ class JobDatabase:
         ''')
         last_update = cursor.fetchone()[0]
         
-        conn.close()
         
         return {
             'total_jobs': total,
@@ -267,9 +599,9 @@ class JobDatabase:
         """Désactive une offre (soft delete)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("UPDATE jobs SET is_active = 0 WHERE id = ?", (job_id,))
+        # updated_at: la désactivation doit être vue par le rafraîchissement incrémental
+        cursor.execute("UPDATE jobs SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (job_id,))
         conn.commit()
-        conn.close()
     
     def cleanup_old_jobs(self, days: int = 90):
         """Désactive les offres de plus de X jours"""
@@ -277,12 +609,11 @@ class JobDatabase:
         cursor = conn.cursor()
         cursor.execute('''
             UPDATE jobs 
-            SET is_active = 0 
-            WHERE DATE(created_at) < DATE('now', ?)
+            SET is_active = 0, updated_at = CURRENT_TIMESTAMP 
+            WHERE DATE(created_at) < DATE('now', ?) AND is_active = 1
         ''', (f'-{days} days',))
         affected = cursor.rowcount
         conn.commit()
-        conn.close()
         return affected
     
     def export_to_csv(self, output_path: str, limit: Optional[int] = None):
@@ -307,7 +638,6 @@ class JobDatabase:
                 writer.writeheader()
                 writer.writerows([dict(job) for job in jobs])
         
-        conn.close()
         print(f"📊 Export CSV: {len(jobs)} offres dans {output_path}")
         return len(jobs)
     
@@ -323,7 +653,6 @@ class JobDatabase:
         ''', (limit,))
         
         logs = [dict(row) for row in cursor.fetchall()]
-        conn.close()
         return logs
 
 
@@ -355,4 +684,8 @@ if __name__ == "__main__":
     
     # Recherche
     results = db.search_jobs(keyword="python", limit=5)
-    print(f"\nRecherche 'python': {len(results)} résultats")
\ No newline at end of file
+    print(f"\nRecherche 'python': {len(results)} résultats")
+    
+    # Recherche plein texte (FTS5 + BM25)
+    fts_results = db.search_jobs_fts("python", per_page=5)
+    print(f"Recherche FTS 'python': {fts_results['total']} résultats")
\ No newline at end of file
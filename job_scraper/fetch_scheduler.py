@@ -0,0 +1,209 @@
+"""
+Fetch Scheduler - Requêtes HTTP concurrentes et polies pour les scrapers
+
+- Une session requests partagée (pool de connexions keep-alive)
+- Un seau à jetons (token bucket) par domaine: le débit reste borné quel
+  que soit le nombre de requêtes en vol
+- Un nombre borné de requêtes simultanées à la place des pauses fixes
+- Sur 429 / 503, tout le domaine est mis en pause (Retry-After si fourni)
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuts qui signalent une limitation de débit côté serveur
+THROTTLE_STATUSES = {429, 503}
+
+# Paramètres de suivi ignorés pour reconnaître une offre déjà vue
+TRACKING_PARAMS = {'refId', 'trackingId', 'trk', 'position', 'pageNum', 'fbclid', 'gclid'}
+
+
+def host_key(url: str) -> str:
+    """Domaine enregistré d'une URL (fr.linkedin.com et www.linkedin.com -> linkedin.com)"""
+    host = (urlparse(url).hostname or '').lower()
+    parts = host.split('.')
+    return '.'.join(parts[-2:]) if len(parts) > 2 else host
+
+
+def canonical_url(url: str) -> str:
+    """
+    Forme canonique d'une URL d'offre pour reconnaître une offre déjà vue
+
+    Les paramètres de suivi (utm_*, refId, trackingId...) changent à chaque
+    affichage; sur LinkedIn l'identifiant est dans le chemin, la requête est
+    entièrement ignorée.
+    """
+    if not url:
+        return ''
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if host_key(url) == 'linkedin.com':
+        host, query = 'linkedin.com', ''
+    else:
+        query = urlencode([(key, value) for key, value in parse_qsl(parsed.query)
+                           if not key.lower().startswith('utm_') and key not in TRACKING_PARAMS])
+    return urlunparse(('https', host, parsed.path.rstrip('/'), '', query, ''))
+
+
+class HostRateLimiter:
+    """Seau à jetons par domaine, partagé par tous les threads"""
+
+    def __init__(self, rate: float = 1.0, burst: int = 2):
+        """
+        Args:
+            rate: Requêtes par seconde autorisées par domaine
+            burst: Nombre de requêtes pouvant partir d'un coup
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, List[float]] = {}  # host -> [jetons, dernière mise à jour, pause jusqu'à]
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        """Attendre qu'un jeton soit disponible pour ce domaine"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._buckets.setdefault(host, [float(self.burst), now, 0.0])
+                if now < bucket[2]:
+                    wait = bucket[2] - now
+                else:
+                    bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                    bucket[1] = now
+                    if bucket[0] >= 1:
+                        bucket[0] -= 1
+                        return
+                    wait = (1 - bucket[0]) / self.rate
+            # Un peu de jitter pour ne pas réveiller tous les threads en même temps
+            time.sleep(wait + random.uniform(0, 0.1))
+
+    def pause(self, host: str, seconds: float):
+        """Suspendre toutes les requêtes vers ce domaine"""
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.setdefault(host, [0.0, now, 0.0])
+            bucket[2] = max(bucket[2], now + seconds)
+            # À la reprise, le seau repart vide: pas de rafale juste après la limitation
+            bucket[0] = 0.0
+            bucket[1] = bucket[2]
+
+
+class FetchScheduler:
+    """
+    Planificateur de requêtes GET
+
+    Exemple:
+        with FetchScheduler(headers=headers, max_in_flight=4, rate=1.0) as scheduler:
+            responses = scheduler.map(scheduler.get, urls)
+    """
+
+    def __init__(self, headers: Optional[Dict] = None, max_in_flight: int = 4,
+                 rate: float = 1.0, burst: int = 2, max_retries: int = 3,
+                 timeout: float = 20, backoff_max: float = 60.0):
+        """
+        Args:
+            headers: En-têtes envoyés avec chaque requête
+            max_in_flight: Requêtes simultanées maximum
+            rate: Requêtes par seconde par domaine
+            burst: Requêtes pouvant partir d'un coup par domaine
+            max_retries: Nouvelles tentatives sur 429/503 et erreurs réseau
+            timeout: Timeout HTTP de chaque tentative (secondes)
+            backoff_max: Pause maximum d'un domaine limité (secondes)
+        """
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_max = backoff_max
+        self.limiter = HostRateLimiter(rate=rate, burst=burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def _throttle_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Pause après une limitation: Retry-After si fourni, sinon backoff exponentiel avec jitter"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    try:
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                        return min(max(delay, 0.0), self.backoff_max)
+                    except (TypeError, ValueError):
+                        pass
+        return min(self.backoff_max, 5 * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET limité en débit, avec nouvelles tentatives sur 429/503 et erreurs réseau
+
+        Returns:
+            La réponse HTTP (la dernière en cas de limitations répétées)
+
+        Raises:
+            requests.RequestException: si la dernière tentative échoue au niveau réseau
+        """
+        host = host_key(url)
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(host)
+            response = None
+            try:
+                response = self.session.get(url, **kwargs)
+                if response.status_code not in THROTTLE_STATUSES or attempt == self.max_retries:
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+
+            delay = self._throttle_delay(attempt, response)
+            status = response.status_code if response is not None else 'erreur réseau'
+            print(f"   [WARNING] {host}: {status}, pause de {delay:.0f}s ({attempt + 1}/{self.max_retries})")
+            self.limiter.pause(host, delay)
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """
+        Appliquer fn à chaque élément avec au plus max_in_flight appels simultanés
+
+        Returns:
+            Les résultats dans l'ordre des éléments (l'exception levée par fn
+            est renvoyée à la place du résultat)
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def call(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(items))) as pool:
+            return list(pool.map(call, items))
+
+    def close(self):
+        """Fermer les connexions du pool"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
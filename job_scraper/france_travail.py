@@ -1,9 +1,19 @@
 import requests
 import json
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 import hashlib
 
+try:
+    from job_scraper.fetch_scheduler import FetchScheduler
+except ImportError:
+    from fetch_scheduler import FetchScheduler
+
+SEARCH_URL = "https://api.francetravail.io/partenaire/offresdemploi/v2/offres/search"
+STEP = 150          # taille d'une fenêtre "range"
+MAX_OFFSET = 3000   # l'API refuse les fenêtres au-delà de 3000-3149
+
 
 # === Fonction pour obtenir un nouveau token ===
 def get_token(client_id, client_secret):
@@ -68,8 +78,182 @@ def get_job_url(offre):
     return "Non disponible"
 
 
+# === Token OAuth partagé entre les threads ===
+class TokenProvider:
+    """
+    Token OAuth partagé par toutes les requêtes
+
+    Sur 401, un seul thread récupère un nouveau token (single-flight): les
+    autres attendent le verrou puis réutilisent ce token au lieu d'en
+    redemander un chacun.
+    """
+
+    def __init__(self, client_id, client_secret):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token = None
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Token courant et sa génération (récupéré au premier appel)"""
+        with self._lock:
+            if self.token is None and self.generation == 0:
+                self._fetch()
+            return self.token, self.generation
+
+    def refresh(self, stale_generation):
+        """Renouveler le token s'il n'a pas déjà été renouvelé depuis stale_generation"""
+        with self._lock:
+            if self.generation == stale_generation:
+                print("REFRESH: Token expiré. Récupération d'un nouveau...")
+                self._fetch()
+            return self.token, self.generation
+
+    def _fetch(self):
+        self.token = get_token(self.client_id, self.client_secret)
+        self.generation += 1
+
+
+# === Fonction pour parser le total d'offres ===
+def parse_total(content_range):
+    """Total d'offres depuis l'en-tête Content-Range ("offres 0-149/1234"), None si absent"""
+    if not content_range or '/' not in content_range:
+        return None
+    try:
+        return int(content_range.rsplit('/', 1)[1])
+    except ValueError:
+        return None
+
+
+# === Fonction pour récupérer une page de résultats ===
+def fetch_page(scheduler, auth, date_cible, offset, step=STEP):
+    """
+    Récupère une fenêtre de résultats pour un jour donné
+
+    Returns:
+        Tuple (statut HTTP, offres, total annoncé par Content-Range ou None)
+    """
+    params = {
+        "range": f"{offset}-{offset + step - 1}",
+        "dateCreation": date_cible
+    }
+
+    token, generation = auth.get()
+    if not token:
+        return None, [], None
+
+    r = scheduler.get(SEARCH_URL, headers={"Authorization": f"Bearer {token}"}, params=params, timeout=30)
+
+    # Token expiré
+    if r.status_code == 401:
+        token, _ = auth.refresh(generation)
+        if not token:
+            return 401, [], None
+        r = scheduler.get(SEARCH_URL, headers={"Authorization": f"Bearer {token}"}, params=params, timeout=30)
+
+    if r.status_code not in [200, 206]:
+        return r.status_code, [], None
+
+    return r.status_code, r.json().get("resultats", []), parse_total(r.headers.get("Content-Range"))
+
+
+# === Parcours parallèle jours x fenêtres ===
+def crawl_pages(scheduler, auth, dates, step=STEP, max_workers=4, prefetch=2):
+    """
+    Récupère les fenêtres (jour, offset) en parallèle
+
+    - Chaque jour commence avec au plus `prefetch` fenêtres spéculatives
+    - Dès que le total du jour est connu (Content-Range), toutes ses fenêtres
+      utiles sont planifiées
+    - Une page courte (ou une erreur) arrête la pagination du jour: les
+      fenêtres suivantes en attente sont annulées
+
+    Returns:
+        Tuple (pages {(index jour, offset): offres}, offset de fin par jour,
+        jour incomplet suite à une erreur par jour)
+    """
+    state = [{'next': 0, 'limit': MAX_OFFSET, 'stop': None, 'inflight': 0, 'known': False, 'failed': False}
+             for _ in dates]
+    pages = {}
+    pending = {}
+    max_pending = max_workers * 2
+
+    def submit_ready(pool):
+        # Tour de rôle entre les jours pour garder le pool occupé sans dépasser max_pending
+        progressed = True
+        while progressed and len(pending) < max_pending:
+            progressed = False
+            for d, st in enumerate(state):
+                if len(pending) >= max_pending:
+                    break
+                if st['stop'] is not None or st['next'] > st['limit']:
+                    continue
+                if not st['known'] and st['inflight'] >= prefetch:
+                    continue
+                future = pool.submit(fetch_page, scheduler, auth, dates[d], st['next'], step)
+                pending[future] = (d, st['next'])
+                st['next'] += step
+                st['inflight'] += 1
+                progressed = True
+
+    def stop_day(d, offset):
+        st = state[d]
+        if st['stop'] is None or offset < st['stop']:
+            st['stop'] = offset
+        for future, (day, other) in list(pending.items()):
+            if day == d and other > offset and future.cancel():
+                del pending[future]
+                st['inflight'] -= 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            submit_ready(pool)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future not in pending:
+                        continue
+                    d, offset = pending.pop(future)
+                    st = state[d]
+                    st['inflight'] -= 1
+
+                    try:
+                        status, offres, total = future.result()
+                    except Exception as e:
+                        print(f"ERREUR: Erreur à {dates[d]}, offset {offset} : {e}")
+                        st['failed'] = True
+                        stop_day(d, offset)
+                        continue
+
+                    if st['stop'] is not None and offset > st['stop']:
+                        continue  # au-delà de la fin du jour
+
+                    pages[(d, offset)] = offres
+                    if total is not None and not st['known']:
+                        st['known'] = True
+                        st['limit'] = min(MAX_OFFSET, ((total - 1) // step) * step) if total > 0 else -1
+
+                    if status not in [200, 206, 204]:
+                        print(f"ERREUR: Erreur {status} à {dates[d]}, offset {offset}")
+                        st['failed'] = True
+                    else:
+                        print(f"+ {len(offres)} offres récupérées ({dates[d]}, offset {offset})")
+
+                    if status not in [200, 206] or len(offres) < step:
+                        stop_day(d, offset)
+
+                submit_ready(pool)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    return pages, [st['stop'] for st in state], [st['failed'] for st in state]
+
+
 # === Fonction principale de scraping ===
-def scrape_france_travail(client_id, client_secret, days=7):
+def scrape_france_travail(client_id, client_secret, days=7, max_workers=4, requests_per_second=4.0,
+                          failed_days=None):
     """
     Scrape les offres France Travail
     
@@ -77,112 +261,90 @@ def scrape_france_travail(client_id, client_secret, days=7):
         client_id: Identifiant client API
         client_secret: Secret client API
         days: Nombre de jours à scraper (défaut: 7)
+        max_workers: Requêtes simultanées vers l'API
+        requests_per_second: Débit maximum vers l'API
+        failed_days: Liste complétée avec les jours (YYYY-MM-DD) incomplets
+            suite à une erreur, à reprendre au prochain run
     
     Returns:
         Liste des offres d'emploi
     """
     
+    # Paramètres de scraping
+    jour_ref = datetime.today()
+    dates = [(jour_ref - timedelta(days=jour_offset)).strftime("%Y-%m-%d") for jour_offset in range(days)]
+    
     # Authentification
-    access_token = get_token(client_id, client_secret)
+    auth = TokenProvider(client_id, client_secret)
+    access_token, _ = auth.get()
     if not access_token:
         print("ERREUR: Impossible d'obtenir le token")
+        if failed_days is not None:
+            failed_days.extend(dates)
         return []
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json"
-    }
-    
-    # Paramètres de scraping
-    search_url = "https://api.francetravail.io/partenaire/offresdemploi/v2/offres/search"
-    step = 150
-    jour_ref = datetime.today()
-    
     all_jobs = []
     seen_ids = set()
     total_duplicates = 0
+    # Jours considérés incomplets tant que le parcours n'est pas allé au bout
+    pages, stops, failed = {}, [None] * days, [True] * days
     
     print(f"Début du scraping France Travail : {days} jours")
     print(f"Du {jour_ref.strftime('%Y-%m-%d')} au {(jour_ref - timedelta(days=days-1)).strftime('%Y-%m-%d')}")
+    print(f"{max_workers} requêtes en parallèle, {requests_per_second} req/s max")
     
+    scheduler = FetchScheduler(headers={"Accept": "application/json"}, max_in_flight=max_workers,
+                               rate=requests_per_second, burst=max_workers)
     try:
-        for jour_offset in range(days):
-            date_cible = (jour_ref - timedelta(days=jour_offset)).strftime("%Y-%m-%d")
-            offset = 0
-            day_jobs_count = 0
-            day_duplicates = 0
-            
-            print(f"\n Jour {jour_offset+1}/{days} - {date_cible}")
-            
-            while offset <= 3000:
-                params = {
-                    "range": f"{offset}-{offset + step - 1}",
-                    "dateCreation": date_cible
-                }
+        pages, stops, failed = crawl_pages(scheduler, auth, dates, max_workers=max_workers)
+    except KeyboardInterrupt:
+        print(f"\nWARNING: Arrêt manuel détecté!")
+    finally:
+        scheduler.close()
+    
+    # Traitement dans l'ordre (jour, offset) avec déduplication
+    for jour_index, date_cible in enumerate(dates):
+        day_jobs_count = 0
+        day_duplicates = 0
+        offset = 0
+        
+        while (jour_index, offset) in pages and (stops[jour_index] is None or offset <= stops[jour_index]):
+            for offre in pages[(jour_index, offset)]:
+                unique_id = create_unique_id(offre)
                 
-                try:
-                    r = requests.get(search_url, headers=headers, params=params, timeout=30)
-                    
-                    # Token expiré
-                    if r.status_code == 401:
-                        print("REFRESH: Token expiré. Récupération d'un nouveau...")
-                        access_token = get_token(client_id, client_secret)
-                        if not access_token:
-                            break
-                        headers["Authorization"] = f"Bearer {access_token}"
-                        r = requests.get(search_url, headers=headers, params=params, timeout=30)
-                    
-                    if r.status_code not in [200, 206]:
-                        print(f"ERREUR: Erreur {r.status_code} à l'offset {offset}")
-                        break
-                    
-                    offres = r.json().get("resultats", [])
-                    
-                    if not offres:
-                        print(f"OK: Fin des offres à l'offset {offset}")
-                        break
-                    
-                    # Traitement avec déduplication
-                    for offre in offres:
-                        unique_id = create_unique_id(offre)
-                        
-                        if unique_id in seen_ids:
-                            day_duplicates += 1
-                            total_duplicates += 1
-                            continue
-                        
-                        seen_ids.add(unique_id)
-                        
-                        # Créer l'objet job normalisé
-                        job = {
-                            "unique_id": unique_id,
-                            "title": offre.get("intitule"),
-                            "company": offre.get("entreprise", {}).get("nom"),
-                            "location": offre.get("lieuTravail", {}).get("libelle"),
-                            "source": "France Travail",
-                            "description": offre.get("description") or "Non renseignée",
-                            "job_url": get_job_url(offre),
-                            "date": format_date(offre.get("dateCreation")),
-                            "contrat": offre.get("typeContratLibelle") or "Non précisé",
-                            "salary": offre.get("salaire", {}).get("libelle") or "Non précisé",
-                            "job_type": offre.get("typeContratLibelle") or "N/A"
-                        }
-                        all_jobs.append(job)
-                        day_jobs_count += 1
-                    
-                    print(f"+ {len(offres)} offres récupérées, {len(offres) - day_duplicates} nouvelles (offset {offset})")
-                    
-                    offset += step
-                    time.sleep(1)
+                if unique_id in seen_ids:
+                    day_duplicates += 1
+                    total_duplicates += 1
+                    continue
                 
-                except Exception as e:
-                    print(f"ERREUR: Erreur à {date_cible}, offset {offset} : {e}")
-                    break
+                seen_ids.add(unique_id)
+                
+                # Créer l'objet job normalisé
+                job = {
+                    "unique_id": unique_id,
+                    "title": offre.get("intitule"),
+                    "company": offre.get("entreprise", {}).get("nom"),
+                    "location": offre.get("lieuTravail", {}).get("libelle"),
+                    "source": "France Travail",
+                    "description": offre.get("description") or "Non renseignée",
+                    "job_url": get_job_url(offre),
+                    "date": format_date(offre.get("dateCreation")),
+                    "contrat": offre.get("typeContratLibelle") or "Non précisé",
+                    "salary": offre.get("salaire", {}).get("libelle") or "Non précisé",
+                    "job_type": offre.get("typeContratLibelle") or "N/A"
+                }
+                all_jobs.append(job)
+                day_jobs_count += 1
             
-            print(f"STATS: Jour terminé: {day_jobs_count} nouvelles offres, {day_duplicates} doublons ignorés")
+            offset += STEP
+        
+        print(f"STATS: {date_cible}: {day_jobs_count} nouvelles offres, {day_duplicates} doublons ignorés")
     
-    except KeyboardInterrupt:
-        print(f"\nWARNING: Arrêt manuel détecté!")
+    incomplete = [date_cible for date_cible, day_failed in zip(dates, failed) if day_failed]
+    if incomplete:
+        print(f"WARNING: {len(incomplete)} jour(s) incomplet(s), à reprendre: {', '.join(incomplete)}")
+    if failed_days is not None:
+        failed_days.extend(incomplete)
     
     # Statistiques finales
     print(f"\nSUCCESS: Scraping terminé!")
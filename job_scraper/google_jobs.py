@@ -4,6 +4,11 @@ import time
 from datetime import datetime, timedelta
 import re
 
+try:
+    from job_scraper.fetch_scheduler import canonical_url
+except ImportError:
+    from fetch_scheduler import canonical_url
+
 
 def parse_relative_date(relative_str, scrape_date):
     """
@@ -117,7 +122,7 @@ def normalize_google_job(raw_job, scrape_date=None):
     return unified_job
 
 
-def scrape_google_jobs(api_key, query, max_results=200, country="tn", language="fr"):
+def scrape_google_jobs(api_key, query, max_results=200, country="tn", language="fr", known_urls=None):
     """
     Scrape Google Jobs via API ScrapingDog
     
@@ -127,6 +132,8 @@ def scrape_google_jobs(api_key, query, max_results=200, country="tn", language="
         max_results: Nombre maximum de résultats (défaut: 200)
         country: Code pays (défaut: "tn")
         language: Code langue (défaut: "fr")
+        known_urls: URLs canoniques déjà en base (mode incrémental): la pagination
+            s'arrête à la première page sans nouvelle offre
     
     Returns:
         Liste des offres d'emploi normalisées
@@ -174,13 +181,22 @@ def scrape_google_jobs(api_key, query, max_results=200, country="tn", language="
             jobs = data.get('jobs_results', [])
             
             if isinstance(jobs, list) and len(jobs) > 0:
+                page_known = 0
                 for job in jobs:
                     if isinstance(job, dict):
                         # Normaliser avec calcul de date
                         unified_job = normalize_google_job(job, scrape_date)
+                        if known_urls is not None and canonical_url(unified_job['job_url']) in known_urls:
+                            page_known += 1
+                            continue
                         all_jobs.append(unified_job)
                 
                 print(f"   ✓ {len(jobs)} offres normalisées - Total: {len(all_jobs)}")
+                
+                # Mode incrémental: page entièrement connue, inutile de consommer plus de quota
+                if known_urls is not None and page_known == len(jobs):
+                    print(f"   ⏹️ {page_known} offres déjà en base, arrêt de la pagination")
+                    break
             else:
                 print(f"   ⚠️ Aucune offre sur cette page")
                 break
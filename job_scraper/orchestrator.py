@@ -0,0 +1,397 @@
+"""
+Scraping Orchestrator - Toutes les sources activées en parallèle
+
+- Chaque source tourne dans son propre worker et publie sa progression
+- Les offres passent par une file unique vers un seul écrivain SQLite qui
+  les insère par lots (bulk_insert_jobs): pas de contention entre sources
+- Un rafraîchissement complet dure le temps de la source la plus lente
+- Mode incrémental (par défaut): chaque source reçoit les URLs déjà en base
+  et s'arrête à la première page sans nouvelle offre; la date la plus
+  récente vue est gardée comme watermark (table scraping_watermarks)
+"""
+
+import importlib
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Set
+
+try:
+    from job_scraper.fetch_scheduler import canonical_url
+except ImportError:
+    from fetch_scheduler import canonical_url
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+def _import_scraper(module: str, name: str):
+    """Import paresseux d'un scraper (selenium, bs4... ne sont chargés qu'à l'usage)"""
+    try:
+        return getattr(importlib.import_module(f"job_scraper.{module}"), name)
+    except ImportError:
+        return getattr(importlib.import_module(module), name)
+
+
+class SourceWatermark:
+    """
+    État incrémental d'une source
+
+    - known_urls: URLs canoniques des offres déjà en base (chargées à la demande),
+      complétées par les offres publiées pendant le run
+    - Date la plus récente vue par portée (requête, mot-clé), enregistrée
+      seulement si le run réussit, et jamais au-delà d'un jour à reprendre (hold)
+    """
+
+    def __init__(self, db, source: str, enabled: bool = True):
+        self.db = db
+        self.source = source
+        self.enabled = enabled
+        self._known_urls: Optional[Set[str]] = None
+        self._latest: Dict[str, Optional[str]] = {}
+        self._holds: Dict[str, str] = {}
+
+    @property
+    def known_urls(self) -> Optional[Set[str]]:
+        """None si le mode incrémental est désactivé"""
+        if not self.enabled:
+            return None
+        if self._known_urls is None:
+            self._known_urls = {canonical_url(url) for url in self.db.get_known_urls(self.source)}
+        return self._known_urls
+
+    def last_date(self, scope: str = '') -> Optional[str]:
+        """Date la plus récente vue lors des runs précédents (YYYY-MM-DD)"""
+        if not self.enabled:
+            return None
+        watermark = self.db.get_watermark(self.source, scope)
+        return watermark['last_date'] if watermark else None
+
+    def observe(self, jobs: List[Dict], scope: str = ''):
+        """Prendre en compte les offres publiées (URLs connues, date maximum)"""
+        latest = self._latest.get(scope)
+        for job in jobs:
+            posted = job.get('date') or job.get('date_posted')
+            if isinstance(posted, str) and DATE_PATTERN.match(posted) and (latest is None or posted[:10] > latest):
+                latest = posted[:10]
+            if self._known_urls is not None and job.get('job_url'):
+                self._known_urls.add(canonical_url(job['job_url']))
+        self._latest[scope] = latest
+
+    def hold(self, day: str, scope: str = ''):
+        """Ne pas avancer le watermark au-delà de ce jour (incomplet, à reprendre au prochain run)"""
+        if scope not in self._holds or day < self._holds[scope]:
+            self._holds[scope] = day
+
+    def save(self):
+        """Avancer les watermarks des portées scrapées"""
+        for scope, latest in self._latest.items():
+            held = self._holds.get(scope)
+            if latest is not None and held is not None and latest > held:
+                latest = held
+            self.db.update_watermark(self.source, scope, latest)
+
+
+# === Exécution des sources: runner(config, emit, progress, watermark) ===
+
+def run_google_jobs(config: Dict, emit: Callable, progress: Callable, watermark: SourceWatermark):
+    scrape_google_jobs = _import_scraper("google_jobs", "scrape_google_jobs")
+    queries = config.get('queries', [])
+    for i, query in enumerate(queries):
+        progress(int((i / len(queries)) * 100), f'Query {i+1}/{len(queries)}: {query}')
+        emit(scrape_google_jobs(
+            api_key=config.get('api_key'),
+            query=query,
+            max_results=config.get('max_results', 200),
+            country=config.get('country', 'tn'),
+            language=config.get('language', 'fr'),
+            known_urls=watermark.known_urls
+        ), query)
+        if i < len(queries) - 1:
+            time.sleep(2)
+
+
+def run_linkedin(config: Dict, emit: Callable, progress: Callable, watermark: SourceWatermark):
+    scrape_linkedin_jobs_free = _import_scraper("Linkedin", "scrape_linkedin_jobs_free")
+    keywords = config.get('keywords', [])
+    for i, keyword in enumerate(keywords):
+        progress(int((i / len(keywords)) * 100), f'Keyword {i+1}/{len(keywords)}: {keyword}')
+        emit(scrape_linkedin_jobs_free(
+            keywords=keyword,
+            location=config.get('location', 'Tunisia'),
+            pages=config.get('pages', 2),
+            get_descriptions=config.get('get_descriptions', False),
+            max_workers=config.get('max_workers', 4),
+            requests_per_second=config.get('requests_per_second', 0.5),
+            known_urls=watermark.known_urls
+        ), keyword)
+        if i < len(keywords) - 1:
+            time.sleep(3)
+
+
+def run_france_travail(config: Dict, emit: Callable, progress: Callable, watermark: SourceWatermark):
+    scrape_france_travail = _import_scraper("france_travail", "scrape_france_travail")
+
+    # Recherche par date de création: seuls les jours depuis le dernier watermark sont
+    # repris, plus overlap_days jours de recouvrement (offres indexées en retard)
+    days = config.get('days', 7)
+    last_date = watermark.last_date()
+    if last_date:
+        elapsed = (date.today() - date.fromisoformat(last_date)).days
+        days = max(1, min(days, elapsed + 1 + config.get('overlap_days', 2)))
+
+    progress(0, f'Scraping en cours ({days} jours)...')
+    failed_days = []
+    emit(scrape_france_travail(
+        client_id=config.get('client_id'),
+        client_secret=config.get('client_secret'),
+        days=days,
+        max_workers=config.get('max_workers', 4),
+        requests_per_second=config.get('requests_per_second', 4.0),
+        failed_days=failed_days
+    ))
+
+    # Le watermark reste au plus ancien jour incomplet: il sera repris au prochain run
+    for day in failed_days:
+        watermark.hold(day)
+
+
+def run_tunisie_travail(config: Dict, emit: Callable, progress: Callable, watermark: SourceWatermark):
+    scrape_tunisie_travail = _import_scraper("tunisietravail", "scrape_tunisie_travail")
+    progress(0, 'Scraping en cours...')
+    emit(scrape_tunisie_travail(
+        ville=config.get('ville', 'tunis'),
+        secteur=config.get('secteur', 'informatique'),
+        max_pages=config.get('max_pages', 3),
+        max_workers=config.get('max_workers', 3),
+        requests_per_second=config.get('requests_per_second', 1.0),
+        known_urls=watermark.known_urls
+    ))
+
+
+SOURCE_RUNNERS = {
+    'google_jobs': run_google_jobs,
+    'linkedin': run_linkedin,
+    'france_travail': run_france_travail,
+    'tunisie_travail': run_tunisie_travail
+}
+
+
+class BatchedJobWriter:
+    """
+    Écrivain unique: regroupe les offres par source et les insère par lots
+
+    Les sources publient avec put(); flush(source) vide le tampon d'une
+    source et attend que ses offres soient en base.
+    """
+
+    def __init__(self, db, batch_size: int = 200, flush_interval: float = 2.0,
+                 on_written: Optional[Callable[[str, Dict], None]] = None):
+        """
+        Args:
+            db: JobDatabase cible
+            batch_size: Offres par transaction
+            flush_interval: Délai maximum avant l'écriture d'un lot incomplet (secondes)
+            on_written: Appelé avec (source, résultat de bulk_insert_jobs) après chaque lot
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+        self.totals: Dict[str, Counter] = {}
+        self._queue = queue.Queue(maxsize=64)  # contre-pression si l'écriture prend du retard
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, source: str, jobs: List[Dict]):
+        """Publier des offres d'une source"""
+        if jobs:
+            self._queue.put(('jobs', source, list(jobs)))
+
+    def flush(self, source: str):
+        """Écrire les offres en attente de cette source et attendre la fin de l'écriture"""
+        done = threading.Event()
+        self._queue.put(('flush', source, done))
+        done.wait()
+
+    def close(self):
+        """Écrire tout ce qui reste et arrêter l'écrivain"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write(self, source: str, jobs: List[Dict]):
+        for start in range(0, len(jobs), self.batch_size):
+            try:
+                result = self.db.bulk_insert_jobs(jobs[start:start + self.batch_size], source)
+            except Exception as e:
+                print(f"[ERROR] Écriture {source} échouée: {e}")
+                continue
+            self.totals.setdefault(source, Counter()).update(result)
+            if self.on_written:
+                self.on_written(source, result)
+
+    def _run(self):
+        pending: Dict[str, List[Dict]] = {}
+        last_flush = time.monotonic()
+
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                break
+
+            if item:
+                kind, source, payload = item
+                if kind == 'jobs':
+                    buffer = pending.setdefault(source, [])
+                    buffer.extend(payload)
+                    if len(buffer) >= self.batch_size:
+                        self._write(source, pending.pop(source))
+                else:
+                    self._write(source, pending.pop(source, []))
+                    payload.set()
+
+            # Lots incomplets: écrits au plus tard après flush_interval
+            if time.monotonic() - last_flush >= self.flush_interval:
+                for source in list(pending):
+                    self._write(source, pending.pop(source))
+                last_flush = time.monotonic()
+
+        for source in list(pending):
+            self._write(source, pending.pop(source))
+
+
+class ScrapingOrchestrator:
+    """
+    Lance les sources en parallèle et tient à jour le statut partagé
+
+    Une source déjà en cours ne peut pas être relancée; les autres restent
+    disponibles (plus de verrou global).
+    """
+
+    def __init__(self, db, status: Dict, batch_size: int = 200, flush_interval: float = 2.0):
+        """
+        Args:
+            db: JobDatabase cible
+            status: Dictionnaire de statut (is_running, sources_status, ...) lu par l'API
+            batch_size: Offres par transaction de l'écrivain
+            flush_interval: Délai maximum avant l'écriture d'un lot incomplet (secondes)
+        """
+        self.db = db
+        self.status = status
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def launch(self, config: Dict, sources: List[str],
+               on_complete: Optional[Callable[[Dict[str, Counter]], None]] = None) -> List[str]:
+        """
+        Démarrer les sources demandées en arrière-plan
+
+        Args:
+            config: Configuration complète (config.json)
+            sources: Sources à lancer
+            on_complete: Appelé avec les totaux par source quand tout est écrit
+
+        Returns:
+            Les sources effectivement lancées (celles déjà en cours sont ignorées)
+        """
+        scrapers = config.get('scrapers', {})
+        with self._lock:
+            started = [source for source in sources
+                       if source in SOURCE_RUNNERS and source not in self._active
+                       and scrapers.get(source, {}).get('enabled')]
+            if not started:
+                return []
+            if not self._active:
+                self.status['start_time'] = datetime.now().isoformat()
+            self._active.update(started)
+            self._update_running()
+
+        for source in started:
+            self.status['sources_status'][source] = {
+                'status': 'running', 'jobs_found': 0, 'message': 'Démarrage...', 'progress': 0
+            }
+
+        thread = threading.Thread(target=self._run, args=(scrapers, started, on_complete), daemon=True)
+        thread.start()
+        return started
+
+    def _update_running(self):
+        self.status['is_running'] = bool(self._active)
+        self.status['current_source'] = ', '.join(sorted(self._active)) or None
+
+    def _on_written(self, source: str, result: Dict):
+        # Un seul écrivain: pas de course sur jobs_found
+        self.status['sources_status'][source]['jobs_found'] += result['inserted']
+
+    def _run(self, scrapers: Dict, sources: List[str], on_complete):
+        writer = BatchedJobWriter(self.db, self.batch_size, self.flush_interval, on_written=self._on_written)
+        writer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+                for source in sources:
+                    pool.submit(self._run_source, source, scrapers[source], writer)
+        finally:
+            writer.close()
+            with self._lock:
+                self._active.difference_update(sources)
+                self._update_running()
+                if not self._active:
+                    self.status['end_time'] = datetime.now().isoformat()
+
+        if on_complete:
+            on_complete(writer.totals)
+
+    def _run_source(self, source: str, config: Dict, writer: BatchedJobWriter):
+        source_status = self.status['sources_status'][source]
+        start = time.time()
+        found = 0
+        watermark = SourceWatermark(self.db, source, enabled=config.get('incremental', True))
+
+        def emit(jobs, scope=''):
+            nonlocal found
+            jobs = jobs or []
+            found += len(jobs)
+            watermark.observe(jobs, scope)
+            writer.put(source, jobs)
+
+        def progress(percent, message):
+            source_status['progress'] = percent
+            source_status['message'] = message
+
+        try:
+            SOURCE_RUNNERS[source](config, emit, progress, watermark)
+            writer.flush(source)
+            watermark.save()
+
+            totals = writer.totals.get(source, Counter())
+            source_status['status'] = 'completed'
+            source_status['progress'] = 100
+            if found:
+                source_status['message'] = (f"{totals['inserted']} nouvelles offres, "
+                                             f"{totals['duplicates']} doublons (dont {totals['updated']} mises à jour)")
+            else:
+                source_status['message'] = 'Aucune offre trouvée'
+            self._log(source, 'success', totals['inserted'], None, time.time() - start)
+
+        except Exception as e:
+            writer.flush(source)
+            source_status['status'] = 'error'
+            source_status['message'] = str(e)[:100]
+            self._log(source, 'error', source_status['jobs_found'], str(e), time.time() - start)
+
+    def _log(self, source: str, status: str, jobs_found: int, errors: Optional[str], execution_time: float):
+        try:
+            self.db.log_scraping(source, status, jobs_found, errors, execution_time)
+        except Exception as e:
+            print(f"[WARNING] Log de scraping {source} non enregistré: {e}")
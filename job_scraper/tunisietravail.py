@@ -5,12 +5,39 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
+from contextlib import contextmanager
+import atexit
 import json
-import time
-import random
+import queue
 import re
+import threading
+
+try:
+    from job_scraper.fetch_scheduler import FetchScheduler, canonical_url, host_key
+except ImportError:
+    from fetch_scheduler import FetchScheduler, canonical_url, host_key
+
+BASE_URL = "https://www.tunisietravail.net"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Contenu attendu: liste de résultats et description d'une offre
+RESULTS_SELECTOR = ".Post, article, .entry-title"
+DESCRIPTION_SELECTORS = [
+    ".PostContent",
+    ".entry-content",
+    ".job-description",
+    ".content",
+    "article .content"
+]
+
+# Chromedriver installé une fois, navigateurs partagés par le processus
+_driver_path = None
+_driver_path_lock = threading.Lock()
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
 
 class DuplicateManager:
     """Gestionnaire de doublons simple"""
@@ -138,39 +165,195 @@ def extract_from_description(description):
     
     return fields
 
+def get_driver_path():
+    """Chemin du chromedriver, installé une seule fois par processus"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
 def setup_driver():
     """Configuration Selenium"""
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-    
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
     try:
-        service = Service(ChromeDriverManager().install())
+        service = Service(get_driver_path())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         return driver
     except Exception as e:
         print(f"❌ Erreur navigateur: {e}")
         return None
 
+class DriverPool:
+    """
+    Pool de navigateurs Chrome headless gardés chauds entre les scrapes
+
+    Les navigateurs sont créés à la demande (au plus `size`) et réutilisés;
+    un navigateur en erreur est fermé et remplacé au prochain besoin.
+    """
+
+    def __init__(self, size=3):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Récupère un navigateur libre (en crée un si le pool n'est pas plein)"""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+
+            if can_create:
+                driver = setup_driver()
+                with self._lock:
+                    if driver is None:
+                        self._created -= 1
+                    else:
+                        self._drivers.append(driver)
+                return driver
+
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def release(self, driver, broken=False):
+        """Rend un navigateur au pool (ou le ferme s'il est en erreur)"""
+        if not broken:
+            self._idle.put(driver)
+            return
+
+        with self._lock:
+            self._created -= 1
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        """Emprunte un navigateur le temps d'un bloc with"""
+        driver = self.acquire()
+        if driver is None:
+            raise RuntimeError("Navigateur indisponible")
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def close(self):
+        """Ferme tous les navigateurs du pool"""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            self._created = 0
+        self._idle = queue.LifoQueue()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+def get_driver_pool(size=3):
+    """Pool de navigateurs partagé par le processus"""
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = DriverPool(size)
+            atexit.register(_driver_pool.close)
+        _driver_pool.size = size
+        return _driver_pool
+
+def wait_for_page(driver, selector=None, timeout=10):
+    """Attente explicite: document chargé, puis présence de `selector` si fourni"""
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        if selector:
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+        return True
+    except TimeoutException:
+        return False
+
+def fetch_html(url, pool, scheduler, is_complete, ready_selector=None):
+    """
+    Récupère le HTML d'une page: HTTP simple d'abord, Selenium si le contenu
+    attendu n'est pas dans le HTML (page rendue en JavaScript)
+
+    Args:
+        url: URL de la page
+        pool: DriverPool pour le repli Selenium
+        scheduler: FetchScheduler (session partagée, débit borné)
+        is_complete: Fonction soup -> bool, vrai si le contenu attendu est présent
+        ready_selector: Sélecteur CSS attendu côté Selenium
+
+    Returns:
+        BeautifulSoup de la page
+    """
+    try:
+        response = scheduler.get(url)
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.content, "html.parser")
+            if is_complete(soup):
+                return soup
+    except Exception as e:
+        print(f"    ⚠️ HTTP indisponible ({e}), passage par le navigateur")
+
+    scheduler.limiter.acquire(host_key(url))
+    with pool.driver() as driver:
+        driver.get(url)
+        wait_for_page(driver, ready_selector)
+        return BeautifulSoup(driver.page_source, "html.parser")
+
+def direct_search_url(ville, secteur):
+    """URL de recherche directe du site (sans passer par le formulaire)"""
+    return f"{BASE_URL}/?s={f'{ville} {secteur}'.replace(' ', '+')}"
+
 def perform_search(driver, ville, secteur):
-    """Effectue une recherche ciblée sur le site"""
+    """
+    Effectue une recherche ciblée sur le site et retourne l'URL des résultats
+
+    Si le formulaire est introuvable ou ne mène nulle part (délai dépassé,
+    erreur du navigateur), l'URL de recherche directe est utilisée.
+    """
+    fallback_url = direct_search_url(ville, secteur)
     try:
         print(f"🔍 Accès à la page de recherche de tunisietravail.net")
-        driver.get("https://www.tunisietravail.net/")
-        time.sleep(3)
-        
+        driver.get(BASE_URL + "/")
+        wait_for_page(driver)
+
         search_selectors = [
             "input[name='search']",
-            "input[type='search']", 
+            "input[type='search']",
             "input[placeholder*='recherch']",
             "input[placeholder*='emploi']",
             "#search",
             ".search-input",
             "input.form-control"
         ]
-        
+
         search_box = None
         for selector in search_selectors:
             try:
@@ -179,229 +362,255 @@ def perform_search(driver, ville, secteur):
                     break
             except:
                 continue
-        
+
+        search_query = f"{ville} {secteur}"
         if not search_box:
             print("⚠️ Champ de recherche non trouvé, tentative avec URL de recherche directe")
-            search_query = f"{ville} {secteur}"
-            search_url = f"https://www.tunisietravail.net/?s={search_query.replace(' ', '+')}"
-            driver.get(search_url)
-            time.sleep(3)
-            return True
-        
-        search_query = f"{ville} {secteur}"
+            return fallback_url
+
         print(f"🔎 Recherche de: '{search_query}'")
-        
+
+        home_url = driver.current_url
         search_box.clear()
         search_box.send_keys(search_query)
         search_box.send_keys(Keys.RETURN)
-        
-        time.sleep(5)
+
+        try:
+            WebDriverWait(driver, 10).until(EC.url_changes(home_url))
+        except TimeoutException:
+            print("⚠️ Le formulaire n'a pas abouti, tentative avec URL de recherche directe")
+            return fallback_url
+
+        wait_for_page(driver, RESULTS_SELECTOR)
         print("✅ Recherche effectuée avec succès")
-        return True
-        
+        return driver.current_url
+
     except Exception as e:
-        print(f"⚠️ Erreur lors de la recherche: {e}")
-        return False
+        print(f"⚠️ Erreur lors de la recherche: {e}, tentative avec URL de recherche directe")
+        return fallback_url
+
+def build_page_url(search_url, page):
+    """URL de la page `page` des résultats de recherche"""
+    if page == 1:
+        return search_url
+    if "page/" in search_url:
+        base_url = search_url.split("page/")[0]
+        return f"{base_url}page/{page}/"
+    separator = "&" if "?" in search_url else "?"
+    return f"{search_url}{separator}paged={page}"
+
+def has_job_details(soup):
+    """Vrai si le titre et la description de l'offre sont dans le HTML"""
+    return soup.find("h1") is not None and any(soup.select_one(selector) for selector in DESCRIPTION_SELECTORS)
+
+def parse_job_details(soup, job_link):
+    """Extraction des détails d'une offre depuis son HTML"""
+    # 1. Extraire et nettoyer le titre
+    title = "Non précisé"
+    title_tag = soup.find("h1")
+    if title_tag:
+        raw_title = title_tag.get_text().strip()
+        title = clean_job_title(raw_title)  # Nettoyer le titre
+
+    # 2. Extraire la description complète
+    description = "Non précisé"
+    for selector in DESCRIPTION_SELECTORS:
+        description_tag = soup.select_one(selector)
+        if description_tag:
+            description = description_tag.get_text().strip()
+            break
+
+    # 3. Extraire les champs depuis la description
+    extracted_fields = extract_from_description(description)
+
+    # 4. Créer l'objet job avec les vraies données
+    job_data = {
+        "title": title,
+        "company": extracted_fields["company"],
+        "location": extracted_fields["location"],
+        "email": extracted_fields["email"],
+        "address": extracted_fields["address"],
+        "tel": extracted_fields["tel"],
+        "job_url": job_link,
+        "description": description,
+        "source": "Tunisie Travail",
+        "date": "Non précisé",
+        "job_type": "N/A",
+        "salary": "Non précisé",
+        "contrat": "N/A"
+    }
 
-def scrape_job_details(driver, job_link):
-    """Extraction des détails d'une offre - VERSION AMÉLIORÉE"""
+    return job_data
+
+def scrape_job_details(job_link, pool, scheduler):
+    """Extraction des détails d'une offre - HTTP d'abord, navigateur du pool sinon"""
     try:
-        driver.get(job_link)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "h1"))
-        )
-        time.sleep(random.uniform(2, 4))
-        
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        
-        # 1. Extraire et nettoyer le titre
-        title = "Non précisé"
-        title_tag = soup.find("h1")
-        if title_tag:
-            raw_title = title_tag.get_text().strip()
-            title = clean_job_title(raw_title)  # Nettoyer le titre
-        
-        # 2. Extraire la description complète
-        description = "Non précisé"
-        description_selectors = [
-            ".PostContent",
-            ".entry-content",
-            ".job-description", 
-            ".content",
-            "article .content"
-        ]
-        
-        for selector in description_selectors:
-            description_tag = soup.select_one(selector)
-            if description_tag:
-                description = description_tag.get_text().strip()
-                break
-        
-        # 3. Extraire les champs depuis la description
-        extracted_fields = extract_from_description(description)
-        
-        # 4. Créer l'objet job avec les vraies données
-        job_data = {
-            "title": title,
-            "company": extracted_fields["company"],
-            "location": extracted_fields["location"],
-            "email": extracted_fields["email"],
-            "address": extracted_fields["address"],
-            "tel": extracted_fields["tel"],
-            "job_url": job_link,
-            "description": description,
-            "source": "Tunisie Travail",
-            "date": "Non précisé",
-            "job_type": "N/A",
-            "salary": "Non précisé",
-            "contrat": "N/A"
-        }
-        
-        return job_data
-        
+        soup = fetch_html(job_link, pool, scheduler, has_job_details, "h1")
+        return parse_job_details(soup, job_link)
+
     except Exception as e:
         print(f"⚠️ Erreur extraction: {e}")
         return None
 
-def scrape_search_results(driver, ville, secteur, max_pages=10):
-    """Scrape les résultats de recherche"""
-    
+def extract_job_links(soup):
+    """Liens d'offres d'une page de résultats (URLs absolues, 50 maximum)"""
+    job_selectors = [
+        ".Post h2 a[href]",
+        ".Post a[href*='emploi']",
+        ".Post a[href*='recrute']",
+        "article.Post a[href]",
+        ".entry-title a[href]",
+        ".job-title a[href]",
+        ".Post .entry-header a[href]"
+    ]
+
+    exclude_keywords = [
+        'facebook', 'twitter', 'linkedin', 'instagram',
+        's\'identifier', 'connexion', 'inscription', 'contact',
+        'javascript', 'cookies', 'confidentialité', 'mentions',
+        'accueil', 'à propos', 'services', 'blog'
+    ]
+
+    include_keywords = [
+        'recrute', 'emploi', 'offre', 'poste', 'candidat',
+        'technicien', 'ingénieur', 'commercial', 'assistant',
+        'responsable', 'chef', 'directeur', 'agent', 'stage'
+    ]
+
+    job_links = []
+    for selector in job_selectors:
+        links = soup.select(selector)
+        if links:
+            filtered_links = []
+            for link in links:
+                href = link.get('href', '')
+                link_text = link.get_text().lower()
+
+                is_excluded = any(keyword in link_text for keyword in exclude_keywords)
+                is_job_related = any(keyword in link_text for keyword in include_keywords)
+                has_valid_href = href and not href.startswith('#') and len(href) > 10
+
+                if not is_excluded and is_job_related and has_valid_href:
+                    filtered_links.append(href)
+
+            if filtered_links:
+                job_links = filtered_links
+                break
+
+    if len(job_links) > 50:
+        print(f"⚠️ Limitation à 50 premiers liens")
+        job_links = job_links[:50]
+
+    normalized = []
+    for job_link in job_links:
+        if job_link.startswith('/'):
+            job_link = BASE_URL + job_link
+        elif not job_link.startswith('http'):
+            job_link = BASE_URL + "/" + job_link
+        normalized.append(job_link)
+
+    return normalized
+
+def scrape_search_results(pool, scheduler, search_url, max_pages=10, known_urls=None):
+    """
+    Scrape les résultats de recherche, offres d'une page récupérées en parallèle
+
+    Avec known_urls (mode incrémental), les offres déjà en base ne sont pas
+    téléchargées et la pagination s'arrête à la première page sans nouvelle offre.
+    """
+
     duplicate_manager = DuplicateManager()
     matching_jobs = []
-    
+
     try:
         for page in range(1, max_pages + 1):
             print(f"\n📄 Page {page}/{max_pages} des résultats de recherche")
-            
-            if page > 1:
-                current_url = driver.current_url
-                if "page/" in current_url:
-                    base_url = current_url.split("page/")[0]
-                    driver.get(f"{base_url}page/{page}/")
-                else:
-                    separator = "&" if "?" in current_url else "?"
-                    driver.get(f"{current_url}{separator}paged={page}")
-                
-                time.sleep(3)
-            
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            
-            job_selectors = [
-                ".Post h2 a[href]",
-                ".Post a[href*='emploi']",
-                ".Post a[href*='recrute']",
-                "article.Post a[href]",
-                ".entry-title a[href]",
-                ".job-title a[href]",
-                ".Post .entry-header a[href]"
-            ]
-            
-            job_links = []
-            for selector in job_selectors:
-                links = soup.select(selector)
-                if links:
-                    filtered_links = []
-                    for link in links:
-                        href = link.get('href', '')
-                        link_text = link.get_text().lower()
-                        
-                        exclude_keywords = [
-                            'facebook', 'twitter', 'linkedin', 'instagram',
-                            's\'identifier', 'connexion', 'inscription', 'contact',
-                            'javascript', 'cookies', 'confidentialité', 'mentions',
-                            'accueil', 'à propos', 'services', 'blog'
-                        ]
-                        
-                        include_keywords = [
-                            'recrute', 'emploi', 'offre', 'poste', 'candidat',
-                            'technicien', 'ingénieur', 'commercial', 'assistant',
-                            'responsable', 'chef', 'directeur', 'agent', 'stage'
-                        ]
-                        
-                        is_excluded = any(keyword in link_text for keyword in exclude_keywords)
-                        is_job_related = any(keyword in link_text for keyword in include_keywords)
-                        has_valid_href = href and not href.startswith('#') and len(href) > 10
-                        
-                        if not is_excluded and is_job_related and has_valid_href:
-                            filtered_links.append(href)
-                    
-                    if filtered_links:
-                        job_links = filtered_links
-                        print(f"✅ Trouvé {len(job_links)} liens d'offres")
-                        break
-            
-            if len(job_links) > 50:
-                print(f"⚠️ Limitation à 50 premiers liens")
-                job_links = job_links[:50]
-            
+
+            soup = fetch_html(build_page_url(search_url, page), pool, scheduler,
+                              lambda s: bool(extract_job_links(s)), RESULTS_SELECTOR)
+            job_links = extract_job_links(soup)
+
             if not job_links:
                 print("❌ Aucun lien d'offre valide trouvé")
                 break
-            
+
+            print(f"✅ Trouvé {len(job_links)} liens d'offres")
+
+            if known_urls is not None:
+                new_links = [job_link for job_link in job_links if canonical_url(job_link) not in known_urls]
+                if not new_links:
+                    print(f"⏹️ {len(job_links)} offres déjà en base, arrêt de la pagination")
+                    break
+                print(f"🆕 {len(new_links)} nouvelles, {len(job_links) - len(new_links)} déjà en base")
+                job_links = new_links
+
+            # Détails en parallèle; déduplication dans l'ordre des liens
+            details = scheduler.map(lambda job_link: scrape_job_details(job_link, pool, scheduler), job_links)
             page_matches = 0
-            
-            for i, job_link in enumerate(job_links, 1):
-                try:
-                    if job_link.startswith('/'):
-                        job_link = "https://www.tunisietravail.net" + job_link
-                    elif not job_link.startswith('http'):
-                        job_link = "https://www.tunisietravail.net/" + job_link
-                    
-                    print(f"  📋 Analyse offre {i}/{len(job_links)}")
-                    
-                    job_data = scrape_job_details(driver, job_link)
-                    if not job_data:
-                        continue
-                    
-                    if duplicate_manager.is_duplicate(job_link, job_data):
-                        print(f"    🔄 Doublon ignoré")
-                        continue
-                    
-                    matching_jobs.append(job_data)
-                    page_matches += 1
-                    print(f"    ✅ {job_data['title'][:40]}... - {job_data['company']}")
-                    
-                    time.sleep(random.uniform(2, 4))
-                    
-                except Exception as e:
-                    print(f"    ⚠️ Erreur: {e}")
+
+            for job_link, job_data in zip(job_links, details):
+                if not job_data or isinstance(job_data, Exception):
+                    continue
+
+                if duplicate_manager.is_duplicate(job_link, job_data):
+                    print(f"    🔄 Doublon ignoré")
                     continue
-            
+
+                matching_jobs.append(job_data)
+                page_matches += 1
+                print(f"    ✅ {job_data['title'][:40]}... - {job_data['company']}")
+
             print(f"📊 Page {page}: {page_matches} nouvelles offres")
             print(f"📊 Total: {len(matching_jobs)} offres")
-            
-            time.sleep(random.uniform(3, 6))
-    
+
     except Exception as e:
         print(f"❌ Erreur scraping: {e}")
-    
+
     return matching_jobs, duplicate_manager
 
-def scrape_tunisie_travail(ville, secteur, max_pages=10):
-    """Scrape les offres d'emploi avec recherche ciblée"""
-    
+def scrape_tunisie_travail(ville, secteur, max_pages=10, max_workers=3, requests_per_second=1.0,
+                           known_urls=None):
+    """
+    Scrape les offres d'emploi avec recherche ciblée
+
+    Args:
+        ville: Ville recherchée
+        secteur: Secteur recherché
+        max_pages: Nombre de pages de résultats
+        max_workers: Taille du pool de navigateurs
+        requests_per_second: Débit maximum vers le site (HTTP et navigateurs)
+        known_urls: URLs canoniques déjà en base (mode incrémental)
+    """
+
     print(f"Recherche: {ville.upper()} + {secteur.upper()}")
     print(f"Pages: {max_pages}")
-    
-    driver = setup_driver()
-    if not driver:
-        return []
-    
+
+    pool = get_driver_pool(max_workers)
+    scheduler = FetchScheduler(headers={"User-Agent": USER_AGENT}, max_in_flight=max_workers * 2,
+                               rate=requests_per_second)
+
     try:
-        if not perform_search(driver, ville, secteur):
+        try:
+            with pool.driver() as driver:
+                search_url = perform_search(driver, ville, secteur)
+        except RuntimeError as e:
+            print(f"Erreur: {e}")
+            return []
+
+        if not search_url:
             print("Erreur: Impossible d'effectuer la recherche")
             return []
-        
-        matching_jobs, duplicate_manager = scrape_search_results(driver, ville, secteur, max_pages)
-        
+
+        matching_jobs, duplicate_manager = scrape_search_results(pool, scheduler, search_url, max_pages, known_urls)
+
     except Exception as e:
         print(f"Erreur: {e}")
         matching_jobs = []
     finally:
-        driver.quit()
-    
+        scheduler.close()
+
     print(f"\nTerminé: {len(matching_jobs)} offres trouvées")
-    
+
     return matching_jobs  # Retourne directement la liste
 
 def save_to_json(data, filename):
@@ -0,0 +1,135 @@
+# llm_cache.py - Cache persistant (SQLite) des réponses LLM, adressé par contenu
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class LLMResponseCache:
+    """
+    Cache disque des réponses LLM
+
+    - Clé = SHA-256 du contenu de la requête (textes, modèle, version du prompt)
+    - Expiration par TTL
+    - Éviction LRU au-delà de max_entries
+    - Partagé entre workers/processus via le fichier SQLite (mode WAL)
+    """
+
+    def __init__(self, db_path: str = "cache/llm_cache.db",
+                 ttl: int = 7 * 24 * 3600, max_entries: int = 5000):
+        """
+        Args:
+            db_path: Chemin du fichier SQLite du cache
+            ttl: Durée de vie d'une entrée en secondes
+            max_entries: Nombre maximum d'entrées avant éviction LRU
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)')
+        conn.commit()
+
+    def _get_connection(self):
+        """Connexion SQLite du thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Clé de cache = SHA-256 du JSON canonique des éléments de la requête"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retourne la réponse en cache (None si absente ou expirée)"""
+        try:
+            conn = self._get_connection()
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+        except (sqlite3.Error, ValueError) as e:
+            print(f"[WARNING] Cache LLM indisponible (lecture): {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: Dict, namespace: str = "default"):
+        """Enregistre une réponse et applique l'éviction LRU"""
+        try:
+            conn = self._get_connection()
+            now = time.time()
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_cache (cache_key, namespace, response, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, namespace, json.dumps(response, ensure_ascii=False), now, now))
+
+            # Éviction: expirées puis les moins récemment utilisées
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            conn.execute('''
+                DELETE FROM llm_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_cache
+                    ORDER BY last_access DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+            conn.commit()
+
+        except sqlite3.Error as e:
+            print(f"[WARNING] Cache LLM indisponible (écriture): {e}")
+
+    def clear(self, namespace: Optional[str] = None):
+        """Vide le cache (ou un seul namespace)"""
+        conn = self._get_connection()
+        if namespace:
+            conn.execute("DELETE FROM llm_cache WHERE namespace = ?", (namespace,))
+        else:
+            conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+    def stats(self) -> Dict:
+        """Statistiques du cache"""
+        count = self._get_connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {'entries': count, 'hits': self.hits, 'misses': self.misses}
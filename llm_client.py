@@ -0,0 +1,295 @@
+# llm_client.py - Client HTTP partagé pour les appels LLM (Groq, API compatible OpenAI)
+
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuts réessayés: limite de débit et erreurs serveur transitoires
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_clients: Dict[Tuple[str, str], 'LLMClient'] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(url: str, api_key: str) -> 'LLMClient':
+    """
+    Client partagé par le processus pour une URL et une clé données
+
+    Configuration par variables d'environnement:
+        LLM_MAX_CONCURRENCY: requêtes simultanées maximum (défaut: 4)
+        LLM_TOKENS_PER_MINUTE: budget de tokens par minute, 0 = illimité (défaut: 30000)
+        LLM_MAX_RETRIES: nombre de nouvelles tentatives sur 429/5xx (défaut: 4)
+        LLM_CALL_DEADLINE: durée maximum d'un appel, attentes et tentatives comprises (défaut: 120s)
+    """
+    key = (url, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = LLMClient(
+                url, api_key,
+                max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', 4)),
+                tokens_per_minute=int(os.getenv('LLM_TOKENS_PER_MINUTE', 30000)),
+                max_retries=int(os.getenv('LLM_MAX_RETRIES', 4)),
+                call_deadline=float(os.getenv('LLM_CALL_DEADLINE', 120))
+            )
+            _clients[key] = client
+    return client
+
+
+class TokenBudget:
+    """
+    Seau à jetons (token bucket) pour le budget de tokens par minute
+
+    Les tokens d'une requête sont réservés sur une estimation avant l'envoi,
+    puis ajustés avec la consommation réelle (usage.total_tokens).
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: int, deadline_at: Optional[float] = None) -> bool:
+        """
+        Attendre que le budget permette de consommer ces tokens
+
+        Returns:
+            False si le budget ne le permet pas avant deadline_at (time.monotonic)
+        """
+        tokens = min(tokens, self.capacity)  # une requête plus grosse que le budget passe seule
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+            if deadline_at is not None and time.monotonic() + wait > deadline_at:
+                return False
+            time.sleep(min(wait, 5.0))
+
+    def adjust(self, reserved: int, used: int):
+        """Corriger la réservation avec la consommation réelle"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + reserved - used)
+
+
+class LLMClient:
+    """
+    Client LLM partagé
+
+    - Session HTTP keep-alive (pool de connexions, pas de handshake TLS par appel)
+    - Nouvelles tentatives sur 429/5xx et erreurs de connexion: backoff
+      exponentiel avec jitter, en respectant l'en-tête Retry-After. Un timeout
+      de lecture n'est pas réessayé: la requête a pu être traitée (et facturée)
+    - Échéance globale par appel (attentes, tentatives et délais compris)
+    - Limite globale de requêtes simultanées et budget de tokens par minute
+    - Variante asyncio (apost) pour lancer plusieurs appels en parallèle
+    """
+
+    def __init__(self, url: str, api_key: str, max_concurrency: int = 4,
+                 tokens_per_minute: int = 30000, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 call_deadline: float = 120.0):
+        """
+        Args:
+            url: Endpoint chat/completions
+            api_key: Clé API (en-tête Authorization)
+            max_concurrency: Requêtes simultanées maximum (tous threads confondus)
+            tokens_per_minute: Budget de tokens par minute (0 = illimité)
+            max_retries: Nombre de nouvelles tentatives après un échec transitoire
+            backoff_base: Délai de base du backoff exponentiel (secondes)
+            backoff_max: Délai maximum entre deux tentatives (secondes)
+            call_deadline: Durée maximum d'un appel par défaut, tentatives comprises (secondes)
+        """
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.call_deadline = call_deadline
+        self.budget = TokenBudget(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+    @staticmethod
+    def estimate_tokens(payload: Dict) -> int:
+        """Estimation des tokens d'une requête (~4 caractères par token + max_tokens de sortie)"""
+        chars = 0
+        images = 0
+        for message in payload.get('messages', []):
+            content = message.get('content', '')
+            if isinstance(content, str):
+                chars += len(content)
+                continue
+            for part in content:
+                if part.get('type') == 'text':
+                    chars += len(part.get('text', ''))
+                else:
+                    images += 1
+        return chars // 4 + images * 1000 + payload.get('max_tokens', 1024)
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Délai avant la prochaine tentative: Retry-After si fourni, sinon backoff avec jitter"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    try:
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                        return min(max(delay, 0.0), self.backoff_max)
+                    except (TypeError, ValueError):
+                        pass
+
+        # Full jitter: uniforme entre 0 et le plafond exponentiel
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _next_delay(self, attempt: int, response: Optional[requests.Response],
+                    deadline_at: float) -> Optional[float]:
+        """Délai avant la prochaine tentative, None si les tentatives ou l'échéance sont épuisées"""
+        if attempt == self.max_retries:
+            return None
+        delay = self._retry_delay(attempt, response)
+        if time.monotonic() + delay >= deadline_at:
+            return None
+        return delay
+
+    def _send(self, payload: Dict, timeout: float, deadline_at: float) -> requests.Response:
+        """
+        Une tentative: budget de tokens, limite de concurrence, puis envoi sur la session
+
+        Raises:
+            requests.Timeout: si l'échéance de l'appel est atteinte avant l'envoi
+        """
+        reserved = self.estimate_tokens(payload)
+        if self.budget and not self.budget.acquire(reserved, deadline_at):
+            raise requests.Timeout("Échéance de l'appel LLM atteinte (budget de tokens)")
+
+        if not self._semaphore.acquire(timeout=max(deadline_at - time.monotonic(), 0)):
+            if self.budget:
+                self.budget.adjust(reserved, 0)
+            raise requests.Timeout("Échéance de l'appel LLM atteinte (requêtes simultanées)")
+
+        try:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout("Échéance de l'appel LLM atteinte")
+            response = self.session.post(self.url, json=payload, timeout=min(timeout, remaining))
+        except requests.RequestException:
+            if self.budget:
+                self.budget.adjust(reserved, 0)
+            raise
+        finally:
+            self._semaphore.release()
+
+        if self.budget:
+            used = reserved
+            if response.status_code == 200:
+                try:
+                    used = response.json().get('usage', {}).get('total_tokens', reserved)
+                except ValueError:
+                    pass
+            elif response.status_code in RETRY_STATUSES:
+                used = 0  # requête refusée: rien n'a été consommé
+            self.budget.adjust(reserved, used)
+
+        return response
+
+    def post(self, json: Dict, timeout: float = 60,
+             deadline: Optional[float] = None) -> requests.Response:
+        """
+        Envoyer une requête chat/completions avec nouvelles tentatives
+
+        Seuls les statuts RETRY_STATUSES et les erreurs de connexion (dont
+        ConnectTimeout) sont réessayés; un timeout de lecture est levé tout de suite.
+
+        Args:
+            json: Corps de la requête (model, messages, ...)
+            timeout: Timeout HTTP de chaque tentative (secondes)
+            deadline: Durée maximum de l'appel, tentatives comprises (défaut: call_deadline)
+
+        Returns:
+            La réponse HTTP (la dernière en cas d'échecs répétés sur 429/5xx)
+
+        Raises:
+            requests.RequestException: timeout de lecture, échéance atteinte, ou
+            erreur de connexion à la dernière tentative
+        """
+        deadline_at = time.monotonic() + (deadline or self.call_deadline)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            error = None
+            try:
+                response = self._send(json, timeout, deadline_at)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except requests.ConnectionError as e:
+                error = e
+
+            delay = self._next_delay(attempt, response, deadline_at)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            status = response.status_code if response is not None else 'erreur réseau'
+            print(f"[WARNING] LLM {status}, nouvelle tentative dans {delay:.1f}s "
+                  f"({attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    async def apost(self, json: Dict, timeout: float = 60,
+                    deadline: Optional[float] = None) -> requests.Response:
+        """
+        Variante asyncio de post()
+
+        Chaque tentative s'exécute dans un thread sur la session partagée (mêmes
+        limites de concurrence et de budget, mêmes règles de nouvelle tentative
+        et d'échéance); les attentes entre tentatives ne bloquent pas la boucle
+        d'événements.
+        """
+        deadline_at = time.monotonic() + (deadline or self.call_deadline)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            error = None
+            try:
+                response = await asyncio.to_thread(self._send, json, timeout, deadline_at)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except requests.ConnectionError as e:
+                error = e
+
+            delay = self._next_delay(attempt, response, deadline_at)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            await asyncio.sleep(delay)
+
+    def close(self):
+        """Fermer les connexions du pool"""
+        self.session.close()
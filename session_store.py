@@ -0,0 +1,193 @@
+# session_store.py - Sessions Flask côté serveur (SQLite), seul un identifiant opaque dans le cookie
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dont le contenu reste sur le serveur (modified mis à jour à chaque écriture)"""
+
+    def __init__(self, initial: Optional[Dict] = None, sid: Optional[str] = None,
+                 new: bool = False, expires_at: float = 0.0):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """
+    Backend de session SQLite partagé entre workers (mode WAL)
+
+    - Le cookie ne contient qu'un identifiant aléatoire (256 bits)
+    - Les données sont sérialisées comme les sessions Flask (JSON étiqueté)
+    - Expiration glissante (ttl) et purge périodique des sessions expirées
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, db_path: str = "cache/sessions.db", ttl: int = 7 * 24 * 3600,
+                 sweep_interval: int = 3600):
+        """
+        Args:
+            db_path: Fichier SQLite des sessions
+            ttl: Durée de vie d'une session inactive (secondes)
+            sweep_interval: Intervalle minimum entre deux purges des sessions expirées
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)')
+        conn.commit()
+
+    def _get_connection(self):
+        """Connexion SQLite du thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _new_sid() -> str:
+        return secrets.token_urlsafe(32)
+
+    def _load(self, sid: str):
+        """(données, expiration) d'une session valide, None si absente ou expirée"""
+        row = self._get_connection().execute(
+            "SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return self.serializer.loads(row[0]), row[1]
+
+    def _write(self, conn, sid: str, data: Dict, expires_at: float):
+        conn.execute('''
+            INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+        ''', (sid, self.serializer.dumps(dict(data)), expires_at))
+
+    def _sweep(self):
+        """Supprimer les sessions expirées (au plus une fois par sweep_interval)"""
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        try:
+            self._get_connection().execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+        except sqlite3.Error as e:
+            print(f"[WARNING] Purge des sessions échouée: {e}")
+
+    def open_session(self, app, request) -> ServerSideSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                loaded = self._load(sid)
+            except (sqlite3.Error, ValueError) as e:
+                print(f"[WARNING] Session illisible: {e}")
+                loaded = None
+            if loaded is not None:
+                data, expires_at = loaded
+                return ServerSideSession(data, sid=sid, expires_at=expires_at)
+
+        return ServerSideSession(sid=self._new_sid(), new=True)
+
+    def save_session(self, app, session: ServerSideSession, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        self._sweep()
+
+        # Session vidée: supprimer la ligne et le cookie
+        if not session:
+            if session.modified and not session.new:
+                self._get_connection().execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl
+        # Données inchangées: prolonger l'expiration au plus une fois par demi-TTL
+        if not session.modified and session.expires_at - now > self.ttl / 2:
+            return
+
+        if session.modified or session.new:
+            self._write(self._get_connection(), session.sid, session, expires_at)
+        else:
+            self._get_connection().execute(
+                "UPDATE sessions SET expires_at = ? WHERE sid = ?", (expires_at, session.sid)
+            )
+        session.expires_at = expires_at
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def modify(self, sid: str, update: Callable[[Dict], None]) -> bool:
+        """
+        Modifier une session en dehors d'une requête (ex: fin d'un flux SSE)
+
+        La lecture et l'écriture se font dans une même transaction.
+
+        Args:
+            sid: Identifiant de la session
+            update: Fonction qui modifie le dictionnaire de session en place
+
+        Returns:
+            False si la session n'existe pas ou a expiré
+        """
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,)
+            ).fetchone()
+            if row is None or row[1] < time.time():
+                conn.execute("ROLLBACK")
+                return False
+
+            data = self.serializer.loads(row[0])
+            update(data)
+            self._write(conn, sid, data, row[1])
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """Module app importé dans un dossier temporaire (jobs.db, cache/ et uploads isolés)"""
+    workdir = tmp_path_factory.mktemp('app')
+    previous = os.getcwd()
+    os.environ.setdefault('ATS_API_KEY', 'test')
+    os.chdir(workdir)
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(previous)
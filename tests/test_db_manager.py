@@ -0,0 +1,22 @@
+from job_scraper.db_manager import JobDatabase
+
+
+def _job(title, description='desc'):
+    return {'title': title, 'company': 'ACME', 'location': 'Tunis',
+            'description': description, 'job_url': f'https://example.com/{title}',
+            'date': '2024-01-10'}
+
+
+def test_bulk_insert_counts_keep_historical_duplicates_meaning(tmp_path):
+    db = JobDatabase(str(tmp_path / 'jobs.db'))
+
+    first = db.bulk_insert_jobs([_job('a'), _job('b'), _job('a')], 'Test')
+    assert first == {'inserted': 2, 'updated': 0, 'duplicates': 1}
+
+    second = db.bulk_insert_jobs([_job('a', 'reposted'), _job('c')], 'Test')
+    assert second == {'inserted': 1, 'updated': 1, 'duplicates': 1}
+    assert second['inserted'] + second['duplicates'] == 2
+
+    # La transaction est bien terminée: une autre connexion peut écrire
+    other = JobDatabase(str(tmp_path / 'jobs.db'))
+    assert other.bulk_insert_jobs([_job('d')], 'Test')['inserted'] == 1
@@ -0,0 +1,69 @@
+def _job(title, date, source='Tunisie Travail'):
+    return {
+        'title': title,
+        'company': 'ACME',
+        'location': 'Tunis',
+        'description': f'{title} description',
+        'job_url': f'https://example.com/{title}',
+        'date': date,
+        'job_type': 'CDI',
+        'salary': '',
+        'contrat': 'CDI'
+    }
+
+
+def test_all_dates_keeps_jobs_without_valid_date(app_module):
+    app_module.scraping_db.bulk_insert_jobs([
+        _job('dev python', '2024-01-10'),
+        _job('dev java', '2024-02-20'),
+        _job('dev php', 'Non précisé'),
+        _job('dev go', 'Non précisé'),
+    ], 'Tunisie Travail')
+    platform = app_module.JobPlatform()
+
+    _, total_all, _ = platform.search_jobs(source='Tunisie Travail', date_range='all')
+    _, total_none, _ = platform.search_jobs(source='Tunisie Travail', date_range='')
+
+    assert total_all == total_none == 4
+
+
+def test_custom_date_range_keeps_only_valid_dates(app_module):
+    app_module.scraping_db.bulk_insert_jobs([
+        _job('data engineer', '2024-01-10', source='Range Test'),
+        _job('data analyst', 'Non précisé', source='Range Test'),
+    ], 'Range Test')
+    platform = app_module.JobPlatform()
+
+    _, total, _ = platform.search_jobs(source='Range Test', date_range='all',
+                                       custom_start_date='2024-01-01')
+
+    assert total == 1
+
+
+def test_refresh_picks_up_reposted_and_deactivated_jobs(app_module):
+    db = app_module.scraping_db
+    db.bulk_insert_jobs([
+        _job('refresh alpha', '2024-03-01'),
+        _job('refresh beta', '2024-03-02'),
+    ], 'Refresh Test')
+    platform = app_module.JobPlatform()
+
+    # Republication: même hash, nouvelle description (UPSERT sur la ligne existante)
+    reposted = _job('refresh alpha', '2024-04-01')
+    reposted['description'] = 'kubernetes terraform'
+    db.bulk_insert_jobs([reposted, _job('refresh gamma', '2024-04-02')], 'Refresh Test')
+
+    assert platform.refresh() == 2
+    _, total, _ = platform.search_jobs(source='Refresh Test')
+    _, total_kubernetes, _ = platform.search_jobs(keyword='kubernetes', source='Refresh Test')
+    assert total == 3
+    assert total_kubernetes == 1
+
+    # Relire la dernière seconde ne compte pas les lignes inchangées
+    assert platform.refresh() == 0
+
+    beta_id = int(platform._data.df.loc[platform._data.df['title'] == 'refresh beta', 'id'].iloc[0])
+    db.deactivate_job(beta_id)
+    platform.refresh()
+    _, total, _ = platform.search_jobs(source='Refresh Test')
+    assert total == 2
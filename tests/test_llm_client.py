@@ -0,0 +1,142 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import llm_client
+from llm_client import LLMClient
+
+
+class StubServer:
+    """Serveur HTTP local: rejoue une liste de réponses (statut, en-têtes, délai)"""
+
+    def __init__(self):
+        self.responses = []
+        self.hits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with stub.lock:
+                    stub.hits += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    status, headers, delay = stub.responses.pop(0) if stub.responses else (200, {}, 0)
+                try:
+                    time.sleep(delay)
+                    body = b'{"choices": []}'
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass  # client parti (timeout de lecture)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1/chat/completions'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def _client(stub, **kwargs):
+    options = {'tokens_per_minute': 0, 'max_retries': 3, 'backoff_base': 0.1}
+    options.update(kwargs)
+    return LLMClient(stub.url, 'test', **options)
+
+
+def test_retry_after_is_honoured(stub):
+    stub.responses = [(429, {'Retry-After': '1'}, 0), (200, {}, 0)]
+    client = _client(stub, backoff_base=0)
+
+    start = time.monotonic()
+    response = client.post({'messages': []}, timeout=5)
+
+    assert response.status_code == 200
+    assert stub.hits == 2
+    assert time.monotonic() - start >= 0.9
+
+
+def test_server_errors_are_retried_with_backoff(stub, monkeypatch):
+    # Jitter neutralisé: toujours le plafond exponentiel (0.1s puis 0.2s)
+    monkeypatch.setattr(llm_client.random, 'uniform', lambda low, high: high)
+    stub.responses = [(503, {}, 0), (502, {}, 0), (200, {}, 0)]
+    client = _client(stub)
+
+    start = time.monotonic()
+    response = client.post({'messages': []}, timeout=5)
+
+    assert response.status_code == 200
+    assert stub.hits == 3
+    assert time.monotonic() - start >= 0.3
+
+
+def test_server_errors_return_last_response_when_retries_exhausted(stub):
+    stub.responses = [(500, {}, 0)] * 3
+    client = _client(stub, max_retries=2, backoff_base=0.01)
+
+    assert client.post({'messages': []}, timeout=5).status_code == 500
+    assert stub.hits == 3
+
+
+def test_read_timeout_is_not_retried(stub):
+    stub.responses = [(200, {}, 1.0)]
+    client = _client(stub)
+
+    start = time.monotonic()
+    with pytest.raises(requests.ReadTimeout):
+        client.post({'messages': []}, timeout=0.2)
+
+    assert stub.hits == 1
+    assert time.monotonic() - start < 0.9
+
+
+def test_call_deadline_caps_the_http_timeout(stub):
+    stub.responses = [(200, {}, 1.0)]
+    client = _client(stub)
+
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.post({'messages': []}, timeout=10, deadline=0.3)
+
+    assert stub.hits == 1
+    assert time.monotonic() - start < 0.9
+
+
+def test_semaphore_bounds_in_flight_calls(stub):
+    stub.responses = [(200, {}, 0.2)] * 6
+    client = _client(stub, max_concurrency=2)
+
+    threads = [threading.Thread(target=client.post, args=({'messages': []},), kwargs={'timeout': 5})
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub.hits == 6
+    assert stub.max_in_flight == 2